@@ -3,69 +3,104 @@
 
 #include "cache.h"
 #include "../../lib_hawkeye/champsim_crc2.h"
-#include <map>
 #include <math.h>
+#include <stdlib.h>
+#include <memory>
+#include <vector>
 
 #define NUM_CORE 1
-#define LLC_SETS NUM_CORE*2048
-#define LLC_WAYS 16
 
 //3-bit RRIP counter
 #define MAXRRIP 7
-uint32_t rrip[LLC_SETS][LLC_WAYS];
 
 #include "../../lib_hawkeye/hawkeye_predictor.h"
 #include "../../lib_hawkeye/optgen.h"
 #include "../../lib_hawkeye/helper_function.h"
 
-//Hawkeye predictors for demand and prefetch requests
-Hawkeye_Predictor* predictor_demand;    //2K entries, 5-bit counter per each entry
-Hawkeye_Predictor* predictor_prefetch;  //2K entries, 5-bit counter per each entry
-
-OPTgen optgen_occup_vector[LLC_SETS];   //64 vecotrs, 128 entries each
-
-//Prefectching
-bool prefetching[LLC_SETS][LLC_WAYS];
-
 //Sampler components tracking cache history
 #define SAMPLER_ENTRIES 2800
 #define SAMPLER_HIST 8
 #define SAMPLER_SETS SAMPLER_ENTRIES/SAMPLER_HIST
-vector<map<uint64_t, HISTORY>> cache_history_sampler;  //2800 entries, 4-bytes per each entry
-uint64_t sample_signature[LLC_SETS][LLC_WAYS];
+
+#include "../../lib_hawkeye/sampler.h"
 
 //History time
 #define TIMER_SIZE 1024
-uint64_t set_timer[LLC_SETS];   //64 sets, where 1 timer is used for every set
 
 //Mathmatical functions needed for sampling set
 #define bitmask(l) (((l) == 64) ? (unsigned long long)(-1LL) : ((1LL << (l))-1LL))
 #define bits(x, i, l) (((x) >> (i)) & bitmask(l))
-#define SAMPLED_SET(set) (bits(set, 0 , 6) == bits(set, ((unsigned long long)log2(LLC_SETS) - 6), 6) )  //Helper function to sample 64 sets for each core
-
 
-// Initialize replacement state
-void CACHE::initialize_replacement()
-{
-    //cout << "Initialize Hawkeye replacement policy state" << endl;
+//Hawkeye state of a cache, sized from its own sets and ways
+struct Hawkeye_State{
+    uint32_t sets;
+    uint32_t ways;
+    unsigned long long log2_sets;
+
+    vector<uint32_t> rrip;                  //sets x ways
+    Hawkeye_Predictor predictor_demand;     //2K entries, 5-bit counter per each entry
+    Hawkeye_Predictor predictor_prefetch;   //2K entries, 5-bit counter per each entry
+    vector<OPTgen> optgen_occup_vector;     //1 vector per set, 128 entries each
+    vector<bool> prefetching;               //sets x ways
+    vector<Sampler_Set> cache_history_sampler;  //2800 entries, 8 per sampler set
+    vector<uint64_t> sample_signature;      //sets x ways
+    vector<uint64_t> set_timer;             //1 timer is used for every set
+
+    void init(uint32_t num_set, uint32_t num_way){
+        sets = num_set;
+        ways = num_way;
+        log2_sets = (unsigned long long)log2(sets);
+
+        rrip.assign(sets * ways, MAXRRIP);
+        sample_signature.assign(sets * ways, 0);
+        prefetching.assign(sets * ways, false);
+        set_timer.assign(sets, 0);
+        optgen_occup_vector.resize(sets);
+        for(uint32_t i = 0; i < sets; i++){
+            optgen_occup_vector[i].init(ways-2);
+        }
 
-    for (int i=0; i<LLC_SETS; i++) {
-        for (int j=0; j<LLC_WAYS; j++) {
-            rrip[i][j] = MAXRRIP;
-            sample_signature[i][j] = 0;
-            prefetching[i][j] = false;
+        cache_history_sampler.resize(SAMPLER_SETS);
+        for(int i = 0; i < SAMPLER_SETS; i++){
+            cache_history_sampler[i].init();
         }
-        set_timer[i] = 0;
-        optgen_occup_vector[i].init(LLC_WAYS-2);
     }
 
-    cache_history_sampler.resize(SAMPLER_SETS);
-    for(int i = 0; i < SAMPLER_SETS; i++){
-        cache_history_sampler[i].clear();
+    //Helper function to sample 64 sets for each core, every set of a cache
+    //of fewer than 64 sets
+    bool sampled_set(uint32_t set){
+        if(log2_sets < 6){
+            return true;
+        }
+        return bits(set, 0 , 6) == bits(set, (log2_sets - 6), 6);
+    }
+};
+
+//States of the caches using Hawkeye, in the order they were initialized.
+//There are only a few caches, so scanning their contiguous keys on every
+//access is cheaper than a map lookup
+vector<CACHE*> hawkeye_caches;
+vector<unique_ptr<Hawkeye_State>> hawkeye_states;
+
+Hawkeye_State& hawkeye_state(const CACHE* cache){
+    for(size_t i = 0; i < hawkeye_caches.size(); i++){
+        if(hawkeye_caches[i] == cache){
+            return *hawkeye_states[i];
+        }
     }
+    cerr << "Hawkeye state of " << cache->NAME << " used before initialize_replacement" << endl;
+    abort();
+}
 
-    predictor_prefetch = new Hawkeye_Predictor();
-    predictor_demand = new Hawkeye_Predictor();
+
+// Initialize replacement state
+void CACHE::initialize_replacement()
+{
+    //cout << "Initialize Hawkeye replacement policy state" << endl;
+
+    hawkeye_caches.push_back(this);
+    hawkeye_states.push_back(make_unique<Hawkeye_State>());
+    hawkeye_states.back()->init(NUM_SET, NUM_WAY);
 
     //cout << "Finished initializing Hawkeye replacement policy state" << endl;
 }
@@ -74,9 +109,12 @@ void CACHE::initialize_replacement()
 // Return value should be 0 ~ 15 or 16 (bypass)
 uint32_t CACHE::find_victim(uint32_t triggering_cpu, uint64_t instr_id, uint32_t set, const BLOCK* current_set, uint64_t ip, uint64_t full_addr, uint32_t type)
 {
+    Hawkeye_State& state = hawkeye_state(this);
+    uint32_t* rrip = &state.rrip[set * state.ways];
+
     //Find the line with RRPV of 7 in that set
-    for(uint32_t i = 0; i < LLC_WAYS; i++){
-        if(rrip[set][i] == MAXRRIP){
+    for(uint32_t i = 0; i < state.ways; i++){
+        if(rrip[i] == MAXRRIP){
             return i;
         }
     }
@@ -84,37 +122,27 @@ uint32_t CACHE::find_victim(uint32_t triggering_cpu, uint64_t instr_id, uint32_t
     //If no RRPV of 7, then we find next highest RRPV value (oldest cache-friendly line)
     uint32_t max_rrpv = 0;
     int32_t victim = -1;
-    for(uint32_t i = 0; i < LLC_WAYS; i++){
-        if(rrip[set][i] >= max_rrpv){
-            max_rrpv = rrip[set][i];
+    for(uint32_t i = 0; i < state.ways; i++){
+        if(rrip[i] >= max_rrpv){
+            max_rrpv = rrip[i];
             victim = i;
         }
     }
 
     //Asserting that LRU victim is not -1
     //Predictor will be trained negaively on evictions
-    if(SAMPLED_SET(set)){
-        if(prefetching[set][victim]){
-            predictor_prefetch->decrease(sample_signature[set][victim]);
+    if(state.sampled_set(set)){
+        if(state.prefetching[set * state.ways + victim]){
+            state.predictor_prefetch.decrease(state.sample_signature[set * state.ways + victim]);
         }
         else{
-            predictor_demand->decrease(sample_signature[set][victim]);
+            state.predictor_demand.decrease(state.sample_signature[set * state.ways + victim]);
         }
     }
 
     return victim;
 }
 
-//Helper function for "UpdateReplacementState" to update cache history
-void update_cache_history(unsigned int sample_set, unsigned int currentVal){
-    for(map<uint64_t, HISTORY>::iterator it = cache_history_sampler[sample_set].begin(); it != cache_history_sampler[sample_set].end(); it++){
-        if((it->second).lru < currentVal){
-            (it->second).lru++;
-        }
-    }
-
-}
-
 // Called on every cache hit and cache fill
 void CACHE::update_replacement_state (uint32_t cpu, uint32_t set, uint32_t way, uint64_t paddr, uint64_t PC, uint64_t victim_addr, uint32_t type, uint8_t hit)
 {
@@ -125,76 +153,74 @@ void CACHE::update_replacement_state (uint32_t cpu, uint32_t set, uint32_t way,
         return;
     }
 
+    Hawkeye_State& state = hawkeye_state(this);
+    uint32_t* rrip = &state.rrip[set * state.ways];
+    vector<Sampler_Set>& cache_history_sampler = state.cache_history_sampler;
+    vector<OPTgen>& optgen_occup_vector = state.optgen_occup_vector;
+    vector<uint64_t>& set_timer = state.set_timer;
+    Hawkeye_Predictor* predictor_demand = &state.predictor_demand;
+    Hawkeye_Predictor* predictor_prefetch = &state.predictor_prefetch;
+
     if(type == PREFETCH){
         if(!hit){
-            prefetching[set][way] = true;
+            state.prefetching[set * state.ways + way] = true;
         }
     }
     else{
-        prefetching[set][way] = false;
+        state.prefetching[set * state.ways + way] = false;
     }
 
     //Only if we are using sampling sets for OPTgen
-    if(SAMPLED_SET(set)){
+    if(state.sampled_set(set)){
         uint64_t currentVal = set_timer[set] % OPTGEN_SIZE;
         uint64_t sample_tag = CRC(paddr >> 12) % 256;
         uint32_t sample_set = (paddr >> 6) % SAMPLER_SETS;
 
+        Sampler_Set& sampler = cache_history_sampler[sample_set];
+        HISTORY* entry = sampler.find(sample_tag);
+
         //If line has been used before, ignoring prefetching (demand access operation)
-        if((type != PREFETCH) && (cache_history_sampler[sample_set].find(sample_tag) != cache_history_sampler[sample_set].end())){
+        if((type != PREFETCH) && (entry != NULL)){
             unsigned int current_time = set_timer[set];
-            if(current_time < cache_history_sampler[sample_set][sample_tag].previousVal){
+            if(current_time < entry->previousVal){
                 current_time += TIMER_SIZE;
             }
-            uint64_t previousVal = cache_history_sampler[sample_set][sample_tag].previousVal % OPTGEN_SIZE;
-            bool isWrap = (current_time - cache_history_sampler[sample_set][sample_tag].previousVal) > OPTGEN_SIZE;
+            uint64_t previousVal = entry->previousVal % OPTGEN_SIZE;
+            bool isWrap = (current_time - entry->previousVal) > OPTGEN_SIZE;
 
             //Train predictor positvely for last PC value that was prefetched
             if(!isWrap && optgen_occup_vector[set].is_cache(currentVal, previousVal)){
-                if(cache_history_sampler[sample_set][sample_tag].prefetching){
-                    predictor_prefetch->increase(cache_history_sampler[sample_set][sample_tag].PCval);
+                if(entry->prefetching){
+                    predictor_prefetch->increase(entry->PCval);
                 }
                 else{
-                    predictor_demand->increase(cache_history_sampler[sample_set][sample_tag].PCval);
+                    predictor_demand->increase(entry->PCval);
                 }
             }
             //Train predictor negatively since OPT did not cache this line
             else{
-                if(cache_history_sampler[sample_set][sample_tag].prefetching){
-                    predictor_prefetch->decrease(cache_history_sampler[sample_set][sample_tag].PCval);
+                if(entry->prefetching){
+                    predictor_prefetch->decrease(entry->PCval);
                 }
                 else{
-                    predictor_demand->decrease(cache_history_sampler[sample_set][sample_tag].PCval);
+                    predictor_demand->decrease(entry->PCval);
                 }
             }
             
             optgen_occup_vector[set].set_access(currentVal);
             //Update cache history
-            update_cache_history(sample_set, cache_history_sampler[sample_set][sample_tag].lru);
+            sampler.update_lru(entry->lru);
 
             //Mark prefetching as false since demand access
-            cache_history_sampler[sample_set][sample_tag].prefetching = false;
+            entry->prefetching = false;
         }
         //If line has not been used before, mark as prefetch or demand
-        else if(cache_history_sampler[sample_set].find(sample_tag) == cache_history_sampler[sample_set].end()){
-            //If sampling, find victim from cache
-            if(cache_history_sampler[sample_set].size() == SAMPLER_HIST){
-                //Replace the element in the cache history
-                uint64_t addr_val = 0;
-                for(map<uint64_t, HISTORY>::iterator it = cache_history_sampler[sample_set].begin(); it != cache_history_sampler[sample_set].end(); it++){
-                    if((it->second).lru == (SAMPLER_HIST-1)){
-                        addr_val = it->first;
-                        break;
-                    }
-                }
-                cache_history_sampler[sample_set].erase(addr_val);
-            }
-
-            //Create new entry
-            cache_history_sampler[sample_set][sample_tag].init();
+        else if(entry == NULL){
+            //Create new entry, replacing the LRU one if the sampler set is full
+            entry = sampler.insert(sample_tag);
             //If preftech, mark it as a prefetching or if not, just set the demand access
             if(type == PREFETCH){
-                cache_history_sampler[sample_set][sample_tag].set_prefetch();
+                entry->set_prefetch();
                 optgen_occup_vector[set].set_prefetch(currentVal);
             }
             else{
@@ -202,30 +228,30 @@ void CACHE::update_replacement_state (uint32_t cpu, uint32_t set, uint32_t way,
             }
 
             //Update cache history
-            update_cache_history(sample_set, SAMPLER_HIST-1);
+            sampler.update_lru(SAMPLER_HIST-1);
         }
         //If line is neither of the two above options, then it is a prefetch line
         else{
-            uint64_t previousVal = cache_history_sampler[sample_set][sample_tag].previousVal % OPTGEN_SIZE;
-            if(set_timer[set] - cache_history_sampler[sample_set][sample_tag].previousVal < 5*NUM_CORE){
+            uint64_t previousVal = entry->previousVal % OPTGEN_SIZE;
+            if(set_timer[set] - entry->previousVal < 5*NUM_CORE){
                 if(optgen_occup_vector[set].is_cache(currentVal, previousVal)){
-                    if(cache_history_sampler[sample_set][sample_tag].prefetching){
-                        predictor_prefetch->increase(cache_history_sampler[sample_set][sample_tag].PCval);
+                    if(entry->prefetching){
+                        predictor_prefetch->increase(entry->PCval);
                     }
                     else{
-                        predictor_demand->increase(cache_history_sampler[sample_set][sample_tag].PCval);
+                        predictor_demand->increase(entry->PCval);
                     }
                 }
             }
-            cache_history_sampler[sample_set][sample_tag].set_prefetch();
+            entry->set_prefetch();
             optgen_occup_vector[set].set_prefetch(currentVal);
             //Update cache history
-            update_cache_history(sample_set, cache_history_sampler[sample_set][sample_tag].lru);
+            sampler.update_lru(entry->lru);
 
         }   
         //Update the sample with time and PC
-        cache_history_sampler[sample_set][sample_tag].update(set_timer[set], PC);
-        cache_history_sampler[sample_set][sample_tag].lru = 0;
+        entry->update(set_timer[set], PC);
+        entry->lru = 0;
         set_timer[set] = (set_timer[set] + 1) % TIMER_SIZE;
     }
 
@@ -235,30 +261,30 @@ void CACHE::update_replacement_state (uint32_t cpu, uint32_t set, uint32_t way,
         prediction = predictor_prefetch->get_prediction(PC);
     }
     
-    sample_signature[set][way] = PC;
+    state.sample_signature[set * state.ways + way] = PC;
     //Fix RRIP counters with correct RRPVs and age accordingly
     if(!prediction){
-        rrip[set][way] = MAXRRIP;
+        rrip[way] = MAXRRIP;
     }
     else{
-        rrip[set][way] = 0;
+        rrip[way] = 0;
         if(!hit){
             //Verifying RRPV of lines has not saturated
             bool isMaxVal = false;
-            for(uint32_t i = 0; i < LLC_WAYS; i++){
-                if(rrip[set][i] == MAXRRIP-1){
+            for(uint32_t i = 0; i < state.ways; i++){
+                if(rrip[i] == MAXRRIP-1){
                     isMaxVal = true;
                 }
             }
 
             //Aging cache-friendly lines that have not saturated
-            for(uint32_t i = 0; i < LLC_WAYS; i++){
-                if(!isMaxVal && rrip[set][i] < MAXRRIP-1){
-                    rrip[set][i]++;
+            for(uint32_t i = 0; i < state.ways; i++){
+                if(!isMaxVal && rrip[i] < MAXRRIP-1){
+                    rrip[i]++;
                 }
             }
         }
-        rrip[set][way] = 0;
+        rrip[way] = 0;
     }
 
 }
@@ -268,9 +294,11 @@ void PrintStats_Heartbeat()
 {
     int hits = 0;
     int access = 0;
-    for(int i = 0; i < LLC_SETS; i++){
-        hits += optgen_occup_vector[i].get_optgen_hits();
-        access += optgen_occup_vector[i].access;
+    for(auto& state : hawkeye_states){
+        for(uint32_t i = 0; i < state->sets; i++){
+            hits += state->optgen_occup_vector[i].get_optgen_hits();
+            access += state->optgen_occup_vector[i].access;
+        }
     }
 
     cout<< "OPTGen Hits: " << hits << endl;
@@ -281,11 +309,12 @@ void PrintStats_Heartbeat()
 // Use this function to print out your own stats at the end of simulation
 void CACHE::replacement_final_stats()
 {
+    Hawkeye_State& state = hawkeye_state(this);
     int hits = 0;
     int access = 0;
-    for(int i = 0; i < LLC_SETS; i++){
-        hits += optgen_occup_vector[i].get_optgen_hits();
-        access += optgen_occup_vector[i].access;
+    for(uint32_t i = 0; i < state.sets; i++){
+        hits += state.optgen_occup_vector[i].get_optgen_hits();
+        access += state.optgen_occup_vector[i].access;
     }
 
     cout<< "Final OPTGen Hits: " << hits << endl;
@@ -0,0 +1,75 @@
+#ifndef SAMPLER_H
+#define SAMPLER_H
+
+using namespace std;
+
+#include <stdint.h>
+#include "helper_function.h"
+
+#ifndef SAMPLER_HIST
+#define SAMPLER_HIST 8
+#endif
+
+//One set of the sampler: a fixed-capacity, open-addressed table of
+//SAMPLER_HIST entries, the tag of an entry being kept in its address.
+//The lru fields of the entries always hold 0 ~ size-1, so when the set
+//is full the entry replaced is the one at SAMPLER_HIST-1.
+struct Sampler_Set{
+    HISTORY entries[SAMPLER_HIST];
+    bool valid[SAMPLER_HIST];
+    uint32_t size;
+
+    void init(){
+        size = 0;
+        for(int i = 0; i < SAMPLER_HIST; i++){
+            valid[i] = false;
+        }
+    }
+
+    //Entry of a tag, NULL if it is not sampled
+    HISTORY* find(uint64_t tag){
+        uint32_t slot = tag % SAMPLER_HIST;
+        for(int i = 0; i < SAMPLER_HIST; i++){
+            if(valid[slot] && entries[slot].address == tag){
+                return &entries[slot];
+            }
+            slot = (slot + 1) % SAMPLER_HIST;
+        }
+        return NULL;
+    }
+
+    //New entry for a tag, replacing the least recently used one if full
+    HISTORY* insert(uint64_t tag){
+        if(size == SAMPLER_HIST){
+            int victim = 0;
+            for(int i = 1; i < SAMPLER_HIST; i++){
+                if(entries[i].lru > entries[victim].lru){
+                    victim = i;
+                }
+            }
+            valid[victim] = false;
+            size--;
+        }
+
+        uint32_t slot = tag % SAMPLER_HIST;
+        while(valid[slot]){
+            slot = (slot + 1) % SAMPLER_HIST;
+        }
+        valid[slot] = true;
+        size++;
+        entries[slot].init();
+        entries[slot].address = tag;
+        return &entries[slot];
+    }
+
+    //Age the entries more recently used than currentVal
+    void update_lru(unsigned int currentVal){
+        for(int i = 0; i < SAMPLER_HIST; i++){
+            if(valid[i] && entries[i].lru < currentVal){
+                entries[i].lru++;
+            }
+        }
+    }
+};
+
+#endif
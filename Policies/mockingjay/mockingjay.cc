@@ -1,59 +1,113 @@
 #include "cache.h"
 #include "ooo_cpu.h"
+#include <memory>
 #include <unordered_map>
+#include <vector>
 #include <stdlib.h>
 #include <cmath>
 
 using namespace std;
 
 
-#define LLC_SET 1376
-#define LLC_WAY 32
 #define WRITEBACK 3
 #define PREFETCH  2
 
-constexpr int LOG2_LLC_SET = log2(LLC_SET);
-constexpr int LOG2_LLC_SIZE = LOG2_LLC_SET + log2(LLC_WAY) + LOG2_BLOCK_SIZE;
-constexpr int LOG2_SAMPLED_SETS = LOG2_LLC_SIZE - 16;
-
 constexpr int HISTORY = 8;
 constexpr int GRANULARITY = 8;
 
-constexpr int INF_RD = LLC_WAY * HISTORY - 1;
-constexpr int INF_ETR = (LLC_WAY * HISTORY / GRANULARITY) - 1;
-constexpr int MAX_RD = INF_RD - 22;
-
 constexpr int SAMPLED_CACHE_WAYS = 5;
 constexpr int LOG2_SAMPLED_CACHE_SETS = 4;
-constexpr int SAMPLED_CACHE_TAG_BITS = 31 - LOG2_LLC_SIZE;
-constexpr int PC_SIGNATURE_BITS = LOG2_LLC_SIZE - 10;
 constexpr int TIMESTAMP_BITS = 8;
 
 constexpr double TEMP_DIFFERENCE = 1.0/16.0;
 constexpr double FLEXMIN_PENALTY = 2.0 - log2(NUM_CPUS)/4.0;
 
 
-int etr[LLC_SET][LLC_WAY];
-int etr_clock[LLC_SET];
-
-unordered_map<uint32_t, int> rdp;
-
-int current_timestamp[LLC_SET];
-
 struct SampledCacheLine {
     bool valid;
     uint64_t tag;
     uint64_t signature;
     int timestamp;
 };
-unordered_map<uint32_t, SampledCacheLine* > sampled_cache;
 
+/* Mockingjay state of a cache, sized from its own sets and ways */
+struct Mockingjay_State {
+    int llc_set;
+    int llc_way;
+
+    int log2_llc_set;
+    int log2_llc_size;
+    int log2_sampled_sets;
+
+    int inf_rd;
+    int inf_etr;
+    int max_rd;
+
+    int sampled_cache_tag_bits;
+    int pc_signature_bits;
+
+    vector<int> etr;                /* llc_set x llc_way */
+    vector<int> etr_clock;
+    vector<int> current_timestamp;
+
+    unordered_map<uint32_t, int> rdp;
+    unordered_map<uint32_t, vector<SampledCacheLine>> sampled_cache;
+
+    void init(int num_set, int num_way) {
+        llc_set = num_set;
+        llc_way = num_way;
+
+        log2_llc_set = log2(llc_set);
+        log2_llc_size = log2_llc_set + log2(llc_way) + LOG2_BLOCK_SIZE;
+        log2_sampled_sets = log2_llc_size - 16;
+
+        inf_rd = llc_way * HISTORY - 1;
+        inf_etr = (llc_way * HISTORY / GRANULARITY) - 1;
+        max_rd = inf_rd - 22;
+
+        sampled_cache_tag_bits = 31 - log2_llc_size;
+        pc_signature_bits = log2_llc_size - 10;
+
+        etr.assign(llc_set * llc_way, 0);
+        etr_clock.assign(llc_set, GRANULARITY);
+        current_timestamp.assign(llc_set, 0);
+    }
+
+    int& etr_of(uint32_t set, int way) {
+        return etr[set * llc_way + way];
+    }
+
+    bool is_sampled_set(int set);
+    uint64_t get_pc_signature(uint64_t pc, bool hit, bool prefetch, uint32_t core);
+    uint32_t get_sampled_cache_index(uint64_t full_addr);
+    uint64_t get_sampled_cache_tag(uint64_t x);
+    int search_sampled_cache(uint64_t blockAddress, uint32_t set);
+    void detrain(uint32_t set, int way);
+    int temporal_difference(int init, int sample);
+};
+
+// States of the caches using Mockingjay, in the order they were initialized.
+// There are only a few caches, so scanning their contiguous keys on every
+// access is cheaper than a map lookup
+vector<CACHE*> mockingjay_caches;
+vector<unique_ptr<Mockingjay_State>> mockingjay_states;
+
+Mockingjay_State& mockingjay_state(const CACHE* cache) {
+    for (size_t i = 0; i < mockingjay_caches.size(); i++) {
+        if (mockingjay_caches[i] == cache) {
+            return *mockingjay_states[i];
+        }
+    }
+    cerr << "Mockingjay state of " << cache->NAME << " used before initialize_replacement" << endl;
+    abort();
+}
 
 
-bool is_sampled_set(int set) {
-    int mask_length = LOG2_LLC_SET-LOG2_SAMPLED_SETS;
+
+bool Mockingjay_State::is_sampled_set(int set) {
+    int mask_length = log2_llc_set-log2_sampled_sets;
     int mask = (1 << mask_length) - 1;
-    return (set & mask) == ((set >> (LOG2_LLC_SET - mask_length)) & mask);
+    return (set & mask) == ((set >> (log2_llc_set - mask_length)) & mask);
 }
 
 uint64_t CRC_HASH( uint64_t _blockAddress )
@@ -65,7 +119,7 @@ uint64_t CRC_HASH( uint64_t _blockAddress )
     return _returnVal;
 }
 
-uint64_t get_pc_signature(uint64_t pc, bool hit, bool prefetch, uint32_t core) {
+uint64_t Mockingjay_State::get_pc_signature(uint64_t pc, bool hit, bool prefetch, uint32_t core) {
     if (NUM_CPUS == 1) {
         pc = pc << 1;
         if(hit) {
@@ -76,7 +130,7 @@ uint64_t get_pc_signature(uint64_t pc, bool hit, bool prefetch, uint32_t core) {
             pc = pc | 1;                            
         }
         pc = CRC_HASH(pc);
-        pc = (pc << (64 - PC_SIGNATURE_BITS)) >> (64 - PC_SIGNATURE_BITS);
+        pc = (pc << (64 - pc_signature_bits)) >> (64 - pc_signature_bits);
     } else {
         pc = pc << 1;
         if(prefetch) {
@@ -85,25 +139,25 @@ uint64_t get_pc_signature(uint64_t pc, bool hit, bool prefetch, uint32_t core) {
         pc = pc << 2;
         pc = pc | core;
         pc = CRC_HASH(pc);
-        pc = (pc << (64 - PC_SIGNATURE_BITS)) >> (64 - PC_SIGNATURE_BITS);
+        pc = (pc << (64 - pc_signature_bits)) >> (64 - pc_signature_bits);
     }
     return pc;
 }
 
-uint32_t get_sampled_cache_index(uint64_t full_addr) {
+uint32_t Mockingjay_State::get_sampled_cache_index(uint64_t full_addr) {
     full_addr = full_addr >> LOG2_BLOCK_SIZE;
-    full_addr = (full_addr << (64 - (LOG2_SAMPLED_CACHE_SETS + LOG2_LLC_SET))) >> (64 - (LOG2_SAMPLED_CACHE_SETS + LOG2_LLC_SET));
+    full_addr = (full_addr << (64 - (LOG2_SAMPLED_CACHE_SETS + log2_llc_set))) >> (64 - (LOG2_SAMPLED_CACHE_SETS + log2_llc_set));
     return full_addr;
 }
 
-uint64_t get_sampled_cache_tag(uint64_t x) {
-    x >>= LOG2_LLC_SET + LOG2_BLOCK_SIZE + LOG2_SAMPLED_CACHE_SETS;
-    x = (x << (64 - SAMPLED_CACHE_TAG_BITS)) >> (64 - SAMPLED_CACHE_TAG_BITS);
+uint64_t Mockingjay_State::get_sampled_cache_tag(uint64_t x) {
+    x >>= log2_llc_set + LOG2_BLOCK_SIZE + LOG2_SAMPLED_CACHE_SETS;
+    x = (x << (64 - sampled_cache_tag_bits)) >> (64 - sampled_cache_tag_bits);
     return x;
 }
 
-int search_sampled_cache(uint64_t blockAddress, uint32_t set) {
-    SampledCacheLine* sampled_set = sampled_cache[set];
+int Mockingjay_State::search_sampled_cache(uint64_t blockAddress, uint32_t set) {
+    vector<SampledCacheLine>& sampled_set = sampled_cache[set];
     for (int way = 0; way < SAMPLED_CACHE_WAYS; way++) {
         if (sampled_set[way].valid && (sampled_set[way].tag == blockAddress)) {
             return way;
@@ -112,16 +166,16 @@ int search_sampled_cache(uint64_t blockAddress, uint32_t set) {
     return -1;
 }
 
-void detrain(uint32_t set, int way) {
+void Mockingjay_State::detrain(uint32_t set, int way) {
     SampledCacheLine temp = sampled_cache[set][way];
     if (!temp.valid) {
         return;
     }
 
     if (rdp.count(temp.signature)) {
-        rdp[temp.signature] = min(rdp[temp.signature] + 1, INF_RD);
+        rdp[temp.signature] = min(rdp[temp.signature] + 1, inf_rd);
     } else {
-        rdp[temp.signature] = INF_RD;
+        rdp[temp.signature] = inf_rd;
     }
     sampled_cache[set][way].valid = false;
 }
@@ -131,16 +185,16 @@ void detrain(uint32_t set, int way) {
 void CACHE::initialize_replacement()
 {
     // put your own initialization code here
-    for(int i = 0; i < LLC_SET; i++) {
-        etr_clock[i] = GRANULARITY;
-        current_timestamp[i] = 0;
-    }
-    for(uint32_t set = 0; set < LLC_SET; set++) {
-        if (is_sampled_set(set)) {
-            int modifier = 1 << LOG2_LLC_SET;
+    mockingjay_caches.push_back(this);
+    mockingjay_states.push_back(make_unique<Mockingjay_State>());
+    Mockingjay_State& state = *mockingjay_states.back();
+    state.init(NUM_SET, NUM_WAY);
+    for(uint32_t set = 0; set < (uint32_t) state.llc_set; set++) {
+        if (state.is_sampled_set(set)) {
+            int modifier = 1 << state.log2_llc_set;
             int limit = 1 << LOG2_SAMPLED_CACHE_SETS;
             for (int i = 0; i < limit; i++) {
-                sampled_cache[set + modifier*i] = new SampledCacheLine[SAMPLED_CACHE_WAYS]();
+                state.sampled_cache[set + modifier*i] = vector<SampledCacheLine>(SAMPLED_CACHE_WAYS, SampledCacheLine());
             }
         }
     }
@@ -154,7 +208,8 @@ uint32_t CACHE::find_victim(uint32_t cpu, uint64_t instr_id, uint32_t set, const
 {
     /* don't modify this code or put anything above it;
      * if there's an invalid block, we don't need to evict any valid ones */
-    for (int way = 0; way < LLC_WAY; way++) {
+    Mockingjay_State& state = mockingjay_state(this);
+    for (int way = 0; way < state.llc_way; way++) {
         if (current_set[way].valid == false) {
             return way;
         }
@@ -164,31 +219,31 @@ uint32_t CACHE::find_victim(uint32_t cpu, uint64_t instr_id, uint32_t set, const
     // your eviction policy goes here
     int max_etr = 0;
     int victim_way = 0;
-    for (int way = 0; way < LLC_WAY; way++) {
-        if (abs(etr[set][way]) > max_etr ||
-                (abs(etr[set][way]) == max_etr &&
-                        etr[set][way] < 0)) {
-            max_etr = abs(etr[set][way]);
+    for (int way = 0; way < state.llc_way; way++) {
+        if (abs(state.etr_of(set, way)) > max_etr ||
+                (abs(state.etr_of(set, way)) == max_etr &&
+                        state.etr_of(set, way) < 0)) {
+            max_etr = abs(state.etr_of(set, way));
             victim_way = way;
         }
     }
     
-    uint64_t pc_signature = get_pc_signature(pc, false, type == PREFETCH, cpu);
-    if (type != WRITEBACK && rdp.count(pc_signature) &&
-            (rdp[pc_signature] > MAX_RD || rdp[pc_signature] / GRANULARITY > max_etr)) {
-        return LLC_WAY;
+    uint64_t pc_signature = state.get_pc_signature(pc, false, type == PREFETCH, cpu);
+    if (type != WRITEBACK && state.rdp.count(pc_signature) &&
+            (state.rdp[pc_signature] > state.max_rd || state.rdp[pc_signature] / GRANULARITY > max_etr)) {
+        return state.llc_way;
     }
     
     return victim_way;
 }
 
 
-int temporal_difference(int init, int sample) {
+int Mockingjay_State::temporal_difference(int init, int sample) {
     if (sample > init) {
         int diff = sample - init;
         diff = diff * TEMP_DIFFERENCE;
         diff = min(1, diff);
-        return min(init + diff, INF_RD);
+        return min(init + diff, inf_rd);
     } else if (sample < init) {
         int diff = init - sample;
         diff = diff * TEMP_DIFFERENCE;
@@ -217,34 +272,40 @@ int time_elapsed(int global, int local) {
 /* called on every cache hit and cache fill */
 void CACHE::update_replacement_state(uint32_t cpu, uint32_t set, uint32_t way, uint64_t full_addr, uint64_t pc, uint64_t victim_addr, uint32_t type, uint8_t hit)
 {
+    Mockingjay_State& state = mockingjay_state(this);
+    unordered_map<uint32_t, vector<SampledCacheLine>>& sampled_cache = state.sampled_cache;
+    unordered_map<uint32_t, int>& rdp = state.rdp;
+    vector<int>& current_timestamp = state.current_timestamp;
+    vector<int>& etr_clock = state.etr_clock;
+
     if (type == WRITEBACK) {
         if(!hit) {
-            etr[set][way] = -INF_ETR;
+            state.etr_of(set, way) = -state.inf_etr;
         }
         return;
     }
         
 
-    pc = get_pc_signature(pc, hit, type == PREFETCH, cpu);
+    pc = state.get_pc_signature(pc, hit, type == PREFETCH, cpu);
 
 
-    if (is_sampled_set(set)) {
-        uint32_t sampled_cache_index = get_sampled_cache_index(full_addr);
-        uint64_t sampled_cache_tag = get_sampled_cache_tag(full_addr);
-        int sampled_cache_way = search_sampled_cache(sampled_cache_tag, sampled_cache_index);
+    if (state.is_sampled_set(set)) {
+        uint32_t sampled_cache_index = state.get_sampled_cache_index(full_addr);
+        uint64_t sampled_cache_tag = state.get_sampled_cache_tag(full_addr);
+        int sampled_cache_way = state.search_sampled_cache(sampled_cache_tag, sampled_cache_index);
 
         if (sampled_cache_way > -1) {
             uint64_t last_signature = sampled_cache[sampled_cache_index][sampled_cache_way].signature;
             uint64_t last_timestamp = sampled_cache[sampled_cache_index][sampled_cache_way].timestamp;
             int sample = time_elapsed(current_timestamp[set], last_timestamp);
 
-            if (sample <= INF_RD) {
+            if (sample <= state.inf_rd) {
                 if (type == PREFETCH) {
                     sample = sample * FLEXMIN_PENALTY;
                 }
                 if (rdp.count(last_signature)) {
                     int init = rdp[last_signature];
-                    rdp[last_signature] = temporal_difference(init, sample);
+                    rdp[last_signature] = state.temporal_difference(init, sample);
                 } else {
                     rdp[last_signature] = sample;
                 }
@@ -259,22 +320,22 @@ void CACHE::update_replacement_state(uint32_t cpu, uint32_t set, uint32_t way, u
         for (int w = 0; w < SAMPLED_CACHE_WAYS; w++) {
             if (sampled_cache[sampled_cache_index][w].valid == false) {
                 lru_way = w;
-                lru_rd = INF_RD + 1;
+                lru_rd = state.inf_rd + 1;
                 continue;
             }
 
             uint64_t last_timestamp = sampled_cache[sampled_cache_index][w].timestamp;
             int sample = time_elapsed(current_timestamp[set], last_timestamp);
-            if (sample > INF_RD) {
+            if (sample > state.inf_rd) {
                 lru_way = w;
-                lru_rd = INF_RD + 1;
-                detrain(sampled_cache_index, w);
+                lru_rd = state.inf_rd + 1;
+                state.detrain(sampled_cache_index, w);
             } else if (sample > lru_rd) {
                 lru_way = w;
                 lru_rd = sample;
             }
         }
-        detrain(sampled_cache_index, lru_way);
+        state.detrain(sampled_cache_index, lru_way);
 
         for (int w = 0; w < SAMPLED_CACHE_WAYS; w++) {
             if (sampled_cache[sampled_cache_index][w].valid == false) {
@@ -290,9 +351,9 @@ void CACHE::update_replacement_state(uint32_t cpu, uint32_t set, uint32_t way, u
     }
 
     if(etr_clock[set] == GRANULARITY) {
-        for (int w = 0; w < LLC_WAY; w++) {
-            if ((uint32_t) w != way && abs(etr[set][w]) < INF_ETR) {
-                etr[set][w]--;
+        for (int w = 0; w < state.llc_way; w++) {
+            if ((uint32_t) w != way && abs(state.etr_of(set, w)) < state.inf_etr) {
+                state.etr_of(set, w)--;
             }
         }
         etr_clock[set] = 0;
@@ -300,18 +361,18 @@ void CACHE::update_replacement_state(uint32_t cpu, uint32_t set, uint32_t way, u
     etr_clock[set]++;
     
     
-    if (way < LLC_WAY) {
+    if (way < state.llc_way) {
         if(!rdp.count(pc)) {
             if (NUM_CPUS == 1) {
-                etr[set][way] = 0;
+                state.etr_of(set, way) = 0;
             } else {
-                etr[set][way] = INF_ETR;
+                state.etr_of(set, way) = state.inf_etr;
             }
         } else {
-            if(rdp[pc] > MAX_RD) {
-                etr[set][way] = INF_ETR;
+            if(rdp[pc] > state.max_rd) {
+                state.etr_of(set, way) = state.inf_etr;
             } else {
-                etr[set][way] = rdp[pc] / GRANULARITY;
+                state.etr_of(set, way) = rdp[pc] / GRANULARITY;
             }
         }
     }
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the ChampSim, gem5 and Scarab executables, used to measure
+the orchestration of the runners without simulating anything.
+
+The simulator it plays is taken from the name it is called by: champsim*
+(the executables built by ChampSimRunner), gem5* (gem5.opt) or scarab.
+It sleeps FAKE_SIM_SECONDS in FAKE_SIM_STEPS steps, printing the progress
+lines of the simulator after each step, and ends with the statistics the
+runners parse.
+"""
+import os
+import re
+import sys
+import time
+
+
+def option(args, name, default=None):
+    """Value of --name value or --name=value."""
+    for index, arg in enumerate(args):
+        if arg == name and index + 1 < len(args):
+            return args[index + 1]
+        if arg.startswith(name + '='):
+            return arg[len(name) + 1:]
+    return default
+
+
+def steps():
+    seconds = float(os.environ.get('FAKE_SIM_SECONDS', '0.1'))
+    count = max(1, int(os.environ.get('FAKE_SIM_STEPS', '5')))
+    for step in range(1, count + 1):
+        time.sleep(seconds / count)
+        yield step, count
+
+
+def champsim(args):
+    warmup = int(option(args, '--warmup-instructions', 0))
+    instructions = int(option(args, '--simulation-instructions', 1_000_000))
+    ipc = 0.5
+
+    print("*** ChampSim Multicore Out-of-Order Simulator ***")
+    print(f"CPU 0 runs {args[-1]}", flush=True)
+    if warmup:
+        print(f"Warmup finished CPU 0 instructions: {warmup} cycles: {warmup * 2} "
+              f"cumulative IPC: 0.5 (Simulation time: 00 hr 00 min 00 sec)", flush=True)
+    for step, count in steps():
+        done = instructions * step // count
+        print(f"Heartbeat CPU 0 instructions: {warmup + done} "
+              f"cycles: {warmup * 2 + int(done / ipc)} heartbeat IPC: {ipc} "
+              f"cumulative IPC: {ipc} (Simulation time: 00 hr 00 min 00 sec)",
+              flush=True)
+
+    print("Region of Interest Statistics")
+    print(f"CPU 0 cumulative IPC: {ipc} instructions: {instructions} "
+          f"cycles: {int(instructions / ipc)}")
+    print("CPU 0 Branch Prediction Accuracy: 95.1% MPKI: 3.2 "
+          "Average ROB Occupancy at Mispredict: 100.2")
+    for level in ('L1D', 'L2C', 'LLC'):
+        print(f"{level} TOTAL        ACCESS:      1000  HIT:        900  "
+              f"MISS:        100  MSHR_MERGE:          0")
+        print(f"{level} PREFETCH REQUESTED:          10  ISSUED:          8  "
+              f"USEFUL:          5  USELESS:          3")
+    return 0
+
+
+def gem5(args):
+    output_dir = option(args, '-d', 'm5out')
+    os.makedirs(output_dir, exist_ok=True)
+
+    # The instruction limit is set in the configuration script
+    instructions = 1_000_000
+    with open(args[-1]) as file:
+        match = re.search(r"max_insts_any_thread\s*=\s*(\d+)", file.read())
+    if match:
+        instructions = int(match.group(1))
+
+    print("gem5 Simulator System.  https://www.gem5.org", flush=True)
+    with open(os.path.join(output_dir, 'stats.txt'), 'w') as stats:
+        for step, count in steps():
+            done = instructions * step // count
+            stats.write(
+                "\n---------- Begin Simulation Statistics ----------\n"
+                f"simSeconds                                   {done / 2e9:.6f}"
+                "                       # Number of seconds simulated (Second)\n"
+                f"simTicks                                     {done * 500}"
+                "                       # Number of ticks simulated (Tick)\n"
+                f"simInsts                                     {done}"
+                "                       # Number of instructions simulated (Count)\n"
+                f"system.cpu.ipc                               0.500000"
+                "                       # IPC: instructions per cycle ((Count/Cycle))\n"
+                "---------- End Simulation Statistics   ----------\n"
+            )
+            stats.flush()
+    print(f"Exiting @ tick {instructions * 500} because a thread reached the "
+          f"max instruction count")
+    return 0
+
+
+def scarab(args):
+    output_dir = option(args, '--output_dir', '.')
+    instructions = int(option(args, '--inst_limit', 1_000_000))
+
+    for step, count in steps():
+        print(f"** Heartbeat: {{ {instructions * step // count} / {instructions} }}",
+              flush=True)
+
+    cycles = instructions * 2
+    with open(os.path.join(output_dir, 'core.stat.0.out'), 'w') as stats:
+        stats.write(f"Cumulative:        Cycles: {cycles}        "
+                    f"Instructions: {instructions}        IPC: 0.500000\n"
+                    f"NODE_CYCLE                     {cycles}\n"
+                    f"NODE_INST_COUNT                {instructions}\n")
+    return 0
+
+
+def main():
+    simulator = os.path.basename(sys.argv[0])
+    for prefix, run in (('champsim', champsim), ('gem5', gem5), ('scarab', scarab)):
+        if simulator.startswith(prefix):
+            sys.exit(run(sys.argv[1:]))
+    sys.exit(f"Unknown simulator: {simulator}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+"""
+Orchestration overhead of ChampSimRunner, GEM5Runner and ScarabExecutor.
+
+Each runner drives a sweep of N jobs in a scratch workspace, where the
+simulators are replaced by fake_simulator.py: every job takes the same
+known time, so whatever the sweep takes on top of it is spent by the
+runner itself (sleeps, semaphores, file copies, directory scans, builds).
+
+For every runner and number of jobs, it reports:
+    - wall: duration of the sweep;
+    - busy: time the simulators ran, summed over the jobs (read from
+      run_records.jsonl);
+    - overhead/job: wall time beyond the ideal makespan, busy spread over
+      the threads, per job;
+    - idle: share of the threads x wall core time no simulator ran;
+    - files: files the sweep created or modified.
+
+Usage:
+    python3 benchmarks/orchestration.py [--runners champsim gem5 scarab]
+        [--jobs 10 1000 100000] [--sim-seconds 0.05] [--threads N]
+        [--timeout 1800] [--output results.json]
+"""
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FAKE_SIMULATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'fake_simulator.py')
+
+RUNNERS = ('champsim', 'gem5', 'scarab')
+SCALES = (10, 1_000, 100_000)
+
+# Instructions of every fake simulation, only shown in the progress lines
+INSTRUCTIONS = 1_000_000
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Orchestration cost of one sweep.
+
+    Attributes:
+        runner (str): champsim, gem5 or scarab.
+        jobs (int): Simulations of the sweep.
+        configs (int): (policy, prefetcher, branch) combinations.
+        workloads (int): Traces (workload binaries for gem5) per combination.
+        threads (int): Simulations the runner runs at the same time.
+        sim_seconds (float): Duration of every fake simulation.
+        finished (int): Simulations that ran before the end or the timeout.
+        wall_seconds (float): Duration of the sweep.
+        busy_seconds (float): Run time of the simulations, summed.
+        overhead_seconds (float): wall_seconds beyond busy_seconds spread
+            over the threads.
+        overhead_per_job (Optional[float]): overhead_seconds per finished
+            simulation.
+        idle_fraction (float): Share of the core time no simulator ran.
+        files_touched (int): Files created or modified by the sweep.
+        timed_out (bool): True if the sweep was stopped after the timeout.
+    """
+    runner: str
+    jobs: int
+    configs: int
+    workloads: int
+    threads: int
+    sim_seconds: float
+    finished: int = 0
+    wall_seconds: float = 0.0
+    busy_seconds: float = 0.0
+    overhead_seconds: float = 0.0
+    overhead_per_job: Optional[float] = None
+    idle_fraction: float = 0.0
+    files_touched: int = 0
+    timed_out: bool = False
+
+
+def shape(jobs: int) -> Tuple[int, int]:
+    """(configs, workloads) of a sweep of about jobs simulations."""
+    configs = max(1, round(math.sqrt(jobs / 10)))
+    return configs, math.ceil(jobs / configs)
+
+
+def install_simulator(path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    shutil.copy2(FAKE_SIMULATOR, path)
+
+
+def champsim_workspace(root: str, workloads: int) -> None:
+    """ChampSim tree whose config.sh and make install the fake simulator."""
+    champsim = os.path.join(root, 'ChampSim')
+    os.makedirs(champsim)
+    with open(os.path.join(champsim, 'config.sh'), 'w') as file:
+        file.write("#!/usr/bin/env python3\n"
+                   "import sys, json\n"
+                   "names = [json.load(open(path))['executable_name']"
+                   " for path in sys.argv[1:]]\n"
+                   "open('_configuration.mk', 'w').write(' '.join(names))\n")
+    os.chmod(os.path.join(champsim, 'config.sh'), 0o755)
+    with open(os.path.join(champsim, 'Makefile'), 'w') as file:
+        file.write("all:\n"
+                   "\tmkdir -p bin; for name in $$(cat _configuration.mk); do "
+                   f"cp {FAKE_SIMULATOR} bin/$$name; done\n")
+
+    traces = os.path.join(root, 'traces')
+    os.makedirs(traces)
+    for index in range(workloads):
+        with open(os.path.join(traces, f"trace{index}.champsimtrace.xz"), 'wb') as file:
+            file.write(bytes(64))
+
+
+def gem5_workspace(root: str, workloads: int) -> None:
+    install_simulator(os.path.join(root, 'gem5', 'build', 'X86', 'gem5.opt'))
+    binaries = os.path.join(root, 'bin')
+    os.makedirs(binaries)
+    for index in range(workloads):
+        with open(os.path.join(binaries, f"workload{index}"), 'wb') as file:
+            file.write(bytes(64))
+
+
+def scarab_workspace(root: str, workloads: int) -> None:
+    install_simulator(os.path.join(root, 'scarab', 'src', 'scarab'))
+    shutil.copy2(os.path.join(REPO, 'testsScarab', 'param', 'PARAMS.in'),
+                 os.path.join(root, 'PARAMS.in'))
+    traces = os.path.join(root, 'traces', 'workload', 'trace')
+    os.makedirs(traces)
+    os.makedirs(os.path.join(root, 'traces', 'workload', 'bin'))
+    for index in range(workloads):
+        with open(os.path.join(traces, f"trace{index}.trace.gz"), 'wb') as file:
+            file.write(bytes(64))
+
+
+WORKSPACES = {
+    'champsim': champsim_workspace,
+    'gem5': gem5_workspace,
+    'scarab': scarab_workspace,
+}
+
+
+def run_sweep(runner: str, root: str, configs: int, threads: int) -> None:
+    """Run the sweep of a workspace with the runner, in this process."""
+    output_dir = os.path.join(root, 'output')
+
+    if runner == 'champsim':
+        sys.path.insert(0, os.path.join(REPO, 'testsOldChampSim'))
+        from champsim import CacheConfig, ChampSimRunner
+        caches = [[CacheConfig(64, 8, 4)], [CacheConfig(64, 8, 4)],
+                  [CacheConfig(512, 8, 8)], [CacheConfig(2048, 16, 20)]]
+        ChampSimRunner(
+            os.path.join(root, 'ChampSim'), os.path.join(root, 'traces'),
+            os.path.join(REPO, 'testsOldChampSim', 'param', 'champsim_config.json'),
+            output_dir, [f"policy{index}" for index in range(configs)],
+            ['no'], ['bimodal'], threads, None, INSTRUCTIONS, *caches
+        ).execute_all_policies([])
+
+    elif runner == 'gem5':
+        sys.path.insert(0, os.path.join(REPO, 'testsGem5'))
+        from gem5 import CacheConfig, GEM5Runner
+        caches = [[CacheConfig(64, 8, 4)], [CacheConfig(64, 8, 4)],
+                  [CacheConfig(512, 8, 8)], [CacheConfig(2048, 16, 20)]]
+        GEM5Runner(
+            os.path.join(root, 'gem5'), os.path.join(root, 'bin'),
+            os.path.join(REPO, 'testsGem5', 'scripts'), output_dir,
+            [f"Policy{index}RP" for index in range(configs)],
+            ['StridePrefetcher'], ['TAGE'], threads, None, INSTRUCTIONS, *caches
+        ).execute_all_policies()
+
+    elif runner == 'scarab':
+        sys.path.insert(0, os.path.join(REPO, 'testsScarab'))
+        from scarab import CacheConfig, ScarabExecutor
+        caches = [[CacheConfig(64, 8, 4)], [CacheConfig(64, 8, 4)],
+                  [CacheConfig(512, 8, 8)], [CacheConfig(2048, 16, 20)]]
+        ScarabExecutor(
+            os.path.join(root, 'scarab'), ['FCFS'],
+            [str(index) for index in range(configs)], ['gshare'], ['0'],
+            {'0': 'stride'}, {}, threads, os.path.join(root, 'traces'),
+            output_dir, INSTRUCTIONS, 0, os.path.join(root, 'PARAMS.in'), *caches
+        ).execute_all_traces()
+
+
+def snapshot(root: str) -> Dict[str, int]:
+    """Modification time of every file below root."""
+    files = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(folder, name)
+            try:
+                files[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                pass
+    return files
+
+
+def busy_time(records_path: str) -> Tuple[int, float]:
+    """(simulations, run time summed) of a run record journal."""
+    count, seconds = 0, 0.0
+    if os.path.exists(records_path):
+        with open(records_path) as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                count += 1
+                seconds += record.get('wall_seconds', 0.0)
+    return count, seconds
+
+
+def benchmark(
+    runner: str,
+    jobs: int,
+    work_dir: str,
+    threads: int,
+    sim_seconds: float,
+    timeout: Optional[float],
+) -> BenchmarkResult:
+    """Run one sweep in a child process and measure it."""
+    configs, workloads = shape(jobs)
+    result = BenchmarkResult(runner=runner, jobs=configs * workloads,
+                             configs=configs, workloads=workloads,
+                             threads=threads, sim_seconds=sim_seconds)
+
+    root = os.path.join(work_dir, f"{runner}_{result.jobs}")
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(root)
+    WORKSPACES[runner](root, workloads)
+    before = snapshot(root)
+
+    env = dict(os.environ, FAKE_SIM_SECONDS=str(sim_seconds))
+    started_path = os.path.join(root, 'started')
+    print(f"[BENCH] {runner}: {result.jobs} jobs "
+          f"({configs} configurations x {workloads} workloads)")
+    launched = time.time()
+    with open(os.path.join(root, 'sweep.log'), 'w') as log:
+        # The sweep runs in the workspace: Scarab writes PARAMS.in there
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--sweep', runner, root,
+             str(configs), str(threads)],
+            cwd=root, env=env, stdout=log, stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+            returncode = 0
+            result.timed_out = True
+    ended = time.time()
+
+    if returncode != 0:
+        raise RuntimeError(f"The {runner} sweep failed, see {root}/sweep.log")
+
+    # The interpreter start and the imports are not part of the sweep
+    started = launched
+    if os.path.exists(started_path):
+        with open(started_path) as file:
+            started = float(file.read())
+
+    after = snapshot(root)
+    result.files_touched = sum(1 for path, mtime in after.items()
+                               if path != started_path and before.get(path) != mtime)
+
+    result.finished, result.busy_seconds = busy_time(
+        os.path.join(root, 'output', 'run_records.jsonl'))
+    result.wall_seconds = ended - started
+    result.overhead_seconds = max(0.0, result.wall_seconds -
+                                  result.busy_seconds / threads)
+    if result.finished:
+        result.overhead_per_job = result.overhead_seconds / result.finished
+    result.idle_fraction = max(0.0, 1 - result.busy_seconds /
+                               (threads * result.wall_seconds))
+    return result
+
+
+def render(results: List[BenchmarkResult]) -> str:
+    lines = [f"{'runner':<9} {'jobs':>7} {'done':>7} {'wall':>9} {'busy':>9} "
+             f"{'overhead/job':>13} {'idle':>6} {'files':>8}"]
+    for result in results:
+        per_job = (f"{result.overhead_per_job * 1000:.1f}ms"
+                   if result.overhead_per_job is not None else '?')
+        flag = ' TIMEOUT' if result.timed_out else ''
+        lines.append(
+            f"{result.runner:<9} {result.jobs:>7} {result.finished:>7} "
+            f"{result.wall_seconds:>8.1f}s {result.busy_seconds:>8.1f}s "
+            f"{per_job:>13} {result.idle_fraction:>6.1%} "
+            f"{result.files_touched:>8}{flag}"
+        )
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == '--sweep':
+        runner, root, configs, threads = sys.argv[2:6]
+        with open(os.path.join(root, 'started'), 'w') as file:
+            file.write(str(time.time()))
+        run_sweep(runner, root, int(configs), int(threads))
+        return
+
+    parser = argparse.ArgumentParser(description="Measure the orchestration "
+                                     "overhead of the simulation runners.")
+    parser.add_argument('--runners', nargs='+', choices=RUNNERS, default=list(RUNNERS))
+    parser.add_argument('--jobs', nargs='+', type=int, default=list(SCALES),
+                        help="Simulations of each sweep")
+    parser.add_argument('--sim-seconds', type=float, default=0.05,
+                        help="Duration of every fake simulation")
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1,
+                        help="Simulations run at the same time")
+    parser.add_argument('--timeout', type=float, default=1800.0,
+                        help="Seconds after which a sweep is stopped and "
+                             "measured as far as it went (0 for none)")
+    parser.add_argument('--work-dir', default=None,
+                        help="Directory of the workspaces, kept after the run "
+                             "(by default a temporary one, removed)")
+    parser.add_argument('--output', default=None,
+                        help="JSON file receiving the results")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='orchestration_')
+    results = []
+    try:
+        for runner in args.runners:
+            for jobs in args.jobs:
+                result = benchmark(runner, jobs, work_dir, args.threads,
+                                   args.sim_seconds, args.timeout or None)
+                results.append(result)
+                print(render([result]).splitlines()[1])
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(render(results))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump([asdict(result) for result in results], file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
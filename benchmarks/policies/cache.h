@@ -0,0 +1,55 @@
+/*  Minimal CACHE of ChampSim for the replacement policy harness
+
+    Only what the policies of Policies/ use: the geometry of the cache, its
+    cycle counter, the blocks of a set and the four replacement functions,
+    which harness.cc calls directly.  */
+
+#ifndef CACHE_H
+#define CACHE_H
+
+#include <cstdint>
+#include <iostream>
+#include <string>
+#include <vector>
+
+constexpr unsigned NUM_CPUS = 1;
+constexpr unsigned LOG2_BLOCK_SIZE = 6;
+constexpr unsigned BLOCK_SIZE = 1 << LOG2_BLOCK_SIZE;
+
+enum class access_type : unsigned {
+    LOAD = 0,
+    RFO,
+    PREFETCH,
+    WRITE,
+    TRANSLATION,
+    NUM_TYPES,
+};
+
+class CACHE {
+  public:
+    struct BLOCK {
+        bool valid = false;
+        bool prefetch = false;
+        bool dirty = false;
+        uint64_t address = 0;
+        uint64_t v_address = 0;
+        uint64_t ip = 0;
+        uint32_t cpu = 0;
+        uint64_t instr_id = 0;
+    };
+
+    const std::string NAME;
+    const uint32_t NUM_SET;
+    const uint32_t NUM_WAY;
+    uint64_t current_cycle = 0;
+
+    CACHE(std::string name, uint32_t num_set, uint32_t num_way) : NAME(name), NUM_SET(num_set), NUM_WAY(num_way) {}
+
+    void initialize_replacement();
+    uint32_t find_victim(uint32_t triggering_cpu, uint64_t instr_id, uint32_t set, const BLOCK* current_set, uint64_t ip, uint64_t full_addr, uint32_t type);
+    void update_replacement_state(uint32_t triggering_cpu, uint32_t set, uint32_t way, uint64_t full_addr, uint64_t ip, uint64_t victim_addr, uint32_t type,
+                                  uint8_t hit);
+    void replacement_final_stats();
+};
+
+#endif
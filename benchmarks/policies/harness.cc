@@ -0,0 +1,281 @@
+/*  Replacement policy harness
+
+    Replays a stream of LLC accesses on one policy of Policies/, built
+    against the CACHE of cache.h, calling initialize_replacement,
+    find_victim and update_replacement_state directly, and prints one line:
+
+        RESULT {"accesses": ..., "hits": ..., "ns_per_access": ..., ...}
+
+    The stream is either synthetic (loop, random, scan or mixed, over a
+    footprint relative to the capacity of the cache) or the LLC accesses of
+    a ChampSim trace, the misses and writebacks of a private L1I, L1D and
+    L2 (LRU) it runs through. replacement.py builds one harness per policy.
+
+    harness <sets> <ways> <loop|random|scan|mixed|trace.champsimtrace.xz> [accesses]  */
+
+#include <malloc.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include <chrono>
+#include <iostream>
+#include <new>
+#include <random>
+#include <string>
+#include <vector>
+
+#include "cache.h"
+
+/* Heap bytes in use, to measure the state a policy allocates */
+static size_t live_bytes = 0;
+
+void* operator new(size_t size)
+{
+    void* p = malloc(size ? size : 1);
+    if (p == NULL)
+        throw std::bad_alloc();
+    live_bytes += malloc_usable_size(p);
+    return p;
+}
+
+void* operator new[](size_t size) { return operator new(size); }
+
+void operator delete(void* p) noexcept
+{
+    if (p != NULL)
+        live_bytes -= malloc_usable_size(p);
+    free(p);
+}
+
+void operator delete[](void* p) noexcept { operator delete(p); }
+void operator delete(void* p, size_t) noexcept { operator delete(p); }
+void operator delete[](void* p, size_t) noexcept { operator delete(p); }
+
+struct Access {
+    uint64_t address;
+    uint64_t ip;
+    uint32_t type;
+};
+
+/* Synthetic streams, over lines of a footprint relative to the capacity */
+std::vector<Access> synthetic_stream(const std::string& kind, uint64_t lines, size_t count)
+{
+    std::mt19937_64 rng(1);
+    std::vector<Access> stream(count);
+    for (size_t i = 0; i < count; i++) {
+        uint64_t r = rng();
+        uint64_t line = 0;
+        uint64_t ip = 0x400000 + (r % 16) * 4;
+        uint32_t type = (uint32_t)access_type::LOAD;
+
+        if (kind == "loop") {
+            // Cyclic over 1.5x the capacity: LRU never hits
+            line = i % (lines + lines / 2);
+        } else if (kind == "random") {
+            // Uniform over 4x the capacity
+            line = r % (4 * lines);
+        } else if (kind == "scan") {
+            // Half the capacity reused, a quarter of the accesses streaming through
+            if ((r >> 32) % 4 == 0) {
+                line = 4 * lines + i;
+                ip = 0x401000;
+            } else {
+                line = (r >> 8) % (lines / 2);
+            }
+        } else {
+            // Every PC with its own footprint, loops, prefetches and writebacks
+            ip = 0x400000 + (r % 64) * 4;
+            line = (r >> 8) % (lines * (1 + (ip % 3)));
+            if ((r >> 40) % 4 == 0)
+                line = (i / 7) % (lines / 8);
+            if ((r >> 50) % 10 == 0)
+                type = (uint32_t)access_type::PREFETCH;
+            else if ((r >> 50) % 10 == 1)
+                type = (uint32_t)access_type::WRITE;
+        }
+        stream[i].address = line << LOG2_BLOCK_SIZE;
+        stream[i].ip = ip;
+        stream[i].type = type;
+    }
+    return stream;
+}
+
+/* Private LRU cache the trace runs through before the LLC */
+struct Lru_Cache {
+    uint32_t sets;
+    uint32_t ways;
+    uint64_t clock = 0;
+    std::vector<uint64_t> lines;
+    std::vector<uint64_t> last_used;
+    std::vector<bool> valid;
+    std::vector<bool> dirty;
+
+    Lru_Cache(uint32_t num_set, uint32_t num_way)
+        : sets(num_set), ways(num_way), lines(sets * ways), last_used(sets * ways), valid(sets * ways), dirty(sets * ways)
+    {
+    }
+
+    /* true on a hit, writeback receives the dirty line evicted, if any */
+    bool access(uint64_t line, bool write, bool& writeback, uint64_t& evicted)
+    {
+        uint32_t base = (line % sets) * ways;
+        uint32_t victim = base;
+        writeback = false;
+        clock++;
+        for (uint32_t i = base; i < base + ways; i++) {
+            if (valid[i] && lines[i] == line) {
+                last_used[i] = clock;
+                dirty[i] = dirty[i] || write;
+                return true;
+            }
+            if (!valid[i] || (valid[victim] && last_used[i] < last_used[victim]))
+                victim = i;
+        }
+        if (valid[victim] && dirty[victim]) {
+            writeback = true;
+            evicted = lines[victim];
+        }
+        lines[victim] = line;
+        last_used[victim] = clock;
+        valid[victim] = true;
+        dirty[victim] = write;
+        return false;
+    }
+};
+
+/* Record of ChampSim traces */
+struct input_instr {
+    unsigned long long ip;
+    unsigned char is_branch;
+    unsigned char branch_taken;
+    unsigned char destination_registers[2];
+    unsigned char source_registers[4];
+    unsigned long long destination_memory[2];
+    unsigned long long source_memory[4];
+};
+
+/* LLC accesses of a ChampSim trace, behind the L1I, L1D and L2 of ChampSim */
+std::vector<Access> trace_stream(const std::string& path, size_t count)
+{
+    std::string command = "cat ";
+    if (path.size() > 3 && path.compare(path.size() - 3, 3, ".xz") == 0)
+        command = "xz -dc ";
+    else if (path.size() > 3 && path.compare(path.size() - 3, 3, ".gz") == 0)
+        command = "gzip -dc ";
+    FILE* trace = popen((command + "'" + path + "'").c_str(), "r");
+    if (trace == NULL) {
+        std::cerr << "Cannot read " << path << std::endl;
+        exit(1);
+    }
+
+    Lru_Cache l1i(64, 8), l1d(64, 12), l2c(1024, 8);
+    std::vector<Access> stream;
+    stream.reserve(count);
+    bool writeback;
+    uint64_t evicted;
+
+    /* An L2 access and the LLC accesses it causes */
+    auto l2_access = [&](uint64_t line, uint64_t ip, access_type type) {
+        bool l2_writeback;
+        uint64_t l2_evicted;
+        if (!l2c.access(line, type == access_type::WRITE, l2_writeback, l2_evicted) && type != access_type::WRITE)
+            stream.push_back({line << LOG2_BLOCK_SIZE, ip, (uint32_t)type});
+        if (l2_writeback)
+            stream.push_back({l2_evicted << LOG2_BLOCK_SIZE, 0, (uint32_t)access_type::WRITE});
+    };
+
+    input_instr instr;
+    while (stream.size() < count && fread(&instr, sizeof(instr), 1, trace) == 1) {
+        if (!l1i.access(instr.ip >> LOG2_BLOCK_SIZE, false, writeback, evicted))
+            l2_access(instr.ip >> LOG2_BLOCK_SIZE, instr.ip, access_type::LOAD);
+
+        for (int i = 0; i < 6; i++) {
+            bool write = i < 2;
+            uint64_t address = write ? instr.destination_memory[i] : instr.source_memory[i - 2];
+            if (address == 0)
+                continue;
+            if (!l1d.access(address >> LOG2_BLOCK_SIZE, write, writeback, evicted))
+                l2_access(address >> LOG2_BLOCK_SIZE, instr.ip, write ? access_type::RFO : access_type::LOAD);
+            if (writeback)
+                l2_access(evicted, 0, access_type::WRITE);
+        }
+    }
+    pclose(trace);
+
+    if (stream.size() > count)
+        stream.resize(count);
+    return stream;
+}
+
+int main(int argc, char** argv)
+{
+    if (argc < 4) {
+        std::cerr << "Usage: " << argv[0] << " <sets> <ways> <loop|random|scan|mixed|trace> [accesses]" << std::endl;
+        return 1;
+    }
+    uint32_t sets = atoi(argv[1]);
+    uint32_t ways = atoi(argv[2]);
+    std::string source = argv[3];
+    size_t count = argc > 4 ? atol(argv[4]) : 2000000;
+
+    std::vector<Access> stream;
+    if (source == "loop" || source == "random" || source == "scan" || source == "mixed")
+        stream = synthetic_stream(source, (uint64_t)sets * ways, count);
+    else
+        stream = trace_stream(source, count);
+
+    CACHE cache("LLC", sets, ways);
+    std::vector<CACHE::BLOCK> blocks(sets * ways);
+
+    size_t before = live_bytes;
+    cache.initialize_replacement();
+    size_t state_init = live_bytes - before;
+
+    uint64_t hits = 0;
+    auto start = std::chrono::steady_clock::now();
+    for (size_t i = 0; i < stream.size(); i++) {
+        const Access& access = stream[i];
+        uint32_t set = (access.address >> LOG2_BLOCK_SIZE) % sets;
+        CACHE::BLOCK* current_set = &blocks[set * ways];
+        cache.current_cycle = i;
+
+        uint32_t way = ways;
+        uint32_t invalid = ways;
+        for (uint32_t w = 0; w < ways; w++) {
+            if (current_set[w].valid && current_set[w].address == access.address)
+                way = w;
+            else if (!current_set[w].valid && invalid == ways)
+                invalid = w;
+        }
+
+        uint8_t hit = way < ways;
+        uint64_t victim_addr = 0;
+        if (hit) {
+            hits++;
+        } else {
+            // As in ChampSim, invalid ways are filled before any victim is chosen
+            way = invalid;
+            if (way == ways)
+                way = cache.find_victim(0, i, set, current_set, access.ip, access.address, access.type);
+            // Bypass
+            if (way >= ways)
+                continue;
+            victim_addr = current_set[way].address;
+            current_set[way].valid = true;
+            current_set[way].address = access.address;
+            current_set[way].ip = access.ip;
+        }
+        cache.update_replacement_state(0, set, way, access.address, access.ip, victim_addr, access.type, hit);
+    }
+    double seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+    size_t state_end = live_bytes - before;
+
+    cache.replacement_final_stats();
+
+    printf("RESULT {\"accesses\": %zu, \"hits\": %lu, \"hit_rate\": %.6f, \"ns_per_access\": %.3f, "
+           "\"state_bytes_init\": %zu, \"state_bytes_end\": %zu}\n",
+           stream.size(), (unsigned long)hits, stream.empty() ? 0.0 : (double)hits / stream.size(),
+           stream.empty() ? 0.0 : seconds * 1e9 / stream.size(), state_init, state_end);
+    return 0;
+}
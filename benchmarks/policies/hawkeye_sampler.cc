@@ -0,0 +1,155 @@
+/*  Cost per access of the Hawkeye sampler (cache_history_sampler)
+
+    Replays the same stream of sampled accesses on the map-based sampler
+    Hawkeye used before (one std::map per sampler set) and on Sampler_Set
+    (lib_hawkeye/sampler.h), checks both take the same decisions and prints
+    the nanoseconds per access of each.
+
+    g++ -O2 -std=c++17 -o hawkeye_sampler benchmarks/policies/hawkeye_sampler.cc
+    ./hawkeye_sampler [accesses] [repetitions]  */
+
+#include <chrono>
+#include <iostream>
+#include <map>
+#include <random>
+#include <vector>
+
+#include "../../Policies/lib_hawkeye/sampler.h"
+
+#define SAMPLER_ENTRIES 2800
+#define SAMPLER_SETS SAMPLER_ENTRIES/SAMPLER_HIST
+
+struct Access{
+    uint64_t tag;
+    uint32_t sample_set;
+    uint64_t PC;
+};
+
+//Sampler as it was in hawkeye_algorithm.cc
+struct Map_Sampler{
+    vector<map<uint64_t, HISTORY>> sets;
+
+    void init(){
+        sets.assign(SAMPLER_SETS, map<uint64_t, HISTORY>());
+    }
+
+    void update_cache_history(unsigned int sample_set, unsigned int currentVal){
+        for(map<uint64_t, HISTORY>::iterator it = sets[sample_set].begin(); it != sets[sample_set].end(); it++){
+            if((it->second).lru < currentVal){
+                (it->second).lru++;
+            }
+        }
+    }
+
+    //Returns the lru of the line before the access, SAMPLER_HIST on a miss
+    uint32_t access(const Access& a, unsigned int timer){
+        uint32_t result = SAMPLER_HIST;
+        if(sets[a.sample_set].find(a.tag) != sets[a.sample_set].end()){
+            result = sets[a.sample_set][a.tag].lru;
+            update_cache_history(a.sample_set, sets[a.sample_set][a.tag].lru);
+        }
+        else{
+            if(sets[a.sample_set].size() == SAMPLER_HIST){
+                uint64_t addr_val = 0;
+                for(map<uint64_t, HISTORY>::iterator it = sets[a.sample_set].begin(); it != sets[a.sample_set].end(); it++){
+                    if((it->second).lru == (SAMPLER_HIST-1)){
+                        addr_val = it->first;
+                        break;
+                    }
+                }
+                sets[a.sample_set].erase(addr_val);
+            }
+            sets[a.sample_set][a.tag].init();
+            update_cache_history(a.sample_set, SAMPLER_HIST-1);
+        }
+        sets[a.sample_set][a.tag].update(timer, a.PC);
+        sets[a.sample_set][a.tag].lru = 0;
+        return result;
+    }
+};
+
+//Sampler as it is now in hawkeye_algorithm.cc
+struct Flat_Sampler{
+    vector<Sampler_Set> sets;
+
+    void init(){
+        sets.resize(SAMPLER_SETS);
+        for(int i = 0; i < SAMPLER_SETS; i++){
+            sets[i].init();
+        }
+    }
+
+    uint32_t access(const Access& a, unsigned int timer){
+        uint32_t result = SAMPLER_HIST;
+        Sampler_Set& sampler = sets[a.sample_set];
+        HISTORY* entry = sampler.find(a.tag);
+        if(entry != NULL){
+            result = entry->lru;
+            sampler.update_lru(entry->lru);
+        }
+        else{
+            entry = sampler.insert(a.tag);
+            sampler.update_lru(SAMPLER_HIST-1);
+        }
+        entry->update(timer, a.PC);
+        entry->lru = 0;
+        return result;
+    }
+};
+
+//Accesses of the sampled sets of an LLC: a hot region reused often and a
+//larger one streamed through, tagged and placed the way Hawkeye does
+vector<Access> make_stream(size_t count){
+    mt19937_64 rng(1);
+    vector<Access> stream(count);
+    for(size_t i = 0; i < count; i++){
+        uint64_t r = rng();
+        uint64_t line = ((r >> 32) % 4 == 0) ? (r % (1 << 20)) : (r % (1 << 12));
+        uint64_t paddr = line << 6;
+        stream[i].tag = CRC(paddr >> 12) % 256;
+        stream[i].sample_set = (paddr >> 6) % SAMPLER_SETS;
+        stream[i].PC = 0x400000 + ((r >> 48) % 64) * 4;
+    }
+    return stream;
+}
+
+template <typename Sampler>
+double replay(const vector<Access>& stream, int repetitions, uint64_t& checksum){
+    double best = 0;
+    for(int rep = 0; rep < repetitions; rep++){
+        Sampler sampler;
+        sampler.init();
+        uint64_t hash = 1469598103934665603ULL;
+        auto start = chrono::steady_clock::now();
+        for(size_t i = 0; i < stream.size(); i++){
+            hash = (hash ^ sampler.access(stream[i], i % 1024)) * 1099511628211ULL;
+        }
+        double ns = chrono::duration<double, nano>(chrono::steady_clock::now() - start).count() / stream.size();
+        if(rep == 0 || ns < best){
+            best = ns;
+        }
+        checksum = hash;
+    }
+    return best;
+}
+
+int main(int argc, char** argv){
+    size_t count = argc > 1 ? atol(argv[1]) : 10000000;
+    int repetitions = argc > 2 ? atoi(argv[2]) : 5;
+    vector<Access> stream = make_stream(count);
+
+    uint64_t map_checksum = 0, flat_checksum = 0;
+    double map_ns = replay<Map_Sampler>(stream, repetitions, map_checksum);
+    double flat_ns = replay<Flat_Sampler>(stream, repetitions, flat_checksum);
+
+    cout << "accesses: " << count << ", best of " << repetitions << endl;
+    cout << "map sampler:  " << map_ns << " ns/access" << endl;
+    cout << "flat sampler: " << flat_ns << " ns/access" << endl;
+    cout << "speedup: " << map_ns / flat_ns << "x" << endl;
+    if(map_checksum != flat_checksum){
+        cout << "MISMATCH: the samplers took different decisions" << endl;
+        return 1;
+    }
+    cout << "decisions identical (checksum " << flat_checksum << ")" << endl;
+    return 0;
+}
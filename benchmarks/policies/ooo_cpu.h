@@ -0,0 +1,8 @@
+/*  Included by emissary and mockingjay, which use nothing of the core  */
+
+#ifndef OOO_CPU_H
+#define OOO_CPU_H
+
+#include "cache.h"
+
+#endif
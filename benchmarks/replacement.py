@@ -0,0 +1,169 @@
+"""
+Replacement policies of Policies/ outside ChampSim.
+
+Every policy is built with policies/harness.cc against the minimal CACHE of
+policies/cache.h, laid out as setup.bash copies it into ChampSim
+(replacement/<policy>, lib_hawkeye), and replays streams of LLC accesses:
+synthetic ones (loop, random, scan, mixed) or the LLC accesses of ChampSim
+traces, behind a private L1I, L1D and L2.
+
+For every policy and stream, it reports:
+    - ns/access: time of the replay, policy and tag lookup of the harness,
+      per access;
+    - hit rate: LLC hits over accesses;
+    - state: heap the policy allocated in initialize_replacement, and held
+      at the end of the replay (static arrays are not counted).
+
+Usage:
+    python3 benchmarks/replacement.py [--policies fifo hawkeye ...]
+        [--streams loop random scan mixed] [--traces a.champsimtrace.xz ...]
+        [--sets 2048] [--ways 16] [--accesses 2000000] [--output results.json]
+"""
+import os
+import glob
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HARNESS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'policies')
+
+POLICIES = ('bip', 'fifo', 'lfu', 'pcn', 'rlr', 'emissary', 'hawkeye',
+            'mockingjay', 'random')
+STREAMS = ('loop', 'random', 'scan', 'mixed')
+
+
+@dataclass
+class PolicyResult:
+    """
+    One policy replaying one stream.
+
+    Attributes:
+        policy (str): Directory of the policy in Policies/.
+        stream (str): Synthetic stream or trace file name.
+        sets (int): Sets of the LLC.
+        ways (int): Ways of the LLC.
+        accesses (int): LLC accesses replayed.
+        hits (int): LLC hits.
+        hit_rate (float): hits over accesses.
+        ns_per_access (float): Replay time per access.
+        state_bytes_init (int): Heap allocated by initialize_replacement.
+        state_bytes_end (int): Heap held by the policy after the replay.
+    """
+    policy: str
+    stream: str
+    sets: int
+    ways: int
+    accesses: int = 0
+    hits: int = 0
+    hit_rate: float = 0.0
+    ns_per_access: float = 0.0
+    state_bytes_init: int = 0
+    state_bytes_end: int = 0
+
+
+def build(policy: str, work_dir: str) -> str:
+    """Harness of a policy, built in work_dir; returns the executable."""
+    for folder in ('inc', 'replacement', 'bin'):
+        os.makedirs(os.path.join(work_dir, folder), exist_ok=True)
+    for header in ('cache.h', 'ooo_cpu.h'):
+        shutil.copy2(os.path.join(HARNESS, header), os.path.join(work_dir, 'inc'))
+    shutil.copytree(os.path.join(REPO, 'Policies', 'lib_hawkeye'),
+                    os.path.join(work_dir, 'lib_hawkeye'), dirs_exist_ok=True)
+    source = os.path.join(work_dir, 'replacement', policy)
+    shutil.copytree(os.path.join(REPO, 'Policies', policy), source,
+                    dirs_exist_ok=True)
+
+    executable = os.path.join(work_dir, 'bin', policy)
+    command = (['g++', '-O2', '-std=c++17', '-I', os.path.join(work_dir, 'inc'),
+                '-o', executable, os.path.join(HARNESS, 'harness.cc')] +
+               sorted(glob.glob(os.path.join(source, '*.cc'))))
+    subprocess.run(command, check=True, stdout=subprocess.PIPE,
+                   stderr=subprocess.STDOUT, text=True)
+    return executable
+
+
+def replay(executable: str, policy: str, stream: str, sets: int, ways: int,
+           accesses: int) -> PolicyResult:
+    """Replay a stream on a built policy."""
+    process = subprocess.run([executable, str(sets), str(ways), stream, str(accesses)],
+                             check=True, stdout=subprocess.PIPE, text=True)
+    result = PolicyResult(policy=policy, stream=os.path.basename(stream),
+                          sets=sets, ways=ways)
+    for line in process.stdout.splitlines():
+        if line.startswith('RESULT '):
+            for key, value in json.loads(line[len('RESULT '):]).items():
+                setattr(result, key, value)
+            return result
+    raise RuntimeError(f"No result from {policy} on {stream}")
+
+
+def render(results: List[PolicyResult]) -> str:
+    lines = [f"{'policy':<11} {'stream':<24} {'accesses':>9} {'ns/access':>10} "
+             f"{'hit rate':>9} {'state init':>11} {'state end':>11}"]
+    for result in results:
+        lines.append(
+            f"{result.policy:<11} {result.stream:<24} {result.accesses:>9} "
+            f"{result.ns_per_access:>10.1f} {result.hit_rate:>9.2%} "
+            f"{result.state_bytes_init / 1024:>9.1f}KB "
+            f"{result.state_bytes_end / 1024:>9.1f}KB"
+        )
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the replacement "
+                                     "policies on streams of LLC accesses.")
+    parser.add_argument('--policies', nargs='+', choices=POLICIES, default=list(POLICIES))
+    parser.add_argument('--streams', nargs='*', choices=STREAMS, default=list(STREAMS),
+                        help="Synthetic streams")
+    parser.add_argument('--traces', nargs='*', default=[],
+                        help="ChampSim traces whose LLC accesses are replayed")
+    # Mockingjay needs a power of 2 of sets
+    parser.add_argument('--sets', type=int, default=2048, help="Sets of the LLC")
+    parser.add_argument('--ways', type=int, default=16, help="Ways of the LLC")
+    parser.add_argument('--accesses', type=int, default=2_000_000,
+                        help="LLC accesses of every stream (at most, for traces)")
+    parser.add_argument('--work-dir', default=None,
+                        help="Directory of the builds, kept after the run "
+                             "(by default a temporary one, removed)")
+    parser.add_argument('--output', default=None,
+                        help="JSON file receiving the results")
+    args = parser.parse_args()
+
+    streams = args.streams + [os.path.abspath(trace) for trace in args.traces]
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='replacement_')
+    results: List[PolicyResult] = []
+    try:
+        for policy in args.policies:
+            executable: Optional[str] = None
+            try:
+                executable = build(policy, work_dir)
+            except subprocess.CalledProcessError as error:
+                print(f"[SKIP] {policy}: build failed\n{error.stdout}")
+                continue
+            for stream in streams:
+                try:
+                    result = replay(executable, policy, stream, args.sets,
+                                    args.ways, args.accesses)
+                except (subprocess.CalledProcessError, RuntimeError) as error:
+                    print(f"[SKIP] {policy} on {os.path.basename(stream)}: {error}")
+                    continue
+                results.append(result)
+                print(render([result]).splitlines()[1])
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(render(results))
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump([asdict(result) for result in results], file, indent=4)
+
+
+if __name__ == '__main__':
+    main()
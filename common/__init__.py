@@ -0,0 +1 @@
+"""Helpers shared by the ChampSim, gem5 and Scarab runners."""
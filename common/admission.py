@@ -0,0 +1,169 @@
+import os
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+def process_rss(pid: int) -> int:
+    """
+    Resident memory in bytes of a process and all its descendants, read
+    from /proc. Returns 0 once the process is gone or without /proc.
+    """
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status', 'r') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+            with open(f'/proc/{current}/task/{current}/children', 'r') as file:
+                pending.extend(int(child) for child in file.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+def available_memory() -> Optional[int]:
+    """MemAvailable of /proc/meminfo in bytes, None if unknown."""
+    try:
+        with open('/proc/meminfo', 'r') as file:
+            for line in file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+@dataclass(eq=False)
+class Job:
+    """A simulator process admitted under the memory budget."""
+    key: str
+    reserved: int
+    pid: Optional[int] = None
+    rss: int = 0
+    peak: int = 0
+
+    @property
+    def projected(self) -> int:
+        return max(self.reserved, self.rss)
+
+
+class MemoryAdmission:
+    """
+    Starts simulator processes only while their memory fits in a budget.
+
+    Every running process is sampled from /proc and the peak resident size
+    of each configuration (key) is remembered, in a JSON file when a path
+    is given. A new process is admitted only if the resident total of the
+    running ones (their current size, or their expected peak if larger)
+    plus its own expected peak stays under the budget. A configuration
+    never seen before is expected to need as much as the largest one seen
+    so far, or default_footprint. One process is always admitted when
+    nothing else is running, so a job larger than the budget still runs.
+
+    Processes are started through common.process.Launcher, which sets the
+    pid of the admitted Job and its exact peak once it exits.
+
+    Attributes:
+        budget (int): Bytes the running simulators may use together.
+        default_footprint (int): Expected peak without any history.
+        headroom (float): Factor applied to the learned peaks.
+        interval (float): Seconds between two samples of the processes.
+        footprints (Dict[str, int]): Peak resident size per key.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[int] = None,
+        default_footprint: int = 1 << 30,
+        footprints_path: Optional[str] = None,
+        headroom: float = 1.1,
+        interval: float = 1.0,
+    ):
+        if budget is None:
+            # By default, leave a tenth of the free memory to the system
+            budget = int((available_memory() or 0) * 0.9) or 1 << 62
+        self.budget = budget
+        self.default_footprint = default_footprint
+        self.footprints_path = footprints_path
+        self.headroom = headroom
+        self.interval = interval
+
+        self.footprints: Dict[str, int] = {}
+        if footprints_path and os.path.exists(footprints_path):
+            with open(footprints_path, 'r') as file:
+                self.footprints = json.load(file)
+
+        self.condition = threading.Condition()
+        self.running: List[Job] = []
+        self.monitor: Optional[threading.Thread] = None
+
+    def estimate(self, key: str) -> int:
+        """Expected peak resident size of a process of configuration key."""
+        if key in self.footprints:
+            return int(self.footprints[key] * self.headroom)
+        if self.footprints:
+            return int(max(self.footprints.values()) * self.headroom)
+        return self.default_footprint
+
+    def projected(self) -> int:
+        return sum(job.projected for job in self.running)
+
+    def admit(self, key: str) -> Job:
+        """Wait until a process of configuration key fits, and reserve it."""
+        job = Job(key=key, reserved=self.estimate(key))
+        with self.condition:
+            warned = False
+            while self.running and self.projected() + job.reserved > self.budget:
+                if not warned:
+                    print(f"[MEMORY] Holding {key}: {self.projected() >> 20} MiB "
+                          f"in use + {job.reserved >> 20} MiB expected > "
+                          f"{self.budget >> 20} MiB budget")
+                    warned = True
+                self.condition.wait(self.interval)
+            self.running.append(job)
+
+            if self.monitor is None or not self.monitor.is_alive():
+                self.monitor = threading.Thread(target=self.sample, daemon=True)
+                self.monitor.start()
+        return job
+
+    def release(self, job: Job) -> None:
+        """Forget a finished process and learn its peak resident size."""
+        with self.condition:
+            self.running.remove(job)
+            if job.peak:
+                self.footprints[job.key] = max(job.peak,
+                                               self.footprints.get(job.key, 0))
+                self.save()
+            self.condition.notify_all()
+
+    def save(self) -> None:
+        if not self.footprints_path:
+            return
+        temp_path = f"{self.footprints_path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(self.footprints, file, indent=4, sort_keys=True)
+        os.replace(temp_path, self.footprints_path)
+
+    def sample(self) -> None:
+        """Sample the running processes until none is left."""
+        while True:
+            with self.condition:
+                if not self.running:
+                    self.monitor = None
+                    return
+                jobs = [job for job in self.running if job.pid is not None]
+
+            for job in jobs:
+                job.rss = process_rss(job.pid)
+                job.peak = max(job.peak, job.rss)
+
+            with self.condition:
+                self.condition.notify_all()
+                self.condition.wait(self.interval)
@@ -0,0 +1,552 @@
+"""
+Coordinator/worker execution of simulator processes over several hosts.
+
+The runner process owns the job queue through a Coordinator, and a
+RemoteLauncher replaces the local Launcher: every simulation becomes a
+job that a worker pulls, runs with its own Launcher (memory admission
+and CPU placement are per host) and reports back as a RunRecord. Traces,
+binaries and outputs are exchanged through a directory shared by every
+host; --path-map rewrites paths where it is mounted elsewhere.
+
+Every time a job is handed out it gets a new lease id. A job whose worker
+stopped renewing its lease is handed out again, and the coordinator then
+ignores everything the previous lease reports: its heartbeats are
+answered with the order to kill the process, its completion is rejected,
+and its output, written next to the expected file (<file>.lease<id>), is
+never moved in place. Only the current lease's output replaces the
+expected file.
+
+Start the workers, from the root of the repository, with:
+
+    python3 -m common.distributed http://<coordinator>:<port> --slots 32
+
+The protocol has no authentication: only use it on a trusted network. The
+coordinator listens on 127.0.0.1 unless given another address.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import argparse
+import threading
+import subprocess
+import xmlrpc.client
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from socketserver import ThreadingMixIn
+from typing import Callable, Deque, Dict, List, Optional
+from xmlrpc.server import SimpleXMLRPCServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.admission import MemoryAdmission
+from common.placement import CorePlacer
+from common.process import Launcher, RunRecord
+
+
+class ThreadingXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+
+@dataclass(eq=False)
+class RemoteJob:
+    """A process waiting for, or running on, a worker."""
+    id: int
+    payload: Dict
+    on_start: Optional[Callable[[], None]] = None
+    on_spawn: Optional[Callable[[int], None]] = None
+    state: str = 'queued'
+    worker: Optional[str] = None
+    lease_id: int = 0
+    lease_until: float = 0.0
+    started: bool = False
+    spawned: bool = False
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+class Coordinator:
+    """
+    Job queue served to the workers over XML-RPC.
+
+    Workers pull a job, confirm when its process starts, renew their
+    lease while it runs and report its record. A job whose worker stops
+    renewing its lease (e.g. the host went down) is queued again under a
+    new lease id; the calls of the previous lease are then ignored.
+
+    Attributes:
+        host (str): Address the server listens on.
+        port (int): Port the server listens on.
+        lease (float): Seconds a worker may stay silent before its jobs
+            are given to another worker.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, lease: float = 60.0):
+        self.host = host
+        self.port = port
+        self.lease = lease
+
+        self.condition = threading.Condition()
+        self.queue: Deque[RemoteJob] = deque()
+        self.jobs: Dict[int, RemoteJob] = {}
+        self.next_id = 0
+        self.stopping = False
+        self.workers = set()
+        self.dismissed = set()
+
+        self.server = ThreadingXMLRPCServer((host, port), allow_none=True,
+                                            logRequests=False)
+        for function in (self.pull, self.started, self.spawned, self.heartbeat,
+                         self.complete, self.fail):
+            self.server.register_function(function)
+
+    def start(self) -> None:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.requeue_expired, daemon=True).start()
+        print(f"[COORDINATOR] Waiting for workers on {self.host}:{self.port}")
+
+    def stop(self, grace: float = 10.0) -> None:
+        """Tell the polling workers to exit, then stop the server."""
+        deadline = time.monotonic() + grace
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+            while self.workers - self.dismissed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+        self.server.shutdown()
+
+    def submit(self, payload: Dict,
+               on_start: Optional[Callable[[], None]] = None,
+               on_spawn: Optional[Callable[[int], None]] = None) -> RemoteJob:
+        with self.condition:
+            job = RemoteJob(id=self.next_id, payload=payload, on_start=on_start,
+                            on_spawn=on_spawn)
+            self.next_id += 1
+            self.jobs[job.id] = job
+            self.queue.append(job)
+            self.condition.notify_all()
+        return job
+
+    @staticmethod
+    def lease_streams(job: RemoteJob) -> List[tuple]:
+        """(expected path, path written by the current lease) of each stream."""
+        return [(job.payload[stream], f"{job.payload[stream]}.lease{job.lease_id}")
+                for stream in ('stdout', 'stderr')
+                if job.payload.get(stream) and job.payload[stream] != 'stdout']
+
+    def current(self, job_id: int, lease_id: int) -> Optional[RemoteJob]:
+        """The job if lease_id is its running lease. Called with the lock held."""
+        job = self.jobs.get(job_id)
+        if job is None or job.state != 'running' or job.lease_id != lease_id:
+            return None
+        return job
+
+    def requeue_expired(self) -> None:
+        while True:
+            time.sleep(self.lease / 4)
+            with self.condition:
+                now = time.monotonic()
+                for job in self.jobs.values():
+                    if job.state == 'running' and job.lease_until < now:
+                        print(f"[COORDINATOR] Lost {job.worker}, requeuing "
+                              f"{job.payload['name']}")
+                        # The lost worker may still write, but to its own file
+                        for _, lease_path in self.lease_streams(job):
+                            try:
+                                os.remove(lease_path)
+                            except OSError:
+                                pass
+                        job.state = 'queued'
+                        job.worker = None
+                        self.queue.appendleft(job)
+                        self.condition.notify_all()
+
+    # Remote procedures. Payloads travel as JSON: XML-RPC integers are
+    # limited to 32 bits.
+
+    def pull(self, worker: str, wait: float = 5.0) -> str:
+        """Next job for a worker, '' if none came within wait seconds."""
+        deadline = time.monotonic() + wait
+        with self.condition:
+            self.workers.add(worker)
+            while True:
+                # Skip jobs reported meanwhile by a worker presumed lost
+                while self.queue and self.queue[0].state != 'queued':
+                    self.queue.popleft()
+                if self.queue:
+                    break
+                if self.stopping:
+                    self.dismissed.add(worker)
+                    self.condition.notify_all()
+                    return json.dumps({'shutdown': True})
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return ''
+                self.condition.wait(remaining)
+
+            job = self.queue.popleft()
+            job.state = 'running'
+            job.worker = worker
+            job.lease_id += 1
+            job.lease_until = time.monotonic() + self.lease
+            return json.dumps(dict(job.payload, id=job.id, lease=job.lease_id))
+
+    def started(self, job_id: int, lease_id: int) -> bool:
+        """
+        Confirm a lease may start its process, False if it is stale. The
+        expected output files then point to the files of this lease, so the
+        progress of the run can be followed there.
+        """
+        with self.condition:
+            job = self.current(job_id, lease_id)
+            if job is None:
+                return False
+            for path, lease_path in self.lease_streams(job):
+                link = f"{path}.link"
+                try:
+                    os.remove(link)
+                except FileNotFoundError:
+                    pass
+                os.symlink(os.path.basename(lease_path), link)
+                os.replace(link, path)
+            first = not job.started
+            job.started = True
+        if first and job.on_start:
+            job.on_start()
+        return True
+
+    def spawned(self, job_id: int, lease_id: int, pid: int) -> bool:
+        """
+        A lease started its process, pid on the worker. False if the lease
+        is stale, and the process must be killed.
+        """
+        with self.condition:
+            job = self.current(job_id, lease_id)
+            if job is None:
+                return False
+            first = not job.spawned
+            job.spawned = True
+        if first and job.on_spawn:
+            job.on_spawn(pid)
+        return True
+
+    def heartbeat(self, worker: str, leases: List[List[int]]) -> List[int]:
+        """
+        Renew the (job id, lease id) leases of a worker. Returns the jobs
+        whose lease is no longer current, whose processes must be killed.
+        """
+        stale = []
+        with self.condition:
+            for job_id, lease_id in leases:
+                job = self.current(job_id, lease_id)
+                if job is None or job.worker != worker:
+                    stale.append(job_id)
+                    continue
+                job.lease_until = time.monotonic() + self.lease
+        return stale
+
+    def complete(self, job_id: int, lease_id: int, record: str) -> bool:
+        return self.finish(job_id, lease_id, result=json.loads(record))
+
+    def fail(self, job_id: int, lease_id: int, error: str) -> bool:
+        return self.finish(job_id, lease_id, error=error)
+
+    def finish(self, job_id: int, lease_id: int, result: Optional[Dict] = None,
+               error: Optional[str] = None) -> bool:
+        """
+        Record the end of a lease, moving its output in place. Returns
+        False, ignoring the report, if the lease is stale.
+        """
+        with self.condition:
+            job = self.current(job_id, lease_id)
+            if job is None:
+                return False
+            for path, lease_path in self.lease_streams(job):
+                if os.path.exists(lease_path):
+                    os.replace(lease_path, path)
+                elif os.path.islink(path):
+                    # Nothing written, leave an empty file
+                    os.remove(path)
+                    open(path, 'w').close()
+            del self.jobs[job_id]
+            job.state = 'done' if error is None else 'failed'
+            job.result = result
+            job.error = error
+        job.done.set()
+        return True
+
+
+def start_coordinator(address: str) -> Coordinator:
+    """
+    Start a coordinator listening on address, given as host:port (or
+    :port for 127.0.0.1).
+    """
+    host, _, port = address.rpartition(':')
+    coordinator = Coordinator(host or '127.0.0.1', int(port))
+    coordinator.start()
+    return coordinator
+
+
+class RemoteLauncher(Launcher):
+    """
+    Launcher whose processes run on the workers of a Coordinator. The
+    standard streams of the process must be files of the shared
+    directory (or left unset), they are reopened by the worker. on_start
+    and on_spawn are called when the first lease of the job starts its
+    process; the pid given to on_spawn is the one on the worker, so it
+    cannot be signalled from this host.
+    """
+
+    def __init__(self, coordinator: Coordinator, journal_path: Optional[str] = None):
+        super().__init__(journal_path=journal_path)
+        self.coordinator = coordinator
+
+    @staticmethod
+    def stream_path(stream) -> Optional[str]:
+        if stream is None:
+            return None
+        if not hasattr(stream, 'name') or not isinstance(stream.name, str):
+            raise ValueError("Remote processes can only write to named files")
+        return os.path.abspath(stream.name)
+
+    def run(
+        self,
+        key: str,
+        command: List[str],
+        check: bool = False,
+        on_start: Optional[Callable[[], None]] = None,
+        record_path: Optional[str] = None,
+        name: Optional[str] = None,
+        on_spawn: Optional[Callable[[int], None]] = None,
+        trace_size: Optional[int] = None,
+        instructions: Optional[int] = None,
+        **kwargs,
+    ) -> RunRecord:
+        stdout = self.stream_path(kwargs.get('stdout'))
+        stderr = kwargs.get('stderr')
+        payload = {
+            'key': key,
+            'name': name or key,
+            'command': [str(part) for part in command],
+            'cwd': os.path.abspath(kwargs.get('cwd') or os.getcwd()),
+            'stdout': stdout,
+            'stderr': ('stdout' if stderr is subprocess.STDOUT or
+                       (stderr is not None and stderr is kwargs.get('stdout'))
+                       else self.stream_path(stderr)),
+        }
+
+        job = self.coordinator.submit(payload, on_start, on_spawn)
+        job.done.wait()
+        if job.error is not None:
+            raise RuntimeError(f"{payload['name']} failed on {job.worker}: {job.error}")
+
+        record = RunRecord(**job.result)
+        record.trace_size, record.instructions = trace_size, instructions
+        self.write(record, record_path)
+
+        if check and record.returncode != 0:
+            raise subprocess.CalledProcessError(record.returncode, command)
+        return record
+
+
+class Worker:
+    """
+    Pulls jobs from a coordinator and runs up to slots of them at a time.
+
+    Attributes:
+        url (str): Address of the coordinator, e.g. http://host:8765.
+        slots (int): Number of processes run at the same time.
+        launcher (Launcher): Starts the processes on this host.
+        path_map (Dict[str, str]): Path prefixes of the coordinator and
+            where the same directories are mounted on this host.
+        name (str): Name of the worker reported to the coordinator.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        slots: int,
+        launcher: Launcher,
+        path_map: Optional[Dict[str, str]] = None,
+        name: Optional[str] = None,
+        heartbeat: float = 15.0,
+        retry: float = 120.0,
+    ):
+        self.url = url
+        self.slots = slots
+        self.launcher = launcher
+        self.path_map = path_map or {}
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_interval = heartbeat
+        self.retry = retry
+
+        self.lock = threading.Lock()
+        # Lease id and process id of the running jobs, by job id
+        self.running: Dict[int, int] = {}
+        self.pids: Dict[int, int] = {}
+        self.finished = threading.Event()
+
+    def proxy(self) -> xmlrpc.client.ServerProxy:
+        # A proxy is not thread safe, each thread makes its own
+        return xmlrpc.client.ServerProxy(self.url, allow_none=True)
+
+    def translate(self, path: Optional[str]) -> Optional[str]:
+        if not path:
+            return path
+        for source, target in self.path_map.items():
+            if path == source or path.startswith(source.rstrip('/') + '/'):
+                return target + path[len(source):]
+        return path
+
+    def start(self, proxy: xmlrpc.client.ServerProxy, job: Dict) -> None:
+        if not proxy.started(job['id'], job['lease']):
+            raise RuntimeError("lease expired before the process started")
+
+    def spawned(self, proxy: xmlrpc.client.ServerProxy, job: Dict, pid: int) -> None:
+        with self.lock:
+            self.pids[job['id']] = pid
+        if not proxy.spawned(job['id'], job['lease'], pid):
+            raise RuntimeError("lease expired while the process started")
+
+    def execute(self, proxy: xmlrpc.client.ServerProxy, job: Dict) -> None:
+        command = [self.translate(part) if os.path.isabs(part) else part
+                   for part in job['command']]
+        # Every lease writes its own files, the coordinator moves them in place
+        lease_paths = []
+        streams = []
+        try:
+            kwargs = {'cwd': self.translate(job['cwd'])}
+            if job['stdout']:
+                lease_paths.append(f"{self.translate(job['stdout'])}.lease{job['lease']}")
+                streams.append(open(lease_paths[-1], 'w'))
+                kwargs['stdout'] = streams[-1]
+            if job['stderr'] == 'stdout':
+                kwargs['stderr'] = subprocess.STDOUT
+            elif job['stderr']:
+                lease_paths.append(f"{self.translate(job['stderr'])}.lease{job['lease']}")
+                streams.append(open(lease_paths[-1], 'w'))
+                kwargs['stderr'] = streams[-1]
+
+            print(f"[WORKER] Running {job['name']}")
+            record = self.launcher.run(job['key'], command, name=job['name'],
+                                       on_start=partial(self.start, proxy, job),
+                                       on_spawn=partial(self.spawned, proxy, job),
+                                       **kwargs)
+            accepted = proxy.complete(job['id'], job['lease'],
+                                      json.dumps(record.to_dict()))
+        except Exception as e:
+            accepted = proxy.fail(job['id'], job['lease'], f"{type(e).__name__}: {e}")
+        finally:
+            for stream in streams:
+                stream.close()
+
+        if not accepted:
+            print(f"[WORKER] Lease of {job['name']} expired, output dropped")
+            for path in lease_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def slot(self) -> None:
+        proxy = self.proxy()
+        failing_since = None
+        while not self.finished.is_set():
+            try:
+                reply = proxy.pull(self.name)
+                failing_since = None
+            except (OSError, xmlrpc.client.Error) as e:
+                now = time.monotonic()
+                failing_since = failing_since or now
+                if now - failing_since > self.retry:
+                    print(f"[WORKER] Coordinator unreachable: {e}")
+                    self.finished.set()
+                    return
+                time.sleep(2)
+                continue
+
+            if not reply:
+                continue
+            job = json.loads(reply)
+            if job.get('shutdown'):
+                self.finished.set()
+                return
+
+            with self.lock:
+                self.running[job['id']] = job['lease']
+            try:
+                self.execute(proxy, job)
+            finally:
+                with self.lock:
+                    self.running.pop(job['id'], None)
+                    self.pids.pop(job['id'], None)
+
+    def send_heartbeats(self) -> None:
+        proxy = self.proxy()
+        while not self.finished.wait(self.heartbeat_interval):
+            with self.lock:
+                running = [[job_id, lease] for job_id, lease in self.running.items()]
+            if not running:
+                continue
+            try:
+                stale = proxy.heartbeat(self.name, running)
+            except (OSError, xmlrpc.client.Error):
+                continue
+            # Jobs given to another worker meanwhile
+            for job_id in stale:
+                with self.lock:
+                    pid = self.pids.get(job_id)
+                if pid is not None:
+                    print(f"[WORKER] Lease of job {job_id} expired, killing it")
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+
+    def serve(self) -> None:
+        print(f"[WORKER] {self.name} serving {self.url} with {self.slots} slots")
+        threading.Thread(target=self.send_heartbeats, daemon=True).start()
+        with ThreadPoolExecutor(max_workers=self.slots) as executor:
+            for _ in range(self.slots):
+                executor.submit(self.slot)
+        print(f"[WORKER] {self.name} done")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run simulations for a coordinator.")
+    parser.add_argument('url', help="Coordinator address, e.g. http://node0:8765")
+    parser.add_argument('--slots', type=int, default=os.cpu_count() or 1,
+                        help="Simulations run at the same time")
+    parser.add_argument('--memory-budget', type=int, default=None,
+                        help="Bytes the simulations may use together")
+    parser.add_argument('--pin-cores', action='store_true',
+                        help="Pin each simulation to its own core")
+    parser.add_argument('--state-dir', default=os.path.expanduser('~/.cache/sim_worker'),
+                        help="Directory for the learned memory footprints")
+    parser.add_argument('--path-map', action='append', default=[],
+                        metavar='COORDINATOR_PATH=LOCAL_PATH',
+                        help="Shared directory mounted at another path here")
+    args = parser.parse_args()
+
+    os.makedirs(args.state_dir, exist_ok=True)
+    launcher = Launcher(
+        admission=MemoryAdmission(
+            budget=args.memory_budget,
+            footprints_path=os.path.join(args.state_dir, 'memory_footprints.json')
+        ),
+        placer=CorePlacer() if args.pin_cores else None
+    )
+    path_map = dict(mapping.split('=', 1) for mapping in args.path_map)
+
+    Worker(args.url, args.slots, launcher, path_map).serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+
+# A job is queued, then building (executables) or running (simulations),
+# and ends done or failed, or pruned when a multi-fidelity sweep drops it
+STATES = ('queued', 'building', 'running', 'done', 'failed', 'pruned')
+IN_FLIGHT = ('building', 'running')
+
+
+def file_hash(path: str) -> Optional[str]:
+    """sha256 of a file, None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+@dataclass
+class JournalEntry:
+    """
+    Last known state of a job of the sweep.
+
+    Attributes:
+        job (str): Name of the job.
+        state (str): queued, building, running, done, failed or pruned.
+        binary_hash (Optional[str]): sha256 of the executable of the job.
+        updated_at (float): Time of the transition (seconds since the epoch).
+        info (Dict): Anything else the runner wants to find on restart.
+    """
+    job: str
+    state: str
+    binary_hash: Optional[str] = None
+    updated_at: float = 0.0
+    info: Dict = field(default_factory=dict)
+
+
+class SweepJournal:
+    """
+    Write-ahead journal of the jobs of a sweep, so a sweep that was killed
+    (or whose host crashed) resumes exactly where it stopped.
+
+    Every state transition is appended as a JSON line and flushed to disk
+    before the work it announces starts, so the journal is never behind
+    the outputs. Queued entries are not synced, as the sweep rebuilds them
+    anyway. On load, the last line of each job wins; a line torn by the
+    crash is ignored. Jobs that were building or running when the previous
+    sweep stopped are listed in interrupted and put back to queued, and
+    the journal is compacted to one line per job.
+
+    Attributes:
+        path (str): JSON lines file of the journal.
+        entries (Dict[str, JournalEntry]): Last state of every job.
+        interrupted (List[str]): Jobs in flight when the last sweep stopped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: Dict[str, JournalEntry] = {}
+        self.interrupted: List[str] = []
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.load()
+
+        for job in self.interrupted:
+            self.entries[job].state = 'queued'
+        if self.interrupted:
+            print(f"[JOURNAL] Re-queuing {len(self.interrupted)} jobs "
+                  f"interrupted by the previous sweep")
+
+        self.compact()
+        self.file = open(self.path, 'a')
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r') as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            try:
+                entry = JournalEntry(**json.loads(line))
+            except (ValueError, TypeError):
+                continue
+            self.entries[entry.job] = entry
+
+        self.interrupted = [job for job, entry in self.entries.items()
+                            if entry.state in IN_FLIGHT]
+
+    def compact(self) -> None:
+        """Rewrite the journal with the last line of every job."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as file:
+            for entry in self.entries.values():
+                file.write(json.dumps(asdict(entry)) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)),
+                            os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def record(
+        self,
+        job: str,
+        state: str,
+        binary_hash: Optional[str] = None,
+        **info,
+    ) -> None:
+        """Append a state transition of job, keeping its known binary hash."""
+        if state not in STATES:
+            raise ValueError(f"Unknown job state: {state}")
+
+        with self.lock:
+            previous = self.entries.get(job)
+            if binary_hash is None and previous:
+                binary_hash = previous.binary_hash
+            entry = JournalEntry(job=job, state=state, binary_hash=binary_hash,
+                                 updated_at=time.time(), info=info)
+            self.entries[job] = entry
+
+            self.file.write(json.dumps(asdict(entry)) + '\n')
+            self.file.flush()
+            if state != 'queued':
+                os.fsync(self.file.fileno())
+
+    def get(self, job: str) -> Optional[JournalEntry]:
+        return self.entries.get(job)
+
+    def state(self, job: str) -> Optional[str]:
+        entry = self.entries.get(job)
+        return entry.state if entry else None
+
+    def is_done(self, job: str) -> bool:
+        return self.state(job) == 'done'
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
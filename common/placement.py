@@ -0,0 +1,148 @@
+import os
+import glob
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+def parse_cpulist(text: str) -> List[int]:
+    """Expand a kernel CPU list such as '0-3,8,10-11'."""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def read_file(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+@dataclass(frozen=True)
+class Cpu:
+    """A logical CPU, its physical core (lowest sibling id) and NUMA node."""
+    id: int
+    core: int
+    node: int
+
+
+def read_topology() -> List[Cpu]:
+    """
+    Logical CPUs this process may run on, with their physical core and
+    NUMA node read from /sys. Without /sys, every CPU is its own core on
+    node 0.
+    """
+    allowed = sorted(os.sched_getaffinity(0))
+
+    nodes: Dict[int, int] = {}
+    for node_dir in glob.glob('/sys/devices/system/node/node[0-9]*'):
+        cpulist = read_file(os.path.join(node_dir, 'cpulist'))
+        if cpulist is None:
+            continue
+        node = int(os.path.basename(node_dir)[len('node'):])
+        for cpu in parse_cpulist(cpulist):
+            nodes[cpu] = node
+
+    cpus = []
+    for cpu in allowed:
+        topology = f'/sys/devices/system/cpu/cpu{cpu}/topology'
+        siblings = (read_file(os.path.join(topology, 'core_cpus_list')) or
+                    read_file(os.path.join(topology, 'thread_siblings_list')))
+        core = min(parse_cpulist(siblings)) if siblings else cpu
+        cpus.append(Cpu(id=cpu, core=core, node=nodes.get(cpu, 0)))
+    return cpus
+
+
+@dataclass
+class Placement:
+    """
+    Where a simulator process runs.
+
+    Attributes:
+        cpu (int): Logical CPU the process is pinned to.
+        core (int): Physical core of that CPU.
+        node (int): NUMA node of that CPU, memory is bound to it.
+        method (str): numactl, taskset or sched_setaffinity.
+        shared_core (bool): True if another simulator runs on a sibling.
+    """
+    cpu: int
+    core: int
+    node: int
+    method: str
+    shared_core: bool = False
+
+    def wrap(self, command: List[str]) -> List[str]:
+        """Prefix command so it starts on its CPU, with local memory."""
+        if self.method == 'numactl':
+            return ['numactl', f'--physcpubind={self.cpu}',
+                    f'--membind={self.node}'] + command
+        if self.method == 'taskset':
+            # The kernel allocates memory on the node of the running CPU
+            return ['taskset', '-c', str(self.cpu)] + command
+        return command
+
+    def apply(self, pid: int) -> None:
+        """Pin an already started process when no wrapper is available."""
+        if self.method == 'sched_setaffinity':
+            os.sched_setaffinity(pid, {self.cpu})
+
+
+class CorePlacer:
+    """
+    Hands out a dedicated CPU to each simulator process.
+
+    Every process gets the least loaded CPU, preferring a physical core
+    none of whose hyperthread siblings is in use, and balancing the
+    NUMA nodes. Processes are pinned to their CPU and their memory is
+    bound to its node through numactl when it is installed and the host
+    has several nodes, otherwise through taskset (the kernel allocates
+    locally by default), or sched_setaffinity as a last resort. With more
+    processes than CPUs, CPUs are shared by as few processes as possible.
+
+    Attributes:
+        cpus (List[Cpu]): CPUs available for simulations.
+    """
+
+    def __init__(self, cpus: Optional[List[Cpu]] = None):
+        self.cpus = cpus or read_topology()
+        self.lock = threading.Lock()
+        self.cpu_load: Dict[int, int] = {cpu.id: 0 for cpu in self.cpus}
+        self.core_load: Dict[int, int] = {cpu.core: 0 for cpu in self.cpus}
+        self.node_load: Dict[int, int] = {cpu.node: 0 for cpu in self.cpus}
+
+        if len(self.node_load) > 1 and shutil.which('numactl'):
+            self.method = 'numactl'
+        elif shutil.which('taskset'):
+            self.method = 'taskset'
+        else:
+            self.method = 'sched_setaffinity'
+
+    def acquire(self) -> Placement:
+        """Reserve the best CPU for a new process."""
+        with self.lock:
+            cpu = min(self.cpus, key=lambda c: (self.cpu_load[c.id],
+                                                self.core_load[c.core],
+                                                self.node_load[c.node],
+                                                c.id))
+            shared_core = self.core_load[cpu.core] > 0
+            self.cpu_load[cpu.id] += 1
+            self.core_load[cpu.core] += 1
+            self.node_load[cpu.node] += 1
+        return Placement(cpu=cpu.id, core=cpu.core, node=cpu.node,
+                         method=self.method, shared_core=shared_core)
+
+    def release(self, placement: Placement) -> None:
+        with self.lock:
+            self.cpu_load[placement.cpu] -= 1
+            self.core_load[placement.core] -= 1
+            self.node_load[placement.node] -= 1
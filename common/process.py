@@ -0,0 +1,191 @@
+import os
+import json
+import signal
+import time
+import threading
+import subprocess
+from dataclasses import dataclass, asdict
+from typing import Callable, List, Optional
+
+from common.admission import MemoryAdmission
+from common.placement import CorePlacer
+
+
+@dataclass
+class RunRecord:
+    """
+    What happened to one simulator process.
+
+    Attributes:
+        key (str): Configuration the process belongs to.
+        name (str): Run the process belongs to, key by default.
+        command (List[str]): Command that was started, wrappers included.
+        returncode (int): Exit code, negative if killed by a signal.
+        started_at (float): Start time (seconds since the epoch).
+        wall_seconds (float): Run time, not counting the admission wait.
+        user_seconds (float): CPU time spent in user mode.
+        system_seconds (float): CPU time spent in the kernel.
+        peak_rss (int): Peak resident size in bytes.
+        minor_faults (int): Page faults served without I/O.
+        major_faults (int): Page faults that needed I/O.
+        block_reads (int): Blocks read by the filesystem (512 bytes each).
+        block_writes (int): Blocks written by the filesystem.
+        trace_size (Optional[int]): Size in bytes of the trace (or of the
+            workload binary) simulated.
+        instructions (Optional[int]): Instructions the run was asked to
+            simulate, warmup included.
+        cpu (Optional[int]): Logical CPU the process was pinned to.
+        core (Optional[int]): Physical core of that CPU.
+        node (Optional[int]): NUMA node of that CPU.
+        placement (Optional[str]): How the process was pinned.
+        shared_core (bool): True if a sibling CPU ran another simulator.
+    """
+    key: str
+    command: List[str]
+    name: str = ''
+    returncode: int = 0
+    started_at: float = 0.0
+    wall_seconds: float = 0.0
+    user_seconds: float = 0.0
+    system_seconds: float = 0.0
+    peak_rss: int = 0
+    minor_faults: int = 0
+    major_faults: int = 0
+    block_reads: int = 0
+    block_writes: int = 0
+    trace_size: Optional[int] = None
+    instructions: Optional[int] = None
+    cpu: Optional[int] = None
+    core: Optional[int] = None
+    node: Optional[int] = None
+    placement: Optional[str] = None
+    shared_core: bool = False
+
+    @property
+    def cpu_seconds(self) -> float:
+        return self.user_seconds + self.system_seconds
+
+    def account(self, usage) -> None:
+        """Copy the resource usage reported by wait4."""
+        self.user_seconds = usage.ru_utime
+        self.system_seconds = usage.ru_stime
+        self.peak_rss = usage.ru_maxrss * 1024
+        self.minor_faults = usage.ru_minflt
+        self.major_faults = usage.ru_majflt
+        self.block_reads = usage.ru_inblock
+        self.block_writes = usage.ru_oublock
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class Launcher:
+    """
+    Starts simulator processes for the runners: waits for memory when an
+    admission controller is given, pins the process to a CPU when a core
+    placer is given, and returns a RunRecord of the run. Records can be
+    written next to the output of each run and/or appended to a journal
+    shared by every run.
+
+    Attributes:
+        admission (Optional[MemoryAdmission]): Memory admission control.
+        placer (Optional[CorePlacer]): CPU and NUMA placement.
+        journal_path (Optional[str]): JSON lines file receiving every record.
+    """
+
+    def __init__(
+        self,
+        admission: Optional[MemoryAdmission] = None,
+        placer: Optional[CorePlacer] = None,
+        journal_path: Optional[str] = None,
+    ):
+        self.admission = admission
+        self.placer = placer
+        self.journal_path = journal_path
+        self.lock = threading.Lock()
+
+    def run(
+        self,
+        key: str,
+        command: List[str],
+        check: bool = False,
+        on_start: Optional[Callable[[], None]] = None,
+        record_path: Optional[str] = None,
+        name: Optional[str] = None,
+        on_spawn: Optional[Callable[[int], None]] = None,
+        trace_size: Optional[int] = None,
+        instructions: Optional[int] = None,
+        **kwargs,
+    ) -> RunRecord:
+        """
+        Like subprocess.run (kwargs go to Popen), for a process of
+        configuration key. on_start, if given, is called once the process
+        is admitted, right before it starts, and on_spawn with its pid
+        once it started. record_path, if given, receives the record as
+        JSON; name identifies the run in it, trace_size and instructions
+        what it simulated.
+        """
+        record = RunRecord(key=key, command=command, name=name or key,
+                           trace_size=trace_size, instructions=instructions)
+        job = self.admission.admit(key) if self.admission else None
+        placement = None
+        try:
+            placement = self.placer.acquire() if self.placer else None
+            if on_start:
+                on_start()
+
+            if placement:
+                record.command = placement.wrap(command)
+                record.cpu, record.core, record.node = (placement.cpu,
+                                                        placement.core,
+                                                        placement.node)
+                record.placement = placement.method
+                record.shared_core = placement.shared_core
+
+            record.started_at = time.time()
+            started = time.monotonic()
+            process = subprocess.Popen(record.command, **kwargs)
+            try:
+                if placement:
+                    placement.apply(process.pid)
+                if job:
+                    job.pid = process.pid
+                if on_spawn:
+                    on_spawn(process.pid)
+
+                # wait4 reports the resources of the process (and of the
+                # children it waited for), even one shorter than a sample
+                _, status, usage = os.wait4(process.pid, 0)
+                record.returncode = process.returncode = os.waitstatus_to_exitcode(status)
+            except BaseException:
+                # The process would run on unaccounted, outside admission
+                if process.returncode is None:
+                    process.kill()
+                    os.wait4(process.pid, 0)
+                    process.returncode = -signal.SIGKILL
+                raise
+            record.wall_seconds = time.monotonic() - started
+            record.account(usage)
+            if job:
+                job.peak = max(job.peak, record.peak_rss)
+                record.peak_rss = job.peak
+        finally:
+            if placement:
+                self.placer.release(placement)
+            if job:
+                self.admission.release(job)
+
+        self.write(record, record_path)
+
+        if check and record.returncode != 0:
+            raise subprocess.CalledProcessError(record.returncode, command)
+        return record
+
+    def write(self, record: RunRecord, record_path: Optional[str]) -> None:
+        if record_path:
+            with open(record_path, 'w') as file:
+                json.dump(record.to_dict(), file, indent=4)
+        if self.journal_path:
+            with self.lock:
+                with open(self.journal_path, 'a') as file:
+                    file.write(json.dumps(record.to_dict()) + '\n')
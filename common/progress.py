@@ -0,0 +1,249 @@
+import os
+import re
+import json
+import time
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Pattern
+
+
+# Progress lines of each simulator, the first group being the number of
+# instructions simulated so far
+CHAMPSIM_PROGRESS = re.compile(r"Heartbeat CPU 0 instructions: (\d+)")
+GEM5_PROGRESS = re.compile(r"^simInsts\s+(\d+)", re.MULTILINE)
+SCARAB_PROGRESS = re.compile(r"\{\s*(\d+)\s*/\s*\d+\s*\}")
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '?'
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+@dataclass
+class RunProgress:
+    """
+    Progress of one simulation.
+
+    Attributes:
+        name (str): Name of the run.
+        state (str): queued, running, done or failed.
+        target (Optional[int]): Instructions the run simulates, if known.
+        output_path (Optional[str]): File the progress lines are read from.
+        instructions (int): Instructions simulated so far.
+        started_at (Optional[float]): Start time (seconds since the epoch).
+        finished_at (Optional[float]): End time (seconds since the epoch).
+        progressed_at (Optional[float]): Last time instructions increased.
+        kips (Optional[float]): Simulated thousands of instructions per second.
+        eta (Optional[float]): Seconds left, from kips and target.
+        stalled (bool): True if no progress was seen for stall_after seconds.
+    """
+    name: str
+    state: str = 'queued'
+    target: Optional[int] = None
+    output_path: Optional[str] = None
+    instructions: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progressed_at: Optional[float] = None
+    kips: Optional[float] = None
+    eta: Optional[float] = None
+    stalled: bool = False
+
+
+class ProgressTracker:
+    """
+    Live progress of a sweep, read from the output of the simulators.
+
+    Every interval, the new lines written by each running simulation are
+    matched against its progress pattern (ChampSim heartbeats, gem5
+    periodic statistics, Scarab heartbeats) to get the instructions it
+    simulated, hence its speed in KIPS and, with the number of
+    instructions it simulates, its remaining time. The remaining time of
+    the sweep is the work left (running and queued runs) over the
+    aggregate speed. A run whose instruction count did not move for
+    stall_after seconds is reported as stalled, i.e. probably hung rather
+    than slow. The status is printed and written as JSON to status_path.
+
+    Attributes:
+        status_path (str): JSON status file, rewritten every interval.
+        interval (float): Seconds between two updates.
+        stall_after (float): Seconds without progress before a run is
+            reported as stalled.
+        view (bool): Print the status in the terminal.
+        runs (Dict[str, RunProgress]): Every run of the sweep.
+    """
+
+    def __init__(
+        self,
+        status_path: str,
+        interval: float = 30.0,
+        stall_after: float = 900.0,
+        view: bool = True,
+    ):
+        self.status_path = status_path
+        self.interval = interval
+        self.stall_after = stall_after
+        self.view = view
+        self.runs: Dict[str, RunProgress] = {}
+
+        self.lock = threading.Lock()
+        self.patterns: Dict[str, Pattern] = {}
+        self.offsets: Dict[str, int] = {}
+        self.started_at = time.time()
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def add(self, name: str, target: Optional[int] = None) -> None:
+        """Count a queued run, simulating target instructions."""
+        with self.lock:
+            self.runs[name] = RunProgress(name=name, target=target)
+
+    def begin(self, name: str, output_path: str, pattern: Pattern) -> None:
+        """A run started, writing its progress lines to output_path."""
+        with self.lock:
+            run = self.runs.setdefault(name, RunProgress(name=name))
+            run.state = 'running'
+            run.output_path = output_path
+            run.instructions = 0
+            run.started_at = run.progressed_at = time.time()
+            self.patterns[name] = pattern
+            self.offsets[name] = 0
+
+    def end(self, name: str, ok: bool = True) -> None:
+        """A run finished, successfully or not."""
+        with self.lock:
+            run = self.runs.get(name)
+            if run is None:
+                return
+            if run.state == 'running':
+                self.read(run)
+            run.state = 'done' if ok else 'failed'
+            run.finished_at = time.time()
+            run.eta = 0.0 if ok else None
+            run.stalled = False
+            self.patterns.pop(name, None)
+            self.offsets.pop(name, None)
+
+    def read(self, run: RunProgress) -> None:
+        """Read the lines appended to the output of a running simulation."""
+        offset = self.offsets[run.name]
+        try:
+            with open(run.output_path, 'rb') as file:
+                # The simulator truncated the file when it started
+                if os.fstat(file.fileno()).st_size < offset:
+                    offset = 0
+                file.seek(offset)
+                data = file.read()
+        except OSError:
+            return
+
+        # Keep an incomplete last line for the next read
+        complete = data.rfind(b'\n') + 1
+        self.offsets[run.name] = offset + complete
+        text = data[:complete].decode(errors='replace')
+
+        matches = self.patterns[run.name].findall(text)
+        if matches and int(matches[-1]) > run.instructions:
+            run.instructions = int(matches[-1])
+            run.progressed_at = time.time()
+
+    def update(self) -> Dict:
+        """Refresh every running simulation and return the sweep status."""
+        now = time.time()
+        with self.lock:
+            for run in self.runs.values():
+                if run.state != 'running':
+                    continue
+                self.read(run)
+                elapsed = (run.progressed_at or now) - run.started_at
+                run.kips = (run.instructions / elapsed / 1000
+                            if run.instructions and elapsed > 0 else None)
+                run.eta = (max(run.target - run.instructions, 0) / (run.kips * 1000)
+                           if run.kips and run.target else None)
+                run.stalled = now - run.progressed_at > self.stall_after
+
+            states: Dict[str, int] = {}
+            for run in self.runs.values():
+                states[run.state] = states.get(run.state, 0) + 1
+
+            running = [run for run in self.runs.values() if run.state == 'running']
+            throughput = sum(run.kips or 0.0 for run in running)
+
+            # Runs of unknown length are as long as the finished ones
+            finished = [run.instructions for run in self.runs.values()
+                        if run.state == 'done' and run.instructions]
+            typical = sum(finished) / len(finished) if finished else None
+            remaining = 0.0
+            for run in self.runs.values():
+                if run.state not in ('queued', 'running'):
+                    continue
+                target = run.target or typical
+                if target is None:
+                    remaining = None
+                    break
+                remaining += max(target - run.instructions, 0)
+            eta = (remaining / (throughput * 1000)
+                   if remaining is not None and throughput else None)
+
+            return {
+                'updated_at': now,
+                'elapsed': now - self.started_at,
+                'runs': len(self.runs),
+                'states': states,
+                'stalled': sum(run.stalled for run in running),
+                'kips': throughput,
+                'eta': eta,
+                'running': [asdict(run) for run in running],
+            }
+
+    def write(self, status: Dict) -> None:
+        temp_path = f"{self.status_path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(status, file, indent=4)
+        os.replace(temp_path, self.status_path)
+
+    def render(self, status: Dict) -> str:
+        states = status['states']
+        lines = [
+            f"[PROGRESS] {states.get('done', 0)}/{status['runs']} done, "
+            f"{states.get('failed', 0)} failed, {states.get('running', 0)} running, "
+            f"{states.get('queued', 0)} queued | {status['kips']:.0f} KIPS | "
+            f"ETA {format_duration(status['eta'])}"
+        ]
+        for run in status['running']:
+            percent = (f"{100 * run['instructions'] / run['target']:3.0f}%"
+                       if run['target'] else '  ?%')
+            kips = f"{run['kips']:.0f} KIPS" if run['kips'] else '? KIPS'
+            flag = ' STALLED' if run['stalled'] else ''
+            lines.append(f"  {run['name']} {percent} {kips} "
+                         f"ETA {format_duration(run['eta'])}{flag}")
+        return '\n'.join(lines)
+
+    def report(self) -> None:
+        status = self.update()
+        self.write(status)
+        if self.view and status['running']:
+            print(self.render(status))
+
+    def follow(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.report()
+
+    def start(self) -> None:
+        """Report the progress every interval until stop()."""
+        self.started_at = time.time()
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.follow, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+        self.report()
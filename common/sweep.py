@@ -0,0 +1,282 @@
+"""
+Declarative sweeps shared by the ChampSim, gem5 and Scarab runners.
+
+A sweep specification is a JSON (or, with PyYAML installed, YAML) file:
+
+    {
+        "axes": {
+            "policy": ["lru", "hawkeye", "ship"],
+            "prefetcher": ["no", "next_line"],
+            "branch": ["bimodal"],
+            "LLC.sets": [1024, 2048, 4096],
+            "LLC.ways": [8, 16]
+        },
+        "zip": [
+            {"L1I": [[64, 8, 4], [64, 8, 4]],
+             "L1D": [[64, 8, 4], [64, 12, 5]],
+             "L2": [[512, 8, 8], [1024, 8, 10]],
+             "LLC": [{"latency": 20}, {"latency": 22}]}
+        ],
+        "exclude": [{"policy": "hawkeye", "prefetcher": "no"}],
+        "sample": {"method": "lhs", "count": 24, "seed": 1}
+    }
+
+Every entry of axes is an independent axis; every group of zip is a
+single axis whose lists advance together (they must have the same
+length). The sweep is the cross product of all the axes, without the
+points matching an exclusion (every key of the exclusion equal, or in
+the list given for it). sample, if given, keeps count points of that
+space, drawn uniformly ("random") or by Latin hypercube ("lhs"): each
+axis is cut into count strata and every stratum is used once, so even a
+few runs cover every axis evenly.
+
+Cache levels (L1I, L1D, L2, LLC) are [sets, ways, latency] lists or
+dictionaries, and single fields can be swept as LEVEL.field axes, which
+override the level value.
+"""
+import os
+import json
+import random
+import itertools
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+CACHE_LEVELS = ('L1I', 'L1D', 'L2', 'LLC')
+CACHE_FIELDS = ('sets', 'ways', 'latency')
+
+
+class SweepSpecError(ValueError):
+    """Raised for an invalid sweep specification."""
+
+
+@dataclass
+class Axis:
+    """
+    One dimension of the sweep.
+
+    Attributes:
+        names (List[str]): Parameters set by the axis, several if zipped.
+        levels (List[Tuple]): Values of the parameters at each level.
+    """
+    names: List[str]
+    levels: List[Tuple]
+
+
+def lookup(point: Dict[str, Any], key: str) -> Any:
+    """Value of key in a point, LEVEL.field also read inside LEVEL."""
+    if key in point:
+        return point[key]
+    level, _, name = key.partition('.')
+    value = point.get(level)
+    if isinstance(value, dict):
+        return value.get(name)
+    if isinstance(value, (list, tuple)) and name in CACHE_FIELDS:
+        index = CACHE_FIELDS.index(name)
+        return value[index] if index < len(value) else None
+    return None
+
+
+def cache_fields(point: Dict[str, Any], level: str) -> Dict[str, Any]:
+    """Fields of a cache level in a point, LEVEL.field axes applied."""
+    value = point.get(level)
+    if isinstance(value, (list, tuple)):
+        fields = dict(zip(CACHE_FIELDS, value))
+    else:
+        fields = dict(value or {})
+    for key, field_value in point.items():
+        if key.startswith(level + '.'):
+            fields[key[len(level) + 1:]] = field_value
+    return fields
+
+
+class SweepSpec:
+    """
+    Points of a sweep, from cartesian and zipped axes, exclusions and an
+    optional sampling strategy.
+
+    Attributes:
+        axes (List[Axis]): Dimensions of the sweep.
+        exclude (List[Dict]): Partial points removed from the sweep.
+        sample (Optional[Dict]): method (random or lhs), count and seed.
+    """
+
+    def __init__(
+        self,
+        axes: List[Axis],
+        exclude: Optional[List[Dict]] = None,
+        sample: Optional[Dict] = None,
+    ):
+        self.axes = axes
+        self.exclude = exclude or []
+        self.sample = sample
+
+        if sample is not None:
+            if sample.get('method') not in ('random', 'lhs'):
+                raise SweepSpecError(f"Unknown sampling method: {sample.get('method')}")
+            if int(sample.get('count', 0)) < 1:
+                raise SweepSpecError("Sampling needs a positive count")
+
+    @classmethod
+    def from_dict(cls, spec: Dict) -> 'SweepSpec':
+        axes = []
+        for name, values in (spec.get('axes') or {}).items():
+            if not isinstance(values, list) or not values:
+                raise SweepSpecError(f"Axis {name} needs a non-empty list")
+            axes.append(Axis([name], [(value,) for value in values]))
+
+        for group in spec.get('zip') or []:
+            lengths = {len(values) for values in group.values()}
+            if len(lengths) != 1 or 0 in lengths:
+                raise SweepSpecError(
+                    f"Zipped axes {', '.join(group)} need non-empty lists "
+                    f"of the same length"
+                )
+            axes.append(Axis(list(group), list(zip(*group.values()))))
+
+        names = [name for axis in axes for name in axis.names]
+        duplicates = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise SweepSpecError(f"Axes set more than once: {', '.join(sorted(duplicates))}")
+
+        return cls(axes, spec.get('exclude'), spec.get('sample'))
+
+    @classmethod
+    def load(cls, path: str) -> 'SweepSpec':
+        """Read a JSON, or YAML, sweep specification."""
+        with open(path, 'r') as file:
+            if os.path.splitext(path)[1] in ('.yaml', '.yml'):
+                if yaml is None:
+                    raise SweepSpecError("PyYAML is needed for YAML sweep files")
+                spec = yaml.safe_load(file)
+            else:
+                spec = json.load(file)
+        return cls.from_dict(spec or {})
+
+    def size(self) -> int:
+        """Number of points of the full cross product."""
+        size = 1
+        for axis in self.axes:
+            size *= len(axis.levels)
+        return size
+
+    def point(self, levels: Sequence[int]) -> Dict[str, Any]:
+        point = {}
+        for axis, level in zip(self.axes, levels):
+            point.update(zip(axis.names, axis.levels[level]))
+        return point
+
+    def excluded(self, point: Dict[str, Any]) -> bool:
+        for rule in self.exclude:
+            matches = True
+            for key, expected in rule.items():
+                value = lookup(point, key)
+                if isinstance(expected, list) and not isinstance(value, list):
+                    matches = value in expected
+                else:
+                    matches = value == expected
+                if not matches:
+                    break
+            if matches:
+                return True
+        return False
+
+    def decode(self, index: int) -> List[int]:
+        """Level of every axis of the index-th point of the cross product."""
+        levels = []
+        for axis in reversed(self.axes):
+            index, level = divmod(index, len(axis.levels))
+            levels.append(level)
+        return list(reversed(levels))
+
+    def grid(self) -> Iterator[List[int]]:
+        return (list(levels) for levels in
+                itertools.product(*(range(len(axis.levels)) for axis in self.axes)))
+
+    def random_levels(self, rng: random.Random) -> Iterator[List[int]]:
+        """Distinct points drawn uniformly, until the space is exhausted."""
+        size = self.size()
+        seen = set()
+        while len(seen) < size:
+            index = rng.randrange(size)
+            if index in seen:
+                continue
+            seen.add(index)
+            yield self.decode(index)
+
+    def lhs_levels(self, count: int, rng: random.Random) -> Iterator[List[int]]:
+        """
+        Latin hypercube over the axes: the levels of each axis are cut into
+        count strata, visited once each in a random order. Excluded points
+        are dropped afterwards, so fewer than count points may remain.
+        """
+        columns = []
+        for axis in self.axes:
+            strata = list(range(count))
+            rng.shuffle(strata)
+            columns.append([int((stratum + rng.random()) * len(axis.levels) / count)
+                            for stratum in strata])
+        return (list(levels) for levels in zip(*columns))
+
+    def points(self) -> List[Dict[str, Any]]:
+        """Every point of the sweep, in a reproducible order."""
+        if self.sample is None:
+            candidates = self.grid()
+            count = None
+        else:
+            count = int(self.sample['count'])
+            rng = random.Random(self.sample.get('seed'))
+            if self.sample['method'] == 'random':
+                candidates = self.random_levels(rng)
+            else:
+                candidates = self.lhs_levels(count, rng)
+
+        points = []
+        seen = set()
+        for levels in candidates:
+            if count is not None and len(points) >= count:
+                break
+            # A Latin hypercube of more points than levels repeats some
+            if tuple(levels) in seen:
+                continue
+            seen.add(tuple(levels))
+            point = self.point(levels)
+            if not self.excluded(point):
+                points.append(point)
+        return points
+
+    def samples(
+        self,
+        factory: Callable[..., Any],
+        levels: Sequence[str] = CACHE_LEVELS,
+    ) -> List[Tuple[Tuple[Any, ...], List[Dict[str, Any]]]]:
+        """
+        Group the points by cache configuration, in the order they first
+        appear: the configuration of every level, built by factory from
+        its fields (sets, ways, latency), with the points (without the
+        cache fields) to run on it.
+        """
+        groups: Dict[str, Tuple[Tuple[Any, ...], List[Dict[str, Any]]]] = {}
+        for point in self.points():
+            fields = [cache_fields(point, level) for level in levels]
+            rest = {key: value for key, value in point.items()
+                    if key.partition('.')[0] not in levels}
+
+            key = json.dumps(fields, sort_keys=True)
+            if key not in groups:
+                caches = []
+                for level, level_fields in zip(levels, fields):
+                    try:
+                        caches.append(factory(**level_fields))
+                    except TypeError as e:
+                        raise SweepSpecError(
+                            f"Invalid {level} configuration {level_fields}: {e}"
+                        ) from e
+                groups[key] = (tuple(caches), [])
+            groups[key][1].append(rest)
+        return list(groups.values())
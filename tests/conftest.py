@@ -0,0 +1,9 @@
+import os
+import sys
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# The runners import their sibling modules (and common) as top-level modules
+for path in (REPO, os.path.join(REPO, 'testsOldChampSim')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
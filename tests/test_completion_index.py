@@ -0,0 +1,36 @@
+from completion_index import CompletionIndex
+
+
+def test_marked_runs_persist(tmp_path):
+    index = CompletionIndex(str(tmp_path))
+    assert not index.is_done('Sample1', 'lru', 'no', 'bimodal', 'mcf')
+
+    index.mark_done('Sample1', 'lru', 'no', 'bimodal', 'mcf', 'out_DONE.txt')
+    assert index.is_done('Sample1', 'lru', 'no', 'bimodal', 'mcf')
+    assert not index.is_done('Sample2', 'lru', 'no', 'bimodal', 'mcf')
+
+    reopened = CompletionIndex(str(tmp_path))
+    assert reopened.is_done('Sample1', 'lru', 'no', 'bimodal', 'mcf')
+
+
+def test_none_matches_the_output_file_names(tmp_path):
+    index = CompletionIndex(str(tmp_path))
+    index.mark_done('Sample1', None, None, None, 'mcf', 'out_DONE.txt')
+    assert index.is_done('Sample1', 'None', 'None', 'None', 'mcf')
+
+
+def test_rebuilt_from_done_files(tmp_path):
+    sample = tmp_path / 'Sample1'
+    sample.mkdir()
+    (sample / 'mcf_pol:lru_bra:bimodal_pre:no_output_DONE.txt').write_text('')
+    (sample / 'lbm_pol:ship_bra:gshare_pre:None_output_DONE.txt').write_text('')
+    # Unfinished runs are not indexed
+    (sample / 'gcc_pol:lru_bra:bimodal_pre:no_output.txt').write_text('')
+    (tmp_path / 'results.db').write_text('')
+
+    index = CompletionIndex(str(tmp_path))
+
+    assert index.is_done('Sample1', 'lru', 'no', 'bimodal', 'mcf')
+    assert index.is_done('Sample1', 'ship', 'None', 'gshare', 'lbm')
+    assert not index.is_done('Sample1', 'lru', 'no', 'bimodal', 'gcc')
+    assert len(index.done) == 2
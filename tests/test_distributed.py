@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import threading
+
+import pytest
+
+from common.distributed import Coordinator, RemoteLauncher, Worker
+from common.process import Launcher
+
+
+@pytest.fixture
+def coordinator():
+    coordinator = Coordinator('127.0.0.1', 0, lease=60.0)
+    coordinator.port = coordinator.server.server_address[1]
+    coordinator.start()
+    yield coordinator
+    coordinator.stop(grace=5.0)
+
+
+def test_binds_loopback_by_default():
+    coordinator = Coordinator(port=0)
+    try:
+        assert coordinator.server.server_address[0] == '127.0.0.1'
+    finally:
+        coordinator.server.server_close()
+
+
+def test_worker_runs_remote_job(coordinator, tmp_path):
+    worker = Worker(f"http://127.0.0.1:{coordinator.port}", 1, Launcher())
+    thread = threading.Thread(target=worker.serve, daemon=True)
+    thread.start()
+
+    output = tmp_path / 'out.txt'
+    calls = []
+    with open(output, 'w') as stdout:
+        record = RemoteLauncher(coordinator).run(
+            'key', [sys.executable, '-c', "print('hello')"], name='run',
+            on_start=lambda: calls.append('start'),
+            on_spawn=lambda pid: calls.append(pid),
+            stdout=stdout
+        )
+
+    assert record.returncode == 0
+    assert calls[0] == 'start'
+    assert len(calls) == 2 and isinstance(calls[1], int)
+    assert not os.path.islink(output)
+    assert output.read_text() == 'hello\n'
+    assert not os.path.exists(f"{output}.lease1")
+
+
+def test_stale_lease_is_fenced(coordinator, tmp_path):
+    output = str(tmp_path / 'out.txt')
+    job = coordinator.submit({'key': 'key', 'name': 'run', 'command': ['true'],
+                              'cwd': str(tmp_path), 'stdout': output,
+                              'stderr': 'stdout'})
+
+    first = json.loads(coordinator.pull('worker-a', wait=0))
+    assert coordinator.started(first['id'], first['lease'])
+    with open(f"{output}.lease{first['lease']}", 'w') as file:
+        file.write('stale output')
+
+    # worker-a goes silent, its lease expires and the job is handed out again
+    with coordinator.condition:
+        job.lease_until = 0
+        job.state = 'queued'
+        job.worker = None
+        coordinator.queue.appendleft(job)
+    second = json.loads(coordinator.pull('worker-b', wait=0))
+    assert second['lease'] != first['lease']
+    assert coordinator.started(second['id'], second['lease'])
+    with open(f"{output}.lease{second['lease']}", 'w') as file:
+        file.write('current output')
+
+    # The first lease is told to stop and cannot report anything
+    assert coordinator.heartbeat('worker-a', [[first['id'], first['lease']]]) == [first['id']]
+    assert coordinator.heartbeat('worker-b', [[second['id'], second['lease']]]) == []
+    assert not coordinator.started(first['id'], first['lease'])
+    assert not coordinator.spawned(first['id'], first['lease'], 1234)
+    assert coordinator.spawned(second['id'], second['lease'], 1234)
+    assert not coordinator.complete(first['id'], first['lease'], json.dumps({}))
+    assert not job.done.is_set()
+
+    assert coordinator.complete(second['id'], second['lease'],
+                                json.dumps({'key': 'key', 'command': ['true']}))
+    assert job.done.is_set()
+    with open(output) as file:
+        assert file.read() == 'current output'
+
+    # Reports of the first lease after the job finished are ignored as well
+    assert not coordinator.fail(first['id'], first['lease'], 'late')
@@ -0,0 +1,104 @@
+import lzma
+
+import pytest
+
+from interval_parallel import IntervalPlanner, IntervalPolicy, progress_points, stitch
+from simpoints import TraceSlice
+
+WARMUP = 50
+HEARTBEAT = 10
+
+
+def output(instructions, cpi, accuracy, misses):
+    """ChampSim output of a part: warmup, heartbeats and the ROI statistics."""
+    lines = [f"Warmup finished CPU 0 instructions: {WARMUP} cycles: {WARMUP}"]
+    cycles = 0.0
+    for done in range(1, instructions + 1):
+        cycles += cpi(done)
+        if done % HEARTBEAT == 0:
+            lines.append(f"Heartbeat CPU 0 instructions: {WARMUP + done} "
+                         f"cycles: {WARMUP + round(cycles)}")
+    lines += [
+        "Region of Interest Statistics",
+        f"CPU 0 cumulative IPC: {instructions / cycles:.4f} "
+        f"instructions: {instructions} cycles: {round(cycles)}",
+        f"CPU 0 Branch Prediction Accuracy: {accuracy}% MPKI: 1",
+        f"cpu0_LLC TOTAL     ACCESS:  100  HIT:  {100 - misses}  MISS:  {misses}",
+    ]
+    return '\n'.join(lines)
+
+
+def parts(own, overlap):
+    return [TraceSlice(name='t_part0', trace='t', path='t', start=0, warmup=WARMUP,
+                       instructions=own + overlap, weight=0.5),
+            TraceSlice(name='t_part1', trace='t', path='t_part1', start=own,
+                       warmup=WARMUP, instructions=own, weight=0.5)]
+
+
+def test_stitched_without_overlaps_with_the_warmup_error():
+    # Warm, every instruction takes a cycle; the second part runs its
+    # first 20 instructions 20% slower, right after its warmup
+    contents = [output(120, lambda i: 1.0, 90, 30),
+                output(100, lambda i: 1.2 if i <= 20 else 1.0, 80, 10)]
+
+    stats = stitch(parts(100, 20), contents, overlap=20)
+
+    assert stats['instructions'] == 200
+    assert stats['cycles'] == 204
+    assert stats['ipc'] == pytest.approx(200 / 204)
+    assert stats['boundary_errors'] == [pytest.approx(0.2)]
+    assert stats['warmup_error'] == pytest.approx(4 / 204)
+    assert stats['branch_accuracy'] == pytest.approx(85)
+    # Cache statistics include the overlap
+    assert stats['levels']['LLC']['miss'] == 40
+    assert stats['levels']['LLC']['mpki'] == pytest.approx(40 * 1000 / 220)
+
+
+def test_stitched_mpki_matches_a_single_run():
+    # One LLC miss every 10 instructions, warm or cold
+    single = stitch(parts(200, 0)[:1], [output(200, lambda i: 1.0, 90, 20)], overlap=0)
+    contents = [output(120, lambda i: 1.0, 90, 12),
+                output(100, lambda i: 1.0, 90, 10)]
+
+    stats = stitch(parts(100, 20), contents, overlap=20)
+
+    assert single['levels']['LLC']['mpki'] == pytest.approx(100)
+    assert stats['levels']['LLC']['mpki'] == pytest.approx(single['levels']['LLC']['mpki'])
+
+
+def test_unfinished_part_cannot_be_stitched():
+    contents = [output(120, lambda i: 1.0, 90, 30), "Warmup finished"]
+    assert stitch(parts(100, 20), contents, overlap=20) is None
+
+
+def test_progress_points_stop_at_the_end_of_the_roi():
+    points = progress_points(output(30, lambda i: 2.0, 90, 1))
+    assert points == [(50, 50), (60, 70), (70, 90), (80, 110)]
+
+
+@pytest.mark.parametrize('settings', [{'parts': 0}, {'overlap': -1}, {'warmup': -1}])
+def test_invalid_policy_rejected(settings):
+    with pytest.raises(ValueError):
+        IntervalPolicy(**settings)
+
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_traces_too_short_run_whole(tmp_path, compressed):
+    data = bytes(range(64)) * 1000
+    if compressed:
+        trace = tmp_path / 't.champsimtrace.xz'
+        with lzma.open(trace, 'wb') as file:
+            file.write(data)
+    else:
+        trace = tmp_path / 't.champsimtrace'
+        trace.write_bytes(data)
+    planner = IntervalPlanner(str(tmp_path / 'intervals'),
+                              IntervalPolicy(parts=4, warmup=50, overlap=20))
+
+    split = planner.plan([('t', str(trace))], 100, 800)
+    assert [part.instructions for part in split] == [220, 220, 220, 200]
+    with lzma.open(split[1].path) as file:
+        assert file.read() == data[(300 - 50) * 64:(300 + 200 + 20) * 64]
+
+    whole = planner.plan([('u', str(trace))], 100, 1000)
+    assert len(whole) == 1 and whole[0].path == str(trace)
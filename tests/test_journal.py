@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from common.journal import SweepJournal, file_hash
+
+
+def lines(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_last_state_of_every_job_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = SweepJournal(path)
+    journal.record('a', 'queued')
+    journal.record('a', 'running', binary_hash='abc')
+    journal.record('a', 'done')
+    journal.record('b', 'failed')
+    journal.close()
+
+    journal = SweepJournal(path)
+    assert journal.is_done('a')
+    assert journal.get('a').binary_hash == 'abc'
+    assert journal.state('b') == 'failed'
+    assert journal.state('c') is None
+    assert journal.interrupted == []
+    # Compacted to one line per job
+    assert [entry['job'] for entry in lines(path)] == ['a', 'b']
+    journal.close()
+
+
+def test_jobs_in_flight_are_requeued(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = SweepJournal(path)
+    journal.record('build', 'building')
+    journal.record('run', 'running')
+    journal.record('done', 'done')
+    # The sweep is killed without closing the journal
+    journal.file.close()
+
+    journal = SweepJournal(path)
+    assert sorted(journal.interrupted) == ['build', 'run']
+    assert journal.state('build') == 'queued'
+    assert journal.state('run') == 'queued'
+    assert journal.is_done('done')
+    assert {entry['job']: entry['state'] for entry in lines(path)} == {
+        'build': 'queued', 'run': 'queued', 'done': 'done'}
+    journal.close()
+
+
+def test_torn_line_is_ignored(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = SweepJournal(str(path))
+    journal.record('a', 'running')
+    journal.record('a', 'done')
+    journal.close()
+    with open(path, 'a') as file:
+        file.write('{"job": "a", "state": "fail')
+
+    journal = SweepJournal(str(path))
+    assert journal.is_done('a')
+    assert journal.interrupted == []
+    journal.close()
+
+
+def test_unknown_state_rejected(tmp_path):
+    journal = SweepJournal(str(tmp_path / 'journal.jsonl'))
+    with pytest.raises(ValueError):
+        journal.record('a', 'finished')
+    assert journal.get('a') is None
+    journal.close()
+
+
+def test_file_hash(tmp_path):
+    path = tmp_path / 'binary'
+    path.write_bytes(b'champsim')
+    assert file_hash(str(path)) == file_hash(str(path))
+    assert len(file_hash(str(path))) == 64
+    assert file_hash(str(tmp_path / 'missing')) is None
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+from common.admission import MemoryAdmission
+from common.process import Launcher
+
+
+class FailingPlacer:
+    def acquire(self):
+        raise OSError('no core left')
+
+
+def test_process_killed_when_on_spawn_fails(tmp_path):
+    pids = []
+
+    def on_spawn(pid):
+        pids.append(pid)
+        raise RuntimeError('on_spawn failed')
+
+    with pytest.raises(RuntimeError):
+        Launcher().run('key', [sys.executable, '-c', 'import time; time.sleep(60)'],
+                       on_spawn=on_spawn)
+
+    assert len(pids) == 1
+    # Killed and reaped: the pid is no longer a child of this process
+    with pytest.raises(ChildProcessError):
+        os.waitpid(pids[0], os.WNOHANG)
+
+
+def test_record_of_a_run(tmp_path):
+    record_path = tmp_path / 'record.json'
+    record = Launcher().run('key', [sys.executable, '-c', 'raise SystemExit(3)'],
+                            record_path=str(record_path))
+
+    assert record.returncode == 3
+    assert record.wall_seconds is not None
+    assert record_path.exists()
+
+
+def test_admission_released_when_placement_fails():
+    admission = MemoryAdmission(budget=1 << 30)
+    launcher = Launcher(admission=admission, placer=FailingPlacer())
+
+    with pytest.raises(OSError):
+        launcher.run('key', ['true'])
+
+    assert admission.running == []
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import DagScheduler
+
+
+def test_dependencies_run_first():
+    scheduler = DagScheduler({'build': 2, 'run': 2})
+    order = []
+    lock = threading.Lock()
+
+    def work(name):
+        def func():
+            with lock:
+                order.append(name)
+            return name
+        return func
+
+    build = scheduler.add('build', work('build'), 'build')
+    runs = [scheduler.add(f'run{i}', work(f'run{i}'), 'run', deps=[build])
+            for i in range(3)]
+    parse = scheduler.add('parse', work('parse'), 'run', deps=runs)
+    scheduler.run()
+
+    assert order[0] == 'build' and order[-1] == 'parse'
+    assert all(task.state == 'done' for task in scheduler.tasks)
+    assert parse.result == 'parse'
+    assert [task.name for task in scheduler.critical_path()][0] == 'build'
+
+
+def test_failure_skips_dependents_only():
+    scheduler = DagScheduler({'build': 1, 'run': 1})
+
+    def fail():
+        raise RuntimeError('compilation failed')
+
+    broken = scheduler.add('broken', fail, 'build')
+    good = scheduler.add('good', lambda: 1, 'build')
+    skipped = scheduler.add('skipped', lambda: 1, 'run', deps=[broken])
+    ran = scheduler.add('ran', lambda: 1, 'run', deps=[good])
+    scheduler.run()
+
+    assert broken.state == 'failed'
+    assert isinstance(broken.error, RuntimeError)
+    assert skipped.state == 'skipped'
+    assert good.state == 'done' and ran.state == 'done'
+    # A task added on a failed dependency is skipped right away
+    assert scheduler.add('late', lambda: 1, 'run', deps=[broken]).state == 'skipped'
+
+
+def test_limits_and_priorities():
+    scheduler = DagScheduler({'run': 1})
+    running = []
+    peak = []
+    order = []
+    lock = threading.Lock()
+
+    def work(name):
+        def func():
+            with lock:
+                running.append(name)
+                peak.append(len(running))
+                order.append(name)
+            time.sleep(0.01)
+            with lock:
+                running.remove(name)
+        return func
+
+    # Added before run() starts, so they are all ready together
+    for priority in (1, 3, 2):
+        scheduler.add(f'p{priority}', work(f'p{priority}'), 'run', priority=priority)
+    scheduler.run()
+
+    assert max(peak) == 1
+    assert order == ['p3', 'p2', 'p1']
+
+
+def test_tasks_added_while_running():
+    scheduler = DagScheduler({'build': 1, 'run': 1})
+
+    def build():
+        scheduler.add('run', lambda: 'ran', 'run', deps=[scheduler.get('build')])
+
+    scheduler.add('build', build, 'build')
+    scheduler.run()
+
+    assert scheduler.get('run').state == 'done'
+    assert scheduler.get('run').result == 'ran'
+
+
+def test_invalid_tasks_rejected():
+    scheduler = DagScheduler({'run': 1})
+    scheduler.add('a', lambda: None, 'run')
+    with pytest.raises(ValueError):
+        scheduler.add('a', lambda: None, 'run')
+    with pytest.raises(ValueError):
+        scheduler.add('b', lambda: None, 'parse')
@@ -0,0 +1,37 @@
+import pytest
+
+from successive_halving import HalvingPolicy, geomean, rank
+
+
+def test_windows_grow_by_eta_up_to_full_length():
+    policy = HalvingPolicy(min_instructions=10, eta=3)
+    assert policy.windows(200) == [10, 30, 90, 200]
+    assert policy.windows(90) == [10, 30, 90]
+    assert policy.windows(5) == [5]
+
+
+def test_survivors():
+    policy = HalvingPolicy(eta=3, min_survivors=2)
+    assert policy.survivors(27) == 9
+    assert policy.survivors(10) == 4
+    assert policy.survivors(3) == 2
+    assert policy.survivors(1) == 1
+
+
+def test_rank_puts_failed_runs_last():
+    promoted, pruned = rank({'a': 1.2, 'b': None, 'c': 2.0, 'd': 0.5}, 2)
+    assert promoted == ['c', 'a']
+    assert pruned == ['d', 'b']
+
+
+def test_geomean():
+    assert geomean([1.0, 4.0]) == pytest.approx(2.0)
+    assert geomean([]) is None
+    assert geomean([1.0, None]) is None
+    assert geomean([1.0, 0.0]) is None
+
+
+@pytest.mark.parametrize('settings', [{'eta': 1}, {'min_instructions': 0}])
+def test_invalid_policy_rejected(settings):
+    with pytest.raises(ValueError):
+        HalvingPolicy(**settings)
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from common.sweep import SweepSpec, SweepSpecError, cache_fields, lookup
+
+
+def spec(**extra):
+    return SweepSpec.from_dict(dict({
+        'axes': {'policy': ['lru', 'ship'], 'LLC.ways': [8, 16]},
+        'zip': [{'L2': [[512, 8, 8], [1024, 8, 10]],
+                 'LLC': [[2048, 16, 20], [4096, 16, 22]]}],
+    }, **extra))
+
+
+def test_cross_product_of_axes_and_zipped_groups():
+    points = spec().points()
+
+    assert len(points) == spec().size() == 8
+    # Zipped lists advance together
+    assert {(tuple(point['L2']), tuple(point['LLC'])) for point in points} == {
+        ((512, 8, 8), (2048, 16, 20)), ((1024, 8, 10), (4096, 16, 22))}
+    assert points[0] == {'policy': 'lru', 'LLC.ways': 8,
+                         'L2': [512, 8, 8], 'LLC': [2048, 16, 20]}
+
+
+def test_exclusions():
+    points = spec(exclude=[{'policy': 'ship', 'LLC.ways': [8]},
+                           {'LLC.sets': 4096}]).points()
+
+    assert len(points) == 3
+    assert all(not (point['policy'] == 'ship' and point['LLC.ways'] == 8)
+               for point in points)
+    assert all(point['LLC'][0] == 2048 for point in points)
+
+
+def test_level_fields():
+    point = {'LLC': [2048, 16, 20], 'LLC.ways': 8, 'L2': {'sets': 512}}
+
+    assert lookup(point, 'LLC.sets') == 2048
+    assert lookup(point, 'LLC.ways') == 8
+    assert lookup(point, 'L2.sets') == 512
+    assert cache_fields(point, 'LLC') == {'sets': 2048, 'ways': 8, 'latency': 20}
+
+
+@pytest.mark.parametrize('method', ['random', 'lhs'])
+def test_sampling_is_reproducible(method):
+    sample = {'method': method, 'count': 4, 'seed': 7}
+    points = spec(sample=sample).points()
+
+    assert len(points) <= 4
+    assert points == spec(sample=dict(sample)).points()
+    assert len({json.dumps(point, sort_keys=True) for point in points}) == len(points)
+
+
+def test_random_sample_larger_than_the_space():
+    points = spec(sample={'method': 'random', 'count': 100, 'seed': 1}).points()
+    assert len(points) == 8
+
+
+def test_lhs_covers_every_level():
+    sweep = SweepSpec.from_dict({
+        'axes': {'a': list(range(4)), 'b': list(range(4)), 'c': list(range(4))},
+        'sample': {'method': 'lhs', 'count': 4, 'seed': 3},
+    })
+    points = sweep.points()
+
+    assert len(points) == 4
+    for axis in 'abc':
+        assert sorted(point[axis] for point in points) == [0, 1, 2, 3]
+
+
+def test_samples_grouped_by_cache_configuration():
+    groups = spec().samples(lambda sets, ways, latency: (sets, ways, latency),
+                            levels=('L2', 'LLC'))
+
+    assert len(groups) == 4
+    caches, runs = groups[0]
+    assert caches == ((512, 8, 8), (2048, 8, 20))
+    assert runs == [{'policy': 'lru'}, {'policy': 'ship'}]
+
+
+@pytest.mark.parametrize('bad', [
+    {'axes': {'policy': []}},
+    {'axes': {'policy': 'lru'}},
+    {'zip': [{'L1I': [[64, 8, 4]], 'L1D': []}]},
+    {'zip': [{'L1I': [[64, 8, 4]], 'L1D': [[64, 8, 4], [64, 12, 5]]}]},
+    {'axes': {'LLC': [[2048, 16, 20]]}, 'zip': [{'LLC': [[4096, 16, 20]]}]},
+    {'axes': {'policy': ['lru']}, 'sample': {'method': 'sobol', 'count': 2}},
+    {'axes': {'policy': ['lru']}, 'sample': {'method': 'lhs', 'count': 0}},
+])
+def test_invalid_specs_rejected(bad):
+    with pytest.raises(SweepSpecError):
+        SweepSpec.from_dict(bad)
+
+
+def test_load_json(tmp_path):
+    path = tmp_path / 'sweep.json'
+    path.write_text(json.dumps({'axes': {'policy': ['lru', 'ship']}}))
+    assert SweepSpec.load(str(path)).points() == [{'policy': 'lru'}, {'policy': 'ship'}]
@@ -0,0 +1,95 @@
+import lzma
+import os
+
+import pytest
+
+from trace_cache import TraceCache
+
+TRACE = bytes(range(64)) * 1024
+
+
+def write_trace(path, data=TRACE):
+    with lzma.open(path, 'wb') as file:
+        file.write(data)
+    return str(path)
+
+
+@pytest.fixture
+def traces(tmp_path):
+    folder = tmp_path / 'traces'
+    folder.mkdir()
+    return [write_trace(folder / f'{name}.champsimtrace.xz') for name in 'ab']
+
+
+def test_copy_shared_and_reference_counted(tmp_path, traces):
+    cache = TraceCache(str(tmp_path / 'cache'), quota=1 << 20)
+    first = cache.acquire(traces[0])
+    second = cache.acquire(traces[0])
+
+    assert first.entry is second.entry
+    assert first.path.startswith(str(tmp_path / 'cache'))
+    with open(first.path, 'rb') as file:
+        assert file.read() == TRACE
+    assert first.entry.refs == 2
+    assert cache.used == len(TRACE)
+
+    entry = first.entry
+    cache.release(first)
+    # Releasing a lease twice drops a single reference
+    cache.release(first)
+    assert entry.refs == 1
+    cache.release(second)
+    assert entry.refs == 0
+
+
+def test_uncompressed_trace_read_in_place(tmp_path):
+    path = tmp_path / 'a.champsimtrace'
+    path.write_bytes(TRACE)
+    cache = TraceCache(str(tmp_path / 'cache'), quota=1 << 20)
+
+    lease = cache.acquire(str(path))
+    assert lease.path == str(path) and lease.entry is None
+    cache.release(lease)
+
+
+def test_referenced_copies_are_not_evicted(tmp_path, traces):
+    cache = TraceCache(str(tmp_path / 'cache'), quota=len(TRACE))
+    first = cache.acquire(traces[0])
+
+    # No room while the first copy is in use: the .xz trace is read
+    second = cache.acquire(traces[1])
+    assert second.path == traces[1] and second.entry is None
+    assert os.path.exists(first.path)
+
+    cache.release(first)
+    third = cache.acquire(traces[1])
+    assert third.entry is not None
+    assert not os.path.exists(first.path)
+    assert cache.used == len(TRACE)
+    cache.release(third)
+
+
+def test_failed_decompression_falls_back(tmp_path, traces):
+    corrupt = tmp_path / 'traces' / 'c.champsimtrace.xz'
+    corrupt.write_bytes((tmp_path / 'traces' / 'a.champsimtrace.xz').read_bytes()[:-100])
+    cache = TraceCache(str(tmp_path / 'cache'), quota=1 << 20)
+
+    lease = cache.acquire(str(corrupt))
+
+    assert lease.path == str(corrupt) and lease.entry is None
+    assert cache.entries == {}
+    assert cache.used == 0
+    assert os.listdir(tmp_path / 'cache') == []
+
+
+def test_copies_of_a_previous_sweep_adopted(tmp_path, traces):
+    cache = TraceCache(str(tmp_path / 'cache'), quota=1 << 20)
+    cache.release(cache.acquire(traces[0]))
+    (tmp_path / 'cache' / 'partial.tmp').write_bytes(b'x')
+
+    cache = TraceCache(str(tmp_path / 'cache'), quota=1 << 20)
+    assert cache.used == len(TRACE)
+    assert not (tmp_path / 'cache' / 'partial.tmp').exists()
+    lease = cache.acquire(traces[0])
+    assert lease.entry is not None and lease.entry.refs == 1
+    cache.release(lease)
@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from trace_downloader import DownloadError, TraceDownloader
+
+PAYLOAD = bytes(range(256)) * 4096
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD at every path, honouring 'Range: bytes=N-'."""
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def send_payload(self, body: bool) -> None:
+        self.requests_seen.append((self.command, self.headers.get('Range')))
+        start = 0
+        header = self.headers.get('Range')
+        if header:
+            start = int(header[len('bytes='):].rstrip('-'))
+            if start >= len(PAYLOAD):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(PAYLOAD)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range',
+                             f'bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(PAYLOAD) - start))
+        self.end_headers()
+        if body:
+            self.wfile.write(PAYLOAD[start:])
+
+    def do_GET(self):
+        self.send_payload(True)
+
+    def do_HEAD(self):
+        self.send_payload(False)
+
+
+@pytest.fixture
+def server():
+    RangeHandler.requests_seen = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def write_manifest(path, name, payload):
+    with open(path, 'w') as file:
+        json.dump({name: {'size': len(payload),
+                          'sha256': hashlib.sha256(payload).hexdigest()}}, file)
+    return str(path)
+
+
+def read(path):
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def test_download_verified_against_manifest(server, tmp_path):
+    manifest = write_manifest(tmp_path / 'manifest.json', 'a.xz', PAYLOAD)
+    downloader = TraceDownloader(str(tmp_path / 'traces'), manifest=manifest)
+
+    paths = downloader.download_all([f"{server}/a.xz"])
+
+    assert paths == [str(tmp_path / 'traces' / 'a.xz')]
+    assert read(paths[0]) == PAYLOAD
+
+
+def test_resume_from_part(server, tmp_path):
+    trace_dir = tmp_path / 'traces'
+    trace_dir.mkdir()
+    (trace_dir / 'a.xz.part').write_bytes(PAYLOAD[:1000])
+    downloader = TraceDownloader(str(trace_dir))
+
+    path = downloader.download(f"{server}/a.xz")
+
+    assert read(path) == PAYLOAD
+    assert ('GET', 'bytes=1000-') in RangeHandler.requests_seen
+    assert not os.path.exists(f"{path}.part")
+
+
+def test_complete_part_accepted_on_416(server, tmp_path):
+    trace_dir = tmp_path / 'traces'
+    trace_dir.mkdir()
+    (trace_dir / 'a.xz.part').write_bytes(PAYLOAD)
+    downloader = TraceDownloader(str(trace_dir))
+
+    path = downloader.download(f"{server}/a.xz")
+
+    assert read(path) == PAYLOAD
+    assert RangeHandler.requests_seen == [('GET', f'bytes={len(PAYLOAD)}-')]
+
+
+def test_oversized_part_downloaded_again_on_416(server, tmp_path):
+    trace_dir = tmp_path / 'traces'
+    trace_dir.mkdir()
+    (trace_dir / 'a.xz.part').write_bytes(PAYLOAD + b'garbage')
+    downloader = TraceDownloader(str(trace_dir))
+
+    with pytest.raises(DownloadError):
+        downloader.fetch(f"{server}/a.xz", str(trace_dir / 'a.xz.part'))
+    assert not (trace_dir / 'a.xz.part').exists()
+
+    (trace_dir / 'a.xz.part').write_bytes(PAYLOAD + b'garbage')
+    assert read(downloader.download(f"{server}/a.xz")) == PAYLOAD
+
+
+def test_manifest_mismatch_rejected(server, tmp_path):
+    manifest = write_manifest(tmp_path / 'manifest.json', 'a.xz', b'other content')
+    trace_dir = tmp_path / 'traces'
+    downloader = TraceDownloader(str(trace_dir), manifest=manifest, retries=2)
+
+    assert downloader.download_all([f"{server}/a.xz"]) == []
+    assert not (trace_dir / 'a.xz').exists()
+    assert not (trace_dir / 'a.xz.part').exists()
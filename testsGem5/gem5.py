@@ -1,5 +1,6 @@
 import os
 import json
+import itertools
 import requests
 import subprocess
 from concurrent.futures import ThreadPoolExecutor
@@ -7,10 +8,20 @@ import threading
 import time
 import sys
 from dataclasses import dataclass
+from functools import partial
 import re
 from typing import List, Optional
 import shutil
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.admission import MemoryAdmission
+from common.distributed import RemoteLauncher, start_coordinator
+from common.journal import SweepJournal, file_hash
+from common.placement import CorePlacer
+from common.process import Launcher
+from common.progress import GEM5_PROGRESS, ProgressTracker
+from common.sweep import SweepSpec
+
 
 class CacheConfig:
     """
@@ -57,6 +68,10 @@ class GEM5Runner:
         L1D_Config: Optional[List[CacheConfig]] = None,
         L2_Config: Optional[List[CacheConfig]] = None,
         LLC_Config: Optional[List[CacheConfig]] = None,
+        memory_budget: Optional[int] = None,
+        pin_cores: bool = False,
+        coordinator: Optional[str] = None,
+        sweep_file: Optional[str] = None,
     ):
         self.gem5_path = gem5_path
         self.bin_dir = bin_dir
@@ -87,6 +102,36 @@ class GEM5Runner:
         self.S3_replacement = threading.Semaphore(1)
         self.SGlobal = threading.Semaphore(threads)
 
+        # Simulations also wait until their learned footprint fits in
+        # memory, and run on their own core when pinned. With a
+        # coordinator (host:port), workers on other hosts run them.
+        # The resources of every run are also kept in one journal.
+        journal_path = os.path.join(output_dir, 'run_records.jsonl')
+        self.coordinator = start_coordinator(coordinator) if coordinator else None
+        if self.coordinator:
+            self.launcher = RemoteLauncher(self.coordinator, journal_path)
+        else:
+            self.launcher = Launcher(
+                admission=MemoryAdmission(
+                    budget=memory_budget,
+                    footprints_path=os.path.join(output_dir, 'memory_footprints.json')
+                ),
+                placer=CorePlacer() if pin_cores else None,
+                journal_path=journal_path
+            )
+
+        # Write-ahead journal of the runs, so a killed sweep resumes where
+        # it stopped: finished runs are skipped, interrupted ones run again
+        self.sweep_journal = SweepJournal(
+            os.path.join(output_dir, 'sweep_journal.jsonl')
+        )
+
+        # Speed and remaining time of every run and of the sweep, read from
+        # the periodic statistics, printed and written to sweep_status.json
+        self.progress = ProgressTracker(
+            os.path.join(output_dir, 'sweep_status.json')
+        )
+
         # Initially, nothing is modified
         self.modified_config = None  
         self.modified_config_simulate = None
@@ -101,6 +146,9 @@ class GEM5Runner:
         # Group all cache configs into a single list of 4-tuples
         self.Samples = list(zip(self.L1I_Config, self.L1D_Config, 
                                 self.L2_Config, self.LLC_Config))
+
+        # A sweep file replaces the lists and the zipped cache configurations
+        self.sweep = SweepSpec.load(sweep_file) if sweep_file else None
         
 
     def modify_size_cache(self, L1I, L1D, L2C, LLC):
@@ -328,18 +376,75 @@ class GEM5Runner:
 
         command += [execution]
 
-        subprocess.run(command)
-        self.SGlobal.release()
-
+        # The footprint depends on the binary and on the whole configuration
+        memory_key = os.path.relpath(exec_dir_files,
+                                     os.path.join(self.gem5_path, "configs"))
+        self.sweep_journal.record(memory_key, 'running',
+                                  file_hash(os.path.join(self.bin_dir, binary)))
+
+        # The progress of a previous run would be taken as progress
+        progress_file = os.path.join(dir_files_output, 'progress.txt')
+        if os.path.exists(progress_file):
+            os.remove(progress_file)
+        try:
+            record = self.launcher.run(memory_key, command,
+                                       on_start=partial(self.progress.begin, memory_key,
+                                                        progress_file, GEM5_PROGRESS),
+                                       record_path=os.path.join(dir_files_output,
+                                                                'run_record.json'),
+                                       trace_size=os.path.getsize(
+                                           os.path.join(self.bin_dir, binary)),
+                                       instructions=self.simulation_instructions)
+            self.sweep_journal.record(
+                memory_key, 'done' if record.returncode == 0 else 'failed'
+            )
+            self.progress.end(memory_key, ok=record.returncode == 0)
+        except Exception:
+            self.sweep_journal.record(memory_key, 'failed')
+            self.progress.end(memory_key, ok=False)
+            raise
+        finally:
+            self.SGlobal.release()
+
+
+    def sample_combos(self):
+        """
+        Cache configurations of every Sample, with the (policy, prefetcher,
+        branch) combinations to run on it: the cross product of the lists,
+        or the points of the sweep file.
+        """
+        if self.sweep is None:
+            combos = list(itertools.product(self.policies or [None],
+                                            self.prefetchers or [None],
+                                            self.branch_predictors or [None]))
+            return [(sample, combos) for sample in self.Samples]
+
+        return [
+            (caches, [(point.get('policy'), point.get('prefetcher'),
+                       point.get('branch')) for point in points])
+            for caches, points in self.sweep.samples(CacheConfig)
+        ]
 
     def execute_all_policies(self) -> None:
         # Ensure output directory
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
 
+        samples = self.sample_combos()
+
+        # Count every run left up front, for the remaining time of the sweep
+        for binary in os.listdir(self.bin_dir):
+            for index, (sample, combos) in enumerate(samples, start=1):
+                for policy, prefetcher, branch in combos:
+                    run_name = os.path.join(binary, f"Sample{index}",
+                                            branch, prefetcher, policy)
+                    if not self.sweep_journal.is_done(run_name):
+                        self.progress.add(run_name, self.simulation_instructions)
+
+        self.progress.start()
         with ThreadPoolExecutor(max_workers=self.threads) as executor:
             for binary in os.listdir(self.bin_dir):
-                for index, sample in enumerate(self.Samples, start=1):
+                for index, (sample, combos) in enumerate(samples, start=1):
                     L1I, L1D, L2C, L3 = sample
 
                     # Each sample set has its own folder
@@ -354,26 +459,37 @@ class GEM5Runner:
                     # For each combination of policies/prefetchers/branch
                     # If you only want to run certain fields, you can just
                     # leave them empty or pass None to skip.
-                    for policy in self.policies or [None]:
-                        for prefetcher in self.prefetchers or [None]:
-                            for branch in self.branch_predictors or [None]:
-                                # Do JSON modifications
-                                
-                                self.modify_replacement_policy(policy,L3)
-                                self.modify_prefetcher(prefetcher)
-                                self.modify_branch(branch)
-                                self.modify_simulate_py(binary)
+                    for policy, prefetcher, branch in combos:
+                        run_name = os.path.join(binary, f"Sample{index}",
+                                                branch, prefetcher, policy)
+                        if self.sweep_journal.is_done(run_name):
+                            print(f"[SKIP] {run_name} already executed")
+                            continue
+
+                        # Do JSON modifications
+                        
+                        self.modify_replacement_policy(policy,L3)
+                        self.modify_prefetcher(prefetcher)
+                        self.modify_branch(branch)
+                        self.modify_simulate_py(binary)
+
+                        exec_dir_files,dir_files_output = \
+                            self.write_modified_config(index,binary,
+                                                      branch,prefetcher,
+                                                      policy)
+                        self.SGlobal.acquire()
+                        self.sweep_journal.record(run_name, 'queued')
+                        # Launch parallel jobs for each trace
+
+                        executor.submit(self.exec_bin, policy, branch, 
+                                    prefetcher,binary,exec_dir_files,
+                                    dir_files_output)
 
-                                exec_dir_files,dir_files_output = \
-                                    self.write_modified_config(index,binary,
-                                                              branch,prefetcher,
-                                                              policy)
-                                self.SGlobal.acquire()
-                                # Launch parallel jobs for each trace
+        self.progress.stop()
+        self.sweep_journal.close()
 
-                                executor.submit(self.exec_bin, policy, branch, 
-                                            prefetcher,binary,exec_dir_files,
-                                            dir_files_output)
+        if self.coordinator:
+            self.coordinator.stop()
 
 
 
@@ -419,6 +535,26 @@ def main():
 
     branches = ["BiModeBP", "GshareBP", "TAGE"]
 
+    # Memory the simulations may use together (bytes), None for 90% of
+    # the memory available when the sweep starts
+    memory_budget = None
+
+    # Pin every simulation to its own core (sibling-free when possible),
+    # with its memory bound to the local NUMA node; off unless set here
+    pin_cores = False
+
+    # Serve the simulations to workers on other hosts (started with
+    # python3 -m common.distributed http://<this host>:8765), e.g.
+    # '10.0.0.1:8765' for the address of this host on a trusted network
+    # (':8765' only listens on 127.0.0.1); threads is then the number of
+    # runs in flight
+    coordinator = None
+
+    # JSON/YAML sweep specification (cartesian and zipped axes, exclusions,
+    # random or Latin hypercube sampling) replacing the lists above and the
+    # cache configurations below, e.g. 'sweep.json'; see common/sweep.py
+    sweep_file = None
+
     # ----------------------------------------------------------
     #  Define your new cache configuration lists in main
     # ----------------------------------------------------------
@@ -455,7 +591,11 @@ def main():
         L1I_Config=L1I_config,
         L1D_Config=L1D_config,
         L2_Config=L2_config,
-        LLC_Config=LLC_config
+        LLC_Config=LLC_config,
+        memory_budget=memory_budget,
+        pin_cores=pin_cores,
+        coordinator=coordinator,
+        sweep_file=sweep_file
     )
 
     gem5_runner.execute_all_policies()
@@ -38,10 +38,11 @@ for branch_dir in os.listdir(root):
                     full_path = os.path.join(policy_path, file_name)
                     with open(full_path, 'r') as f:
                         content = f.read()
-                        # New regex: look for "system.cpu.ipc" followed by the IPC value
-                        ipc_match = re.search(r"system\.cpu\.ipc\s+([\d\.]+)", content)
-                        if ipc_match:
-                            ipc_value = float(ipc_match.group(1))
+                        # Look for "system.cpu.ipc" followed by the IPC value,
+                        # in the last block of statistics if several were dumped
+                        ipc_matches = re.findall(r"system\.cpu\.ipc\s+([\d\.]+)", content)
+                        if ipc_matches:
+                            ipc_value = float(ipc_matches[-1])
                             # Store the value; we use 'trace' as a fixed key,
                             # 'policy_dir' as the cache replacement policy,
                             # and combine branch and prefetcher for the key.
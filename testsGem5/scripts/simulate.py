@@ -29,6 +29,18 @@ root = Root(full_system=False, system=system)
 # Instantiate the simulation
 m5.instantiate()
 
+# Every simulated 100 ms, write the instructions simulated so far to
+# progress.txt, so the progress of the run can be followed while stats.txt
+# only receives the statistics of the end
+progress_path = os.path.join(m5.options.outdir, "progress.txt")
+progress_period = m5.ticks.fromSeconds(0.1)
+
 print("Beginning simulation!")
-exit_event = m5.simulate()
+with open(progress_path, "w") as progress:
+    while True:
+        exit_event = m5.simulate(progress_period)
+        if exit_event.getCause() != "simulate() limit reached":
+            break
+        progress.write(f"simInsts {system.cpu.totalInsts()}\n")
+        progress.flush()
 print(f"Exiting @ tick {m5.curTick()} because {exit_event.getCause()}")
\ No newline at end of file
@@ -0,0 +1,144 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from typing import Dict, List
+
+
+# Modules whose sources live outside of their own module directory
+MODULE_DEPENDENCIES = {
+    'hawkeye': ['lib_hawkeye'],
+}
+
+# Directories of the ChampSim tree that every executable is built from
+CORE_SOURCE_DIRS = ['src', 'inc', 'config']
+CORE_SOURCE_FILES = ['Makefile', 'config.sh']
+
+# JSON keys naming a module and the ChampSim directory holding it
+MODULE_KEYS = {
+    'replacement': 'replacement',
+    'prefetcher': 'prefetcher',
+    'branch_predictor': 'branch',
+    'btb': 'btb',
+}
+
+
+class BinaryCache:
+    """
+    Persistent, content-addressed store of ChampSim executables.
+
+    A binary is keyed by the hash of its generated JSON configuration
+    (without the executable name) and of the sources of every module the
+    configuration pulls in, so an identical build is never repeated, be it
+    in the same sweep or in a later one.
+
+    Attributes:
+        cache_dir (str): Directory where the binaries are stored.
+        champ_sim_path (str): Path to the ChampSim repository.
+    """
+
+    def __init__(self, cache_dir: str, champ_sim_path: str):
+        self.cache_dir = cache_dir
+        self.champ_sim_path = champ_sim_path
+        self.lock = threading.Lock()
+        self._core_hash = None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def hash_directory(self, path: str) -> str:
+        """Hash every file below path, including the relative file names."""
+        digest = hashlib.sha256()
+        if os.path.isfile(path):
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+            return digest.hexdigest()
+
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                with open(file_path, 'rb') as file:
+                    digest.update(file.read())
+        return digest.hexdigest()
+
+    def core_hash(self) -> str:
+        """Hash of the ChampSim core sources, computed once per run."""
+        if self._core_hash is None:
+            digest = hashlib.sha256()
+            for name in CORE_SOURCE_DIRS + CORE_SOURCE_FILES:
+                path = os.path.join(self.champ_sim_path, name)
+                if os.path.exists(path):
+                    digest.update(name.encode())
+                    digest.update(self.hash_directory(path).encode())
+            self._core_hash = digest.hexdigest()
+        return self._core_hash
+
+    def module_sources(self, config: Dict) -> List[str]:
+        """List the module directories referenced by a configuration."""
+        sources = set()
+
+        def collect(node):
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    if key in MODULE_KEYS and isinstance(value, str):
+                        sources.add(os.path.join(MODULE_KEYS[key], value))
+                        for extra in MODULE_DEPENDENCIES.get(value, []):
+                            sources.add(extra)
+                    else:
+                        collect(value)
+            elif isinstance(node, list):
+                for item in node:
+                    collect(item)
+
+        collect(config)
+        return sorted(sources)
+
+    def key(self, config: Dict) -> str:
+        """Compute the cache key of a generated configuration."""
+        config = dict(config)
+        config.pop('executable_name', None)
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps(config, sort_keys=True).encode())
+        digest.update(self.core_hash().encode())
+        for source in self.module_sources(config):
+            path = os.path.join(self.champ_sim_path, source)
+            if os.path.exists(path):
+                digest.update(source.encode())
+                digest.update(self.hash_directory(path).encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        """Path of the cached binary for a key."""
+        return os.path.join(self.cache_dir, key[:2], key, 'champsim')
+
+    def fetch(self, key: str, destination: str) -> bool:
+        """
+        Copy the cached binary for key to destination.
+        Returns False on a cache miss.
+        """
+        cached = self.entry_path(key)
+        if not os.path.isfile(cached):
+            return False
+
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temp_destination = f"{destination}.{threading.get_ident()}.tmp"
+        shutil.copy2(cached, temp_destination)
+        os.replace(temp_destination, destination)
+        return True
+
+    def store(self, key: str, binary: str, config: Dict) -> None:
+        """Add a freshly built binary to the cache."""
+        cached = self.entry_path(key)
+        entry_dir = os.path.dirname(cached)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        with self.lock:
+            temp_cached = f"{cached}.{threading.get_ident()}.tmp"
+            shutil.copy2(binary, temp_cached)
+            os.replace(temp_cached, cached)
+
+            with open(os.path.join(entry_dir, 'config.json'), 'w') as file:
+                json.dump(config, file, indent=4)
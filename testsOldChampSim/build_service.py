@@ -0,0 +1,326 @@
+import os
+import json
+import queue
+import hashlib
+import shutil
+import threading
+import subprocess
+from typing import Dict, List, Optional
+
+from common.journal import SweepJournal, file_hash
+
+from binary_cache import BinaryCache
+
+
+# Entries of the ChampSim tree that are generated by a build, never copied
+GENERATED_ENTRIES = {'.git', 'bin', '.csconfig', 'json_files', 'obj',
+                     '_configuration.mk'}
+
+# Large dependency folders shared by every slot through a symlink
+SHARED_ENTRIES = {'vcpkg', 'vcpkg_installed'}
+
+
+class BuildService:
+    """
+    Builds ChampSim executables concurrently, each one in its own copy of
+    the ChampSim tree (a build slot), so no configuration ever rewrites the
+    sources or the generated Makefile of another one.
+
+    Slots are created once under build_root and reused: each build first
+    brings its slot up to date with the ChampSim tree, then runs config.sh
+    and make inside it, and finally publishes the executable to the bin
+    folder of the ChampSim tree. Because object files stay in the slot,
+    successive builds in the same slot are incremental.
+
+    build_batch() instead configures a whole set of executables with a
+    single config.sh call and compiles them with one make over the share
+    of the cores of its slot.
+
+    With a journal, every build is journaled as build:<name> with the hash
+    of its configuration and of the executable it produced. An executable
+    the journal shows as built for the same configuration, and still
+    present in the bin folder, is reused without building again.
+
+    Attributes:
+        champ_sim_path (str): Path to the ChampSim repository.
+        build_root (str): Directory holding the build slots.
+        slots (int): Number of builds that may run at the same time.
+        make_jobs (int): Value of make -j for each build.
+        binary_cache (Optional[BinaryCache]): Cache of built executables.
+        batch_make_jobs (int): Value of make -j for batched builds.
+        journal (Optional[SweepJournal]): Journal of the sweep.
+        binary_hashes (Dict[str, str]): sha256 of every executable built
+            or reused, by executable name.
+    """
+
+    def __init__(
+        self,
+        champ_sim_path: str,
+        build_root: str,
+        slots: int,
+        make_jobs: int,
+        binary_cache: Optional[BinaryCache] = None,
+        json_directory: str = 'json_files/',
+        journal: Optional[SweepJournal] = None,
+    ):
+        self.champ_sim_path = os.path.abspath(champ_sim_path)
+        self.build_root = os.path.abspath(build_root)
+        self.slots = slots
+        self.make_jobs = make_jobs
+        self.binary_cache = binary_cache
+        self.json_directory = json_directory
+        # Up to slots batches may build at once, each one gets its share
+        self.batch_make_jobs = max(1, (os.cpu_count() or 1) // slots)
+        self.journal = journal
+        self.binary_hashes: Dict[str, str] = {}
+
+        self.free_slots = queue.Queue()
+        for index in range(slots):
+            self.free_slots.put(os.path.join(self.build_root, f'slot{index}'))
+
+        self.bin_dir = os.path.join(self.champ_sim_path, 'bin')
+        os.makedirs(self.bin_dir, exist_ok=True)
+        os.makedirs(os.path.join(self.champ_sim_path, self.json_directory),
+                    exist_ok=True)
+
+    def sync_slot(self, slot: str) -> None:
+        """
+        Bring a slot up to date with the ChampSim tree, copying only the
+        files whose size or modification time changed, and removing the
+        files and folders the tree no longer has.
+        """
+        os.makedirs(slot, exist_ok=True)
+        synced = set()
+
+        for name in SHARED_ENTRIES:
+            source = os.path.join(self.champ_sim_path, name)
+            link = os.path.join(slot, name)
+            if os.path.exists(source) and not os.path.lexists(link):
+                os.symlink(source, link)
+
+        for root, dirs, files in os.walk(self.champ_sim_path):
+            relative = os.path.relpath(root, self.champ_sim_path)
+            if relative == '.':
+                dirs[:] = [d for d in dirs
+                           if d not in GENERATED_ENTRIES | SHARED_ENTRIES]
+                files = [f for f in files if f not in GENERATED_ENTRIES]
+            else:
+                dirs[:] = [d for d in dirs if d != '.git']
+
+            target_root = os.path.normpath(os.path.join(slot, relative))
+            os.makedirs(target_root, exist_ok=True)
+            synced.add(os.path.normpath(relative))
+
+            for name in files:
+                source = os.path.join(root, name)
+                target = os.path.join(target_root, name)
+                synced.add(os.path.normpath(os.path.join(relative, name)))
+                source_stat = os.stat(source)
+                try:
+                    target_stat = os.stat(target)
+                    if (target_stat.st_size == source_stat.st_size and
+                            target_stat.st_mtime_ns == source_stat.st_mtime_ns):
+                        continue
+                except FileNotFoundError:
+                    pass
+                shutil.copy2(source, target)
+
+        self.remove_stale(slot, synced)
+
+    def remove_stale(self, slot: str, synced: set) -> None:
+        """
+        Remove from a slot the entries, other than the generated and shared
+        ones, that are not in synced (paths relative to the slot).
+        """
+        for root, dirs, files in os.walk(slot):
+            relative = os.path.relpath(root, slot)
+            if relative == '.':
+                dirs[:] = [d for d in dirs
+                           if d not in GENERATED_ENTRIES | SHARED_ENTRIES]
+                files = [f for f in files
+                         if f not in GENERATED_ENTRIES | SHARED_ENTRIES]
+            else:
+                dirs[:] = [d for d in dirs if d != '.git']
+
+            for name in list(dirs):
+                path = os.path.normpath(os.path.join(relative, name))
+                if path not in synced:
+                    shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+                    dirs.remove(name)
+            for name in files:
+                path = os.path.normpath(os.path.join(relative, name))
+                if path not in synced:
+                    os.remove(os.path.join(root, name))
+
+    def publish(self, binary: str, name: str) -> str:
+        """Atomically copy a built executable to the ChampSim bin folder."""
+        destination = os.path.join(self.bin_dir, name)
+        temp_destination = f"{destination}.{threading.get_ident()}.tmp"
+        shutil.copy2(binary, temp_destination)
+        os.replace(temp_destination, destination)
+        return destination
+
+    def config_key(self, config: Dict) -> str:
+        """
+        Key of a configuration: its binary cache key, which also covers the
+        sources, or the hash of its JSON without a binary cache.
+        """
+        if self.binary_cache:
+            return self.binary_cache.key(config)
+        config = dict(config)
+        config.pop('executable_name', None)
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+    def journaled(self, name: str, key: str) -> Optional[str]:
+        """
+        Path of executable name if the journal shows it was built for the
+        configuration key and the bin folder still holds that build.
+        """
+        if not self.journal:
+            return None
+        entry = self.journal.get(f"build:{name}")
+        if not entry or entry.state != 'done' or entry.info.get('config') != key:
+            return None
+        destination = os.path.join(self.bin_dir, name)
+        if file_hash(destination) != entry.binary_hash:
+            return None
+        self.binary_hashes[name] = entry.binary_hash
+        return destination
+
+    def journal_state(self, name: str, state: str, key: str) -> None:
+        """Journal a build transition, hashing the executable once done."""
+        binary_hash = None
+        if state == 'done':
+            binary_hash = file_hash(os.path.join(self.bin_dir, name))
+            self.binary_hashes[name] = binary_hash
+        if self.journal:
+            self.journal.record(f"build:{name}", state, binary_hash, config=key)
+
+    def write_config(self, root: str, name: str, config: Dict) -> str:
+        """Write a JSON configuration under root, return its relative path."""
+        relative = os.path.join(self.json_directory, f'{name}.json')
+        os.makedirs(os.path.join(root, self.json_directory), exist_ok=True)
+        with open(os.path.join(root, relative), 'w') as file:
+            json.dump(config, file, indent=4)
+        return relative
+
+    def configure_and_make(
+        self,
+        slot: str,
+        json_files: List[str],
+        make_jobs: int,
+    ) -> None:
+        """Run config.sh on the given JSON files, then make, inside a slot."""
+        subprocess.run(["./config.sh"] + json_files,
+                       cwd=slot,
+                       stdout=subprocess.DEVNULL,
+                       check=True)
+        subprocess.run(["make", f"-j{make_jobs}"],
+                       cwd=slot,
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.STDOUT,
+                       check=True)
+
+    def build(self, name: str, config: Dict) -> str:
+        """
+        Build the executable described by config and return its path in
+        the ChampSim bin folder.
+        """
+        config = dict(config, executable_name=name)
+        destination = os.path.join(self.bin_dir, name)
+
+        # Keep a record of the configuration next to the executables
+        self.write_config(self.champ_sim_path, name, config)
+
+        cache_key = self.config_key(config)
+        if self.journaled(name, cache_key):
+            print(f"[JOURNAL] Reusing binary for {name}")
+            return destination
+
+        if self.binary_cache and self.binary_cache.fetch(cache_key, destination):
+            print(f"[CACHE] Reusing binary for {name}")
+            self.journal_state(name, 'done', cache_key)
+            return destination
+
+        self.journal_state(name, 'building', cache_key)
+        slot = self.free_slots.get()
+        try:
+            self.sync_slot(slot)
+
+            json_to_config = self.write_config(slot, name, config)
+
+            print(f"[BUILD] {name} in {slot}")
+            self.configure_and_make(slot, [json_to_config], self.make_jobs)
+
+            self.publish(os.path.join(slot, 'bin', name), name)
+        except BaseException:
+            self.journal_state(name, 'failed', cache_key)
+            raise
+        finally:
+            self.free_slots.put(slot)
+
+        if self.binary_cache:
+            self.binary_cache.store(cache_key, destination, config)
+        self.journal_state(name, 'done', cache_key)
+
+        return destination
+
+    def build_batch(self, configs: Dict[str, Dict]) -> Dict[str, str]:
+        """
+        Build every configuration of configs (executable name -> config)
+        with a single config.sh and make invocation, so make can schedule
+        the compilation of all modules across the cores of the slot.
+        Returns the path of each executable in the ChampSim bin folder.
+        """
+        binaries = {}
+        missing = {}
+        cache_keys = {}
+
+        for name, config in configs.items():
+            config = dict(config, executable_name=name)
+            self.write_config(self.champ_sim_path, name, config)
+
+            cache_keys[name] = self.config_key(config)
+            destination = os.path.join(self.bin_dir, name)
+            if self.journaled(name, cache_keys[name]):
+                print(f"[JOURNAL] Reusing binary for {name}")
+                binaries[name] = destination
+                continue
+            if (self.binary_cache and
+                    self.binary_cache.fetch(cache_keys[name], destination)):
+                print(f"[CACHE] Reusing binary for {name}")
+                self.journal_state(name, 'done', cache_keys[name])
+                binaries[name] = destination
+                continue
+            missing[name] = config
+
+        if not missing:
+            return binaries
+
+        for name in missing:
+            self.journal_state(name, 'building', cache_keys[name])
+        slot = self.free_slots.get()
+        try:
+            self.sync_slot(slot)
+
+            json_files = [self.write_config(slot, name, config)
+                          for name, config in missing.items()]
+
+            print(f"[BUILD] {len(missing)} executables in {slot}")
+            self.configure_and_make(slot, json_files, self.batch_make_jobs)
+
+            for name in missing:
+                binaries[name] = self.publish(os.path.join(slot, 'bin', name), name)
+        except BaseException:
+            for name in missing:
+                self.journal_state(name, 'failed', cache_keys[name])
+            raise
+        finally:
+            self.free_slots.put(slot)
+
+        for name, config in missing.items():
+            if self.binary_cache:
+                self.binary_cache.store(cache_keys[name], binaries[name], config)
+            self.journal_state(name, 'done', cache_keys[name])
+
+        return binaries
@@ -1,17 +1,41 @@
 import os
 import json
-import requests
+import copy
+import hashlib
+import itertools
 import subprocess
-from concurrent.futures import ThreadPoolExecutor
-import threading
-import time
 import sys
-from dataclasses import dataclass
-import re
-from typing import List, Optional
-
-
-@dataclass
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.admission import MemoryAdmission
+from common.distributed import RemoteLauncher, start_coordinator
+from common.journal import SweepJournal
+from common.placement import CorePlacer
+from common.progress import CHAMPSIM_PROGRESS, ProgressTracker
+from common.process import Launcher
+from common.sweep import SweepSpec
+
+from binary_cache import BinaryCache
+from build_service import BuildService
+from completion_index import CompletionIndex
+from convergence import ConvergenceMonitor, ConvergencePolicy
+from interval_parallel import IntervalPlanner, IntervalPolicy, stitch
+from results_store import ResultsStore, parse_champsim_output
+from runtime_history import RuntimeHistory
+from scheduler import DagScheduler, Task
+from simpoints import SimPointPlanner, SimPointPolicy, weighted_ipc
+from successive_halving import HalvingPolicy, geomean, rank
+from trace_cache import TraceCache
+from trace_downloader import TraceDownloader
+
+# (warmup, simulation) instructions of a run
+Window = Tuple[Optional[int], Optional[int]]
+
+
+@dataclass(frozen=True)
 class CacheConfig:
     """Stores cache configuration details."""
     sets: int
@@ -19,6 +43,37 @@ class CacheConfig:
     latency: int
 
 
+def geometry_hash(caches: Tuple[CacheConfig, ...]) -> str:
+    """Short hash of the sets, ways and latency of every cache level."""
+    key = json.dumps([asdict(cache) for cache in caches])
+    return hashlib.sha256(key.encode()).hexdigest()[:8]
+
+
+@dataclass(frozen=True)
+class RunSpec:
+    """
+    One simulation of a sweep, fixed when it is added to the graph so
+    that nothing changed later by the runner reaches a queued run.
+
+    Attributes:
+        trace_name (str): Name of the trace.
+        trace_path (str): Path of the trace file.
+        output_dir (str): Folder of the Sample the run writes to.
+        policy (Optional[str]): LLC replacement policy.
+        branch (Optional[str]): Branch predictor.
+        prefetcher (Optional[str]): LLC prefetcher.
+        window (Optional[Window]): (warmup, simulation) instructions, None
+            for those of the runner.
+    """
+    trace_name: str
+    trace_path: str
+    output_dir: str
+    policy: Optional[str]
+    branch: Optional[str]
+    prefetcher: Optional[str]
+    window: Optional[Window] = None
+
+
 class ChampSimRunner:
     """
     A class to handle building, configuring, and running ChampSim on
@@ -41,6 +96,50 @@ class ChampSimRunner:
         L1D_Config (List[CacheConfig]): List of L1D cache configurations.
         L2_Config (List[CacheConfig]): List of L2C cache configurations.
         LLC_Config (List[CacheConfig]): List of LLC cache configurations.
+        binary_cache_dir (Optional[str]): Directory of the persistent binary
+            cache, None disables it.
+        build_slots (Optional[int]): Number of executables built at the same
+            time, each one in its own copy of the ChampSim tree.
+        build_root (Optional[str]): Directory holding those copies.
+        build_mode (str): 'isolated' builds every executable on its own,
+            'batch' configures and compiles all the executables of a Sample
+            with one config.sh and one make invocation.
+        trace_cache_dir (Optional[str]): Scratch directory (e.g. a tmpfs)
+            where .xz traces are decompressed once and shared by every
+            simulation, None reads the compressed traces directly. Not
+            used with a coordinator.
+        trace_cache_quota (int): Maximum size in bytes of trace_cache_dir.
+        download_workers (int): Number of traces downloaded at the same time.
+        trace_mirror_dir (Optional[str]): Local directory (e.g. a shared
+            filesystem) searched for a trace before downloading it.
+        trace_manifest (Optional[str]): JSON or md5sum/sha256sum file with
+            the expected size and checksum of the traces.
+        runtime_history_path (Optional[str]): Journal of past run durations
+            used to start the longest simulations first.
+        memory_budget (Optional[int]): Bytes the running simulations may
+            use together, None for 90% of the available memory.
+        pin_cores (bool): Pin each simulation to its own core, with its
+            memory on the local NUMA node.
+        coordinator (Optional[str]): host:port to serve the simulations to
+            workers on other hosts instead of running them locally.
+        sweep_file (Optional[str]): JSON/YAML sweep specification replacing
+            the lists of policies, prefetchers, branch predictors and cache
+            configurations (see common/sweep.py).
+        convergence (Optional[ConvergencePolicy]): Stop each simulation
+            once its heartbeat IPC has stabilized, None runs every
+            simulation to its last instruction. Not used with a
+            coordinator, whose processes run on other hosts.
+        halving (Optional[HalvingPolicy]): Run every configuration on short
+            windows first and only the best ones, by geomean IPC over the
+            traces, up to simulation_instructions; None runs every
+            configuration at full length.
+        simpoints (Optional[SimPointPolicy]): Simulate a few weighted
+            representative slices of every trace instead of the trace
+            (see simpoints.py), None simulates the traces.
+        intervals (Optional[IntervalPolicy]): Split the simulated
+            instructions of every trace into windows simulated at the same
+            time and stitched together (see interval_parallel.py), None
+            runs each trace in one piece.
     """
 
     def __init__(
@@ -59,11 +158,28 @@ class ChampSimRunner:
         L1D_Config: Optional[List[CacheConfig]] = None,
         L2_Config: Optional[List[CacheConfig]] = None,
         LLC_Config: Optional[List[CacheConfig]] = None,
+        binary_cache_dir: Optional[str] = None,
+        build_slots: Optional[int] = None,
+        build_root: Optional[str] = None,
+        build_mode: str = 'isolated',
+        trace_cache_dir: Optional[str] = None,
+        trace_cache_quota: int = 32 << 30,
+        download_workers: int = 4,
+        trace_mirror_dir: Optional[str] = None,
+        trace_manifest: Optional[str] = None,
+        runtime_history_path: Optional[str] = None,
+        memory_budget: Optional[int] = None,
+        pin_cores: bool = False,
+        coordinator: Optional[str] = None,
+        sweep_file: Optional[str] = None,
+        convergence: Optional[ConvergencePolicy] = None,
+        halving: Optional[HalvingPolicy] = None,
+        simpoints: Optional[SimPointPolicy] = None,
+        intervals: Optional[IntervalPolicy] = None,
     ):
         self.champ_sim_path = champ_sim_path
         self.trace_dir = trace_dir
         self.config_file = config_file
-        self.config_bin_name = 'champsim'
 
         self.output_dir = output_dir
         self.output_dir_orig = output_dir
@@ -77,15 +193,29 @@ class ChampSimRunner:
         self.warmup_instructions = warmup_instructions
         self.simulation_instructions = simulation_instructions
 
-        # Semaphores to coordinate certain tasks
-        self.S1_replacement = threading.Semaphore(1)
-        self.S2_replacement = threading.Semaphore(1)
-        self.S3_replacement = threading.Semaphore(1)
-        self.SGlobal = threading.Semaphore(threads)
+        # Opt-in early stop of the simulations whose IPC has converged,
+        # only for the simulations running on this host
+        self.convergence = convergence
+
+        # Opt-in successive halving, whose last rung is the full length
+        if halving and not simulation_instructions:
+            raise ValueError("Successive halving needs simulation_instructions")
+        self.halving = halving
+
+        # Opt-in representative slices instead of the whole traces
+        if halving and simpoints:
+            raise ValueError("Successive halving runs whole traces, not SimPoints")
+        self.simpoints = simpoints
+
+        # Opt-in interval-parallel runs of the traces, whose parts must
+        # all run to their last instruction
+        if intervals and not simulation_instructions:
+            raise ValueError("Interval-parallel runs need simulation_instructions")
+        if intervals and (halving or simpoints or convergence):
+            raise ValueError("Interval-parallel runs cannot be combined with "
+                             "halving, SimPoints or convergence")
+        self.intervals = intervals
 
-        # Initially, nothing is modified
-        self.modified_config = None  # Will hold JSON config in memory
-        self.json_config_name = None
         self.json_directory = 'json_files/'
 
         self.L1I_Config = L1I_Config or []
@@ -97,184 +227,339 @@ class ChampSimRunner:
         self.Samples = list(zip(self.L1I_Config, self.L1D_Config, 
                                 self.L2_Config, self.LLC_Config))
 
-    def download_traces(self, trace_urls: List[str]) -> None:
-        """Download trace files if they are not already present."""
-        if not os.path.exists(self.trace_dir):
-            os.makedirs(self.trace_dir)
+        # A sweep file replaces the lists and the zipped cache configurations
+        self.sweep = SweepSpec.load(sweep_file) if sweep_file else None
 
-        for file_url in trace_urls:
-            file_name = os.path.basename(file_url)
-            file_path = os.path.join(self.trace_dir, file_name)
+        # Already built executables are reused across configurations and sweeps
+        self.binary_cache = (
+            BinaryCache(binary_cache_dir, champ_sim_path)
+            if binary_cache_dir else None
+        )
 
-            if os.path.exists(file_path):
-                print(f"File {file_name} already exists, skipping download.")
-                continue
+        # Opt-in cache of decompressed traces shared by the simulations. Its
+        # copies are local to this host, remote workers read the traces
+        if trace_cache_dir and coordinator:
+            print("[INFO] Trace cache disabled: the runs go to remote workers")
+            trace_cache_dir = None
+        self.trace_cache = (
+            TraceCache(trace_cache_dir, trace_cache_quota)
+            if trace_cache_dir else None
+        )
+
+        # Finished runs, so resuming a sweep does not rescan the outputs
+        self.completion_index = CompletionIndex(self.output_dir_orig)
 
-            print(f"Downloading {file_name}...")
-            with requests.get(file_url, stream=True) as r:
-                r.raise_for_status()
-                with open(file_path, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
-            print(f"Downloaded {file_name}.")
-
-    def modify_replacement_policy(self, policy: str) -> None:
-        """Modify the replacement policy in the loaded config."""
-        time.sleep(0.2)
-        self.S1_replacement.acquire()
-        self.modified_config['LLC']['replacement'] = policy
-
-    def modify_prefetcher(self, prefetcher: str) -> None:
-        """Modify the prefetcher in the loaded config."""
-        time.sleep(0.3)
-        self.S2_replacement.acquire()
-        self.modified_config['LLC']['prefetcher'] = prefetcher
-
-    def modify_branch(self, branch: str) -> None:
-        """Modify the branch predictor in the loaded config."""
-        time.sleep(0.35)
-        self.S3_replacement.acquire()
-        self.modified_config['ooo_cpu'][0]['branch_predictor'] = branch
-
-    def modify_output_exec_name(self, policy: str, prefetcher: str, branch: str) -> None:
-        """
-        Update the JSON config executable name and store it for usage
-        in compilation and execution steps.
-        """
-        updated_config = self.modified_config.copy()
-        updated_config['executable_name'] = f'champsim_{policy}_{prefetcher}_{branch}'
-        self.config_bin_name = f'champsim_{policy}_{prefetcher}_{branch}'
-        self.modified_config = updated_config
-
-    def write_modified_config(self, file_path: str) -> None:
-        """
-        Write the modified JSON config to disk, copy to ChampSim path,
-        then run config.sh and make.
-        """
-        if not self.modified_config:
-            print("No configuration changes to write.")
-            return
-
-        # Write the modified config locally
-        with open(file_path, 'w') as file:
-            json.dump(self.modified_config, file, indent=4)
-
-        # Ensure json_directory exists in ChampSim path
-        subprocess.run(
-            ['mkdir', '-p', self.json_directory],
-            cwd=self.champ_sim_path
+        # Write-ahead journal of builds and runs, so a killed sweep resumes
+        # where it stopped without building anything twice
+        self.sweep_journal = SweepJournal(
+            os.path.join(self.output_dir_orig, 'sweep_journal.jsonl')
         )
 
-        # Full path to the config inside ChampSim
-        self.json_config_name = os.path.join(
-            self.champ_sim_path,
-            self.json_directory,
-            f'{self.config_bin_name}.json'
+        # Statistics of every run, parsed once when the run finishes
+        self.results_store = ResultsStore(
+            os.path.join(self.output_dir_orig, 'results.db')
         )
 
-        # Relative path for config.sh usage
-        json_to_config = os.path.join(self.json_directory, f'{self.config_bin_name}.json')
+        # Past durations order the simulations longest first
+        self.runtime_history = RuntimeHistory(
+            runtime_history_path or
+            os.path.join(self.output_dir_orig, 'runtime_history.jsonl')
+        )
 
-        # Copy the config file to the ChampSim directory
-        subprocess.run(['cp', file_path, self.json_config_name])
+        # Speed and remaining time of every run and of the sweep, read from
+        # the heartbeats, printed and written to sweep_status.json
+        self.progress = ProgressTracker(
+            os.path.join(self.output_dir_orig, 'sweep_status.json')
+        )
 
-        # Run config.sh to generate the configs
-        subprocess.run(["./config.sh", json_to_config],
-                       cwd=self.champ_sim_path, check=True)
+        # Simulations start only while their learned footprint fits, on
+        # their own core when pinned; every run is recorded in a journal.
+        # With a coordinator, workers do this on their own hosts.
+        journal_path = os.path.join(self.output_dir_orig, 'run_records.jsonl')
+        self.coordinator = start_coordinator(coordinator) if coordinator else None
+        if self.coordinator:
+            self.launcher = RemoteLauncher(self.coordinator, journal_path)
+        else:
+            self.launcher = Launcher(
+                admission=MemoryAdmission(
+                    budget=memory_budget,
+                    footprints_path=os.path.join(self.output_dir_orig,
+                                                 'memory_footprints.json')
+                ),
+                placer=CorePlacer() if pin_cores else None,
+                journal_path=journal_path
+            )
+
+        # Traces are fetched in parallel, resumed and verified
+        self.trace_downloader = TraceDownloader(
+            trace_dir,
+            workers=download_workers,
+            mirror_dir=trace_mirror_dir,
+            manifest=trace_manifest
+        )
 
-        # Build with the new config
-        subprocess.run(["make", f"-j{self.threads}"],
-                       cwd=self.champ_sim_path,
-                       stdout=subprocess.DEVNULL,
-                       stderr=subprocess.STDOUT,
-                       check=True)
+        if build_mode not in ('isolated', 'batch'):
+            raise ValueError(f"Unknown build mode: {build_mode}")
+        self.build_mode = build_mode
+
+        # Builds run concurrently in isolated trees and share the cores
+        self.build_slots = build_slots or min(4, threads)
+        self.build_service = BuildService(
+            champ_sim_path=champ_sim_path,
+            build_root=build_root or os.path.join(
+                os.path.dirname(os.path.abspath(champ_sim_path)),
+                'ChampSim-builds'
+            ),
+            slots=self.build_slots,
+            make_jobs=max(1, (os.cpu_count() or 1) // self.build_slots),
+            binary_cache=self.binary_cache,
+            json_directory=self.json_directory,
+            journal=self.sweep_journal
+        )
 
-    def exec_single_trace(
-        self,
+    @staticmethod
+    def run_name(
+        output_dir: str,
         trace_name: str,
-        trace_path: str,
         policy: Optional[str],
-        branch: Optional[str],
         prefetcher: Optional[str],
-    ) -> None:
+        branch: Optional[str],
+    ) -> str:
+        """Name of a simulation in the scheduler and in the journal."""
+        return (f"run:{os.path.basename(output_dir)}:{trace_name}"
+                f":{policy}:{prefetcher}:{branch}")
+
+    def download_traces(self, trace_urls: List[str]) -> None:
+        """Download trace files if they are not already present."""
+        self.trace_downloader.download_all(trace_urls)
+
+    def modify_replacement_policy(self, config: dict, policy: str) -> None:
+        """Modify the replacement policy in the given config."""
+        config['LLC']['replacement'] = policy
+
+    def modify_prefetcher(self, config: dict, prefetcher: str) -> None:
+        """Modify the prefetcher in the given config."""
+        config['LLC']['prefetcher'] = prefetcher
+
+    def modify_branch(self, config: dict, branch: str) -> None:
+        """Modify the branch predictor in the given config."""
+        config['ooo_cpu'][0]['branch_predictor'] = branch
+
+    def modify_output_exec_name(
+        self,
+        config: dict,
+        policy: str,
+        prefetcher: str,
+        branch: str,
+        geometry: str
+    ) -> str:
+        """
+        Update the JSON config executable name and return it for usage
+        in compilation and execution steps. The geometry hash of the
+        caches keeps the executables of different Samples apart.
+        """
+        config['executable_name'] = f'champsim_{policy}_{prefetcher}_{branch}_{geometry}'
+        return config['executable_name']
+
+    def build_config(self, config: dict) -> str:
+        """
+        Build the executable for a configuration in its own build slot
+        and return the path of the binary.
+        """
+        return self.build_service.build(config['executable_name'], config)
+
+    def build_sample(self, configs: List[dict]) -> Dict[str, str]:
+        """
+        Build every configuration of a Sample at once, with a single
+        config.sh and make invocation, and return the binary path of
+        each executable name.
+        """
+        return self.build_service.build_batch(
+            {config['executable_name']: config for config in configs}
+        )
+
+    def exec_single_trace(self, spec: RunSpec, champsim_bin: str) -> str:
         """
         Execute ChampSim on a single trace file with the
-        given (policy, branch, prefetch) configuration.
+        given (policy, branch, prefetch) configuration and
+        return the path of the output file. The window of
+        the spec replaces warmup_instructions and
+        simulation_instructions.
         """
+        trace_name, trace_path, output_dir = (spec.trace_name, spec.trace_path,
+                                              spec.output_dir)
+        policy, branch, prefetcher = spec.policy, spec.branch, spec.prefetcher
+        window = spec.window
+
         # Define naming for output logs
         temp_output_file = os.path.join(
-            self.output_dir,
+            output_dir,
             f"{trace_name}_pol:{policy}_bra:{branch}_pre:{prefetcher}_output.txt"
         )
         final_output_file = os.path.join(
-            self.output_dir,
+            output_dir,
             f"{trace_name}_pol:{policy}_bra:{branch}_pre:{prefetcher}_output_DONE.txt"
         )
 
-        # The final ChampSim binary path
-        champsim_bin = os.path.join(self.champ_sim_path, 'bin', self.config_bin_name)
-
-        # Build the command
-        command = [champsim_bin]
-        if self.warmup_instructions:
-            command += ["--warmup-instructions", str(self.warmup_instructions)]
-        if self.simulation_instructions:
-            command += ["--simulation-instructions", str(self.simulation_instructions)]
-        command.append(trace_path)
+        warmup_instructions, simulation_instructions = (
+            window or (self.warmup_instructions, self.simulation_instructions)
+        )
 
         print(f"Executing ChampSim for {trace_name} "
               f"(Policy={policy}, Branch={branch}, Prefetch={prefetcher})...")
 
-        # Release semaphores so that future config changes can happen
-        self.S1_replacement.release()
-        self.S2_replacement.release()
-        self.S3_replacement.release()
+        run_name = self.run_name(output_dir, trace_name, policy, prefetcher, branch)
+        self.sweep_journal.record(
+            run_name, 'running',
+            self.build_service.binary_hashes.get(os.path.basename(champsim_bin))
+        )
 
+        lease = None
         try:
+            # Read the shared decompressed copy of the trace when available
+            if self.trace_cache:
+                lease = self.trace_cache.acquire(trace_path)
+            run_trace_path = lease.path if lease else trace_path
+
+            # Build the command
+            command = [champsim_bin]
+            if warmup_instructions is not None:
+                command += ["--warmup-instructions", str(warmup_instructions)]
+            if simulation_instructions:
+                command += ["--simulation-instructions", str(simulation_instructions)]
+            command.append(run_trace_path)
+
+            # Footprints depend on the cache sizes, hence on the Sample
+            memory_key = (f"{os.path.basename(output_dir)}:"
+                          f"{os.path.basename(champsim_bin)}")
+            # Follow the heartbeats to stop the run once its IPC converged
+            monitor = (ConvergenceMonitor(temp_output_file, self.convergence,
+                                          bool(warmup_instructions))
+                       if self.convergence and not self.coordinator else None)
             with open(temp_output_file, 'w') as outfile:
-                subprocess.run(command, stdout=outfile, stderr=outfile, check=True)
-
-            # Mark the output file as DONE
-            os.rename(temp_output_file, final_output_file)
-            print(f"[DONE] {trace_name} => {final_output_file}")
-        except subprocess.CalledProcessError as e:
-            print(f"Error: ChampSim execution failed for {trace_name}. {e}")
+                try:
+                    record = self.launcher.run(
+                        memory_key, command,
+                        name=os.path.basename(final_output_file),
+                        on_start=partial(self.progress.begin, run_name,
+                                         temp_output_file, CHAMPSIM_PROGRESS),
+                        on_spawn=monitor.attach if monitor else None,
+                        trace_size=os.path.getsize(trace_path),
+                        instructions=((warmup_instructions or 0) + simulation_instructions
+                                      if simulation_instructions else None),
+                        stdout=outfile, stderr=outfile
+                    )
+                finally:
+                    if monitor:
+                        monitor.stop()
+
+            # A run terminated by the monitor succeeded
+            converged = monitor.result if monitor and record.returncode != 0 else None
+            if record.returncode != 0 and not converged:
+                raise subprocess.CalledProcessError(record.returncode, command)
+            if converged:
+                with open(temp_output_file, 'a') as outfile:
+                    outfile.write(converged.summary() + '\n')
+
+            self.runtime_history.record(os.path.basename(champsim_bin), trace_name,
+                                        RuntimeHistory.instructions(
+                                            warmup_instructions,
+                                            simulation_instructions),
+                                        record.wall_seconds,
+                                        os.path.getsize(trace_path))
+        except Exception as e:
+            if isinstance(e, subprocess.CalledProcessError):
+                print(f"Error: ChampSim execution failed for {trace_name}. {e}")
+            self.sweep_journal.record(run_name, 'failed')
+            self.progress.end(run_name, ok=False)
+            raise
         finally:
-            self.SGlobal.release()
+            if lease:
+                self.trace_cache.release(lease)
+
+        # Mark the output file as DONE
+        self.progress.end(run_name)
+        os.rename(temp_output_file, final_output_file)
+        self.completion_index.mark_done(os.path.basename(output_dir), policy,
+                                        prefetcher, branch, trace_name,
+                                        final_output_file)
+        self.sweep_journal.record(run_name, 'done')
+        print(f"[DONE] {trace_name} => {final_output_file}")
+        return final_output_file
+
+    def parse_result(
+        self,
+        output_file: str,
+        output_dir: str,
+        policy: Optional[str],
+        branch: Optional[str],
+        prefetcher: Optional[str],
+        trace_name: str,
+        wall_seconds: Optional[float] = None,
+        warmup_instructions: Optional[int] = None,
+    ) -> Optional[float]:
+        """
+        Parse a finished ChampSim output into the results store and return
+        its cumulative IPC. wall_seconds is used when ChampSim did not
+        report its own simulation time, warmup_instructions when the run
+        did not warm up for warmup_instructions of the runner.
+        """
+        with open(output_file, 'r') as file:
+            content = file.read()
+
+        stats = parse_champsim_output(content)
+        if not stats.get('wall_seconds'):
+            stats['wall_seconds'] = wall_seconds
+
+        simulated = None
+        if stats.get('instructions'):
+            if warmup_instructions is None:
+                warmup_instructions = self.warmup_instructions
+            simulated = stats['instructions'] + (warmup_instructions or 0)
+
+        self.results_store.record(os.path.basename(output_dir), policy,
+                                  prefetcher, branch, trace_name, stats,
+                                  output_file, simulated)
+
+        ipc = stats.get('ipc')
+        if ipc is None:
+            print(f"Warning: no IPC found in {output_file}")
+            return None
+
+        print(f"[IPC] {os.path.basename(output_file)}: {ipc}")
+        return ipc
 
     def verify_already_executed(
             self,
+            output_dir: str,
             policy: Optional[str], 
             prefetch: Optional[str], 
             branch: Optional[str],
             trace_name: Optional[str]
-    ) -> None:
+    ) -> bool:
         """
         Verify if this simulation was already executed
         """
-        try:
-            if not os.path.exists(self.output_dir):
-                raise UnboundLocalError
-            file_name = f"{trace_name}_pol:{policy}_bra:{branch}_pre:{prefetch}_output_DONE.txt"
-            for name in os.listdir(self.output_dir):
-                if name == file_name:
-                    print(f"File {file_name} already executed")
-                    return True
-            return False
-        except UnboundLocalError:
-            print(f"Directory not found: {self.output_dir}")
-            sys.exit(1)
-
-    def prepare_execution(
-        self,
-        executor: ThreadPoolExecutor,
-        policy: Optional[str],
-        branch: Optional[str],
-        prefetcher: Optional[str],
-    ) -> None:
-        
+        sample = os.path.basename(output_dir)
+        file_name = f"{trace_name}_pol:{policy}_bra:{branch}_pre:{prefetch}_output_DONE.txt"
+        if not self.completion_index.is_done(sample, policy, prefetch, branch,
+                                             trace_name):
+            # A run may have finished right before the index was updated
+            file_path = os.path.join(output_dir, file_name)
+            if not os.path.exists(file_path):
+                return False
+            self.completion_index.mark_done(sample, policy, prefetch, branch,
+                                            trace_name, file_path)
+        print(f"File {file_name} already executed")
+        return True
+
+    def list_traces(self) -> List[Tuple[str, str]]:
+        """
+        List the (trace name, trace path) of every trace file, the name
+        being the file name without the .xz or .champsimtrace extensions.
+        """
+        traces = []
         for trace_file in os.listdir(self.trace_dir):
-            #print(f"trace = {trace_file} and all traces are = {os.listdir(self.trace_dir)}")
             if trace_file.endswith('.champsimtrace') or trace_file.endswith('.xz'):
                 # Remove the extensions .xz or .champsimtrace
                 if trace_file.endswith('.xz'):
@@ -283,26 +568,151 @@ class ChampSimRunner:
                 elif trace_file.endswith('.champsimtrace'):
                     clean_trace_file = trace_file[:-13]
                     clean_trace_file = os.path.splitext(clean_trace_file)[0]
-                
-                    
-                   # trace_name = os.path.splitext(trace_file)[0]
-                if self.verify_already_executed(policy, prefetcher, branch, clean_trace_file):
-                    self.S2_replacement.release()
-                    self.S1_replacement.release()
-                    self.S3_replacement.release()
-                    continue
-                else:
-                    trace_path = os.path.join(self.trace_dir, trace_file)
-                    self.SGlobal.acquire()
-                    # Pass the cleaned trace file without extensions
-                    executor.submit(
-                        self.exec_single_trace,
-                        clean_trace_file,
-                        trace_path,
-                        policy,
-                        branch,
-                        prefetcher
-                    )
+
+                trace_path = os.path.join(self.trace_dir, trace_file)
+                traces.append((clean_trace_file, trace_path))
+        return traces
+
+    def pending_traces(
+        self,
+        traces: List[Tuple[str, str]],
+        output_dir: str,
+        policy: Optional[str],
+        branch: Optional[str],
+        prefetcher: Optional[str],
+    ) -> List[Tuple[str, str]]:
+        """Keep the traces that still have to be simulated."""
+        return [
+            (trace_name, trace_path) for trace_name, trace_path in traces
+            if not self.verify_already_executed(output_dir, policy, prefetcher,
+                                                branch, trace_name)
+        ]
+
+    def window(
+        self,
+        windows: Optional[Dict[str, Window]],
+        trace_name: str,
+    ) -> Window:
+        """(warmup, simulation) instructions of the runs of a trace."""
+        if windows and trace_name in windows:
+            return windows[trace_name]
+        return self.warmup_instructions, self.simulation_instructions
+
+    def prepare_execution(
+        self,
+        scheduler: DagScheduler,
+        build: Task,
+        binary: Callable[[], str],
+        family: str,
+        traces: List[Tuple[str, str]],
+        output_dir: str,
+        policy: Optional[str],
+        branch: Optional[str],
+        prefetcher: Optional[str],
+        windows: Optional[Dict[str, Window]] = None,
+    ) -> None:
+        """
+        Add to the graph one run task per trace, depending on the build of
+        the executable, and a parse task for the output of each run.
+        binary returns the executable path once the build is done, family
+        is its name, used to estimate how long each simulation will take.
+        windows gives the (warmup, simulation) instructions of the traces
+        that do not run the default ones.
+        """
+        # Longest simulations first, so none of them is left for the end
+        estimates = {
+            trace_name: self.runtime_history.estimate(
+                family, trace_name,
+                RuntimeHistory.instructions(*self.window(windows, trace_name)),
+                os.path.getsize(trace_path)
+            )
+            for trace_name, trace_path in traces
+        }
+        traces = sorted(traces, key=lambda trace: estimates[trace[0]],
+                        reverse=True)
+
+        for trace_name, trace_path in traces:
+            run_name = self.run_name(output_dir, trace_name, policy, prefetcher,
+                                     branch)
+            window = self.window(windows, trace_name)
+            spec = RunSpec(trace_name, trace_path, output_dir, policy, branch,
+                           prefetcher, window)
+
+            def run(spec=spec):
+                return self.exec_single_trace(spec, binary())
+
+            warmup_instructions, simulation_instructions = window
+            self.sweep_journal.record(run_name, 'queued')
+            self.progress.add(run_name,
+                              (warmup_instructions or 0) + simulation_instructions
+                              if simulation_instructions else None)
+            run_task = scheduler.add(run_name, run, 'run', deps=[build],
+                                     priority=estimates[trace_name])
+            self.prepare_parse(scheduler, run_task, run_name, output_dir,
+                               policy, branch, prefetcher, trace_name,
+                               warmup_instructions)
+
+    def prepare_parse(
+        self,
+        scheduler: DagScheduler,
+        run_task: Optional[Task],
+        run_name: str,
+        output_dir: str,
+        policy: Optional[str],
+        branch: Optional[str],
+        prefetcher: Optional[str],
+        trace_name: str,
+        warmup_instructions: Optional[int] = None,
+    ) -> None:
+        """
+        Add the task parsing the output of a run, after run_task, or right
+        away for a run that finished before the sweep was interrupted.
+        """
+        parse_name = f"parse:{run_name[len('run:'):]}"
+
+        def parse():
+            if run_task:
+                output_file, wall_seconds = run_task.result, run_task.duration
+            else:
+                output_file = os.path.join(
+                    output_dir,
+                    f"{trace_name}_pol:{policy}_bra:{branch}"
+                    f"_pre:{prefetcher}_output_DONE.txt"
+                )
+                wall_seconds = None
+            ipc = self.parse_result(output_file, output_dir, policy, branch,
+                                    prefetcher, trace_name, wall_seconds,
+                                    warmup_instructions)
+            self.sweep_journal.record(parse_name, 'done')
+            return ipc
+
+        self.sweep_journal.record(parse_name, 'queued')
+        scheduler.add(parse_name, parse, 'parse',
+                      deps=[run_task] if run_task else [])
+
+    def prepare_unparsed(
+        self,
+        scheduler: DagScheduler,
+        traces: List[Tuple[str, str]],
+        output_dir: str,
+        policy: Optional[str],
+        branch: Optional[str],
+        prefetcher: Optional[str],
+        windows: Optional[Dict[str, Window]] = None,
+    ) -> None:
+        """
+        Parse the outputs of the runs the journal shows as finished but
+        whose parse was interrupted, without running them again.
+        """
+        for trace_name, _ in traces:
+            run_name = self.run_name(output_dir, trace_name, policy, prefetcher,
+                                     branch)
+            parse_name = f"parse:{run_name[len('run:'):]}"
+            if (self.sweep_journal.is_done(run_name) and
+                    not self.sweep_journal.is_done(parse_name)):
+                self.prepare_parse(scheduler, None, run_name, output_dir,
+                                   policy, branch, prefetcher, trace_name,
+                                   self.window(windows, trace_name)[0])
 
     def modify_size_cache(
         self,
@@ -310,10 +720,10 @@ class ChampSimRunner:
         L1D: CacheConfig,
         L2C: CacheConfig,
         LLC: CacheConfig
-    ) -> None:
+    ) -> dict:
         """
-        Load the base config file and change the cache config
-        parameters for L1I, L1D, L2, and LLC.
+        Load the base config file and return it with the cache config
+        parameters for L1I, L1D, L2, and LLC changed.
         """
         with open(self.config_file, 'r') as file:
             config = json.load(file)
@@ -339,127 +749,328 @@ class ChampSimRunner:
             'latency': LLC.latency
         })
 
-        self.modified_config = config
+        return config
 
-    def modify_hawkeye_algorithm(self, LLC: CacheConfig) -> None:
+    def sample_combos(
+        self,
+    ) -> List[Tuple[Tuple[CacheConfig, ...],
+                    List[Tuple[Optional[str], Optional[str], Optional[str]]]]]:
         """
-        If using Hawkeye, ensure hawkeye_algorithm.cc has consistent
-        LLC_SETS and LLC_WAYS definitions with the JSON configuration.
+        Cache configurations of every Sample, with the (policy, prefetcher,
+        branch) combinations to run on it: the cross product of the lists,
+        or the points of the sweep file.
         """
-        file_path = os.path.join(self.champ_sim_path, 'replacement', 'hawkeye', 'hawkeye_algorithm.cc')
-        if not os.path.isfile(file_path):
-            # Some replacements might not exist in the repo
-            return
+        if self.sweep is None:
+            combos = list(itertools.product(self.policies or [None],
+                                            self.prefetchers or [None],
+                                            self.branch_predictors or [None]))
+            return [(sample, combos) for sample in self.Samples]
+
+        return [
+            (caches, [(point.get('policy'), point.get('prefetcher'),
+                       point.get('branch')) for point in points])
+            for caches, points in self.sweep.samples(CacheConfig)
+        ]
 
-        with open(file_path, 'r') as file:
-            content = file.read()
+    def execute_all_policies(self, trace_urls: List[str]) -> None:
+        """
+        Download the traces (if necessary), then for each sample set
+        of cache configurations, build and execute all combos of
+        replacement policy, prefetcher, and branch predictor.
+        """
+        # Ensure output directory
+        if not os.path.exists(self.output_dir_orig):
+            os.makedirs(self.output_dir_orig)
 
-        # Pattern replacements
-        sets_pattern = r"#define\s+LLC_SETS\s+NUM_CORE\s*\*\s*\d+"
-        ways_pattern = r"#define\s+LLC_WAYS\s*\d+"
+        # Download traces
+        self.download_traces(trace_urls)
+        traces = self.list_traces()
 
-        sets_replacement = f"#define LLC_SETS NUM_CORE*{LLC.sets}"
-        ways_replacement = f"#define LLC_WAYS {LLC.ways}"
+        samples = list(enumerate(self.sample_combos(), start=1))
+        if self.simpoints:
+            self.execute_simpoints(traces, samples)
+        elif self.intervals:
+            self.execute_intervals(traces, samples)
+        elif self.halving:
+            self.execute_halving(traces, samples)
+        else:
+            self.execute_sweep(traces, samples)
 
-        content = re.sub(sets_pattern, sets_replacement, content)
-        content = re.sub(ways_pattern, ways_replacement, content)
+        self.sweep_journal.close()
 
-        with open(file_path, 'w') as file:
-            file.write(content)
+        if self.coordinator:
+            self.coordinator.stop()
 
-    def modify_mockingjay(self, LLC: CacheConfig) -> None:
+    def execute_sweep(
+        self,
+        traces: List[Tuple[str, str]],
+        samples: List[Tuple[int, Tuple[Tuple[CacheConfig, ...], List[Tuple]]]],
+        rung: Optional[int] = None,
+        windows: Optional[Dict[str, Window]] = None,
+    ) -> None:
         """
-        If using mockingjay, ensure mockingjay.cc has consistent
-        LLC_SET and LLC_WAY definitions with the JSON configuration.
+        Build and run the (policy, prefetcher, branch) combinations of
+        every (index, (caches, combinations)) Sample on every trace. A
+        rung of successive halving runs in folders of its own; windows
+        gives the (warmup, simulation) instructions of the traces that do
+        not run the default ones.
         """
-        file_path = os.path.join(self.champ_sim_path, 'replacement', 'mockingjay', 'mockingjay.cc')
-        if not os.path.isfile(file_path):
-            return
+        # build(config) -> run(config, trace) -> parse(result)
+        scheduler = DagScheduler({
+            'build': self.build_slots,
+            'run': self.threads,
+            'parse': 1,
+        })
 
-        with open(file_path, 'r') as file:
-            content = file.read()
+        for index, (sample, sample_combos) in samples:
+            L1I, L1D, L2C, LLC = sample
+
+            # Each sample set has its own folder, and its own executables,
+            # so the Samples are built and simulated at the same time
+            sample_folder = os.path.join(self.output_dir_orig,
+                                         self.sample_name(index, rung))
+            if not os.path.exists(sample_folder):
+                os.makedirs(sample_folder)
+            geometry = geometry_hash(sample)
+
+            # Modify cache sizes
+            base_config = self.modify_size_cache(L1I, L1D, L2C, LLC)
+
+            # For each combination of policies/prefetchers/branch
+            # If you only want to run certain fields, you can just
+            # leave them empty or pass None to skip.
+            combos = []
+            for policy, prefetcher, branch in sample_combos:
+                pending = self.pending_traces(traces, sample_folder,
+                                              policy, branch, prefetcher)
+                finished = [trace for trace in traces if trace not in pending]
+                self.prepare_unparsed(scheduler, finished, sample_folder,
+                                      policy, branch, prefetcher, windows)
+                if not pending:
+                    # Everything was simulated, nothing to build
+                    continue
 
-        # Pattern replacements
-        set_pattern = r"#define\s+LLC_SET\s+\d+"
-        way_pattern = r"#define\s+LLC_WAY\s+\d+"
+                # Do JSON modifications on a private copy
+                config = copy.deepcopy(base_config)
+                self.modify_replacement_policy(config, policy)
+                self.modify_prefetcher(config, prefetcher)
+                self.modify_branch(config, branch)
+                self.modify_output_exec_name(
+                    config, policy, prefetcher, branch, geometry
+                )
+                combos.append((config, pending, policy, prefetcher, branch))
+
+            if not combos:
+                continue
 
-        set_replacement = f"#define LLC_SET {LLC.sets}"
-        way_replacement = f"#define LLC_WAY {LLC.ways}"
+            if self.build_mode == 'batch':
+                # One config.sh and one make for the whole matrix
+                sample_build = scheduler.add(
+                    f"build:Sample{index}",
+                    partial(self.build_sample, [combo[0] for combo in combos]),
+                    'build'
+                )
+
+            for config, pending, policy, prefetcher, branch in combos:
+                name = config['executable_name']
+                if self.build_mode == 'batch':
+                    build = sample_build
+                    binary = partial(lambda build, name: build.result[name],
+                                     build, name)
+                else:
+                    build = scheduler.add(
+                        f"build:Sample{index}:{name}",
+                        partial(self.build_config, config),
+                        'build'
+                    )
+                    binary = partial(lambda build: build.result, build)
 
-        content = re.sub(set_pattern, set_replacement, content)
-        content = re.sub(way_pattern, way_replacement, content)
+                # Simulations start as soon as their own executable is ready
+                self.prepare_execution(scheduler, build, binary, name, pending,
+                                       sample_folder, policy, branch, prefetcher,
+                                       windows)
 
-        with open(file_path, 'w') as file:
-            file.write(content)
+        self.progress.start()
+        scheduler.run()
+        self.progress.stop()
+        print(scheduler.report())
 
-    def is_already_executed(
+    def execute_simpoints(
         self,
-        policy: Optional[str],
-        prefetcher: Optional[str],
-        branch: Optional[str],
-        trace_name: str
-    ) -> bool:
+        traces: List[Tuple[str, str]],
+        samples: List[Tuple[int, Tuple[Tuple[CacheConfig, ...], List[Tuple]]]],
+    ) -> None:
         """
-        Check if the results for a particular config and trace
-        have already been produced (i.e., DONE file exists).
+        Simulate the representative slices of every trace, in parallel
+        like any trace, then store for every configuration and trace the
+        IPC of the whole trace, combined from the slices with their
+        weights.
         """
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
+        slice_dir = (self.simpoints.slice_dir or
+                     os.path.join(self.output_dir_orig, 'simpoints'))
+        planner = SimPointPlanner(slice_dir, self.simpoints, self.threads)
+        slices = planner.plan(traces, self.warmup_instructions)
+
+        self.execute_sweep(
+            [(trace_slice.name, trace_slice.path) for trace_slice in slices],
+            samples,
+            windows={trace_slice.name: (trace_slice.warmup, trace_slice.instructions)
+                     for trace_slice in slices}
+        )
+
+        for index, (_, combos) in samples:
+            sample = self.sample_name(index)
+            ipcs = self.results_store.ipcs(sample)
+            for policy, prefetcher, branch in combos:
+                for trace_name, _ in traces:
+                    trace_slices = [trace_slice for trace_slice in slices
+                                    if trace_slice.trace == trace_name]
+                    ipc = weighted_ipc(trace_slices, {
+                        trace_slice.name: ipcs.get((str(policy), str(prefetcher),
+                                                    str(branch), trace_slice.name))
+                        for trace_slice in trace_slices
+                    })
+                    if ipc is None:
+                        print(f"Warning: missing slices of {trace_name} for "
+                              f"{sample} {policy}/{prefetcher}/{branch}")
+                        continue
+                    # The row of the whole trace, next to those of its slices
+                    self.results_store.record(
+                        sample, policy, prefetcher, branch, trace_name,
+                        {'ipc': ipc, 'levels': {}},
+                        os.path.join(slice_dir, trace_name, 'simpoints.json')
+                    )
+                    print(f"[SIMPOINT] {sample} {trace_name} "
+                          f"{policy}/{prefetcher}/{branch}: weighted IPC {ipc:.4f}")
 
-        file_name = f"{trace_name}_pol:{policy}_bra:{branch}_pre:{prefetcher}_output_DONE.txt"
-        file_path = os.path.join(self.output_dir, file_name)
-        if os.path.exists(file_path):
-            print(f"[SKIP] Output already exists for {file_name}.")
-            return True
-        return False
+    def execute_intervals(
+        self,
+        traces: List[Tuple[str, str]],
+        samples: List[Tuple[int, Tuple[Tuple[CacheConfig, ...], List[Tuple]]]],
+    ) -> None:
+        """
+        Simulate the parts of every trace at the same time, then store for
+        every configuration and trace the statistics stitched from its
+        parts, with the error estimated at their boundaries.
+        """
+        slice_dir = (self.intervals.slice_dir or
+                     os.path.join(self.output_dir_orig, 'intervals'))
+        planner = IntervalPlanner(slice_dir, self.intervals)
+        parts = planner.plan(traces, self.warmup_instructions,
+                             self.simulation_instructions)
+
+        self.execute_sweep(
+            [(part.name, part.path) for part in parts],
+            samples,
+            windows={part.name: (part.warmup, part.instructions) for part in parts}
+        )
 
-    def execute_all_policies(self, trace_urls: List[str]) -> None:
+        for index, (_, combos) in samples:
+            sample = self.sample_name(index)
+            sample_folder = os.path.join(self.output_dir_orig, sample)
+            for policy, prefetcher, branch in combos:
+                for trace_name, _ in traces:
+                    trace_parts = [part for part in parts if part.trace == trace_name]
+                    contents = []
+                    for part in trace_parts:
+                        output_file = os.path.join(
+                            sample_folder,
+                            f"{part.name}_pol:{policy}_bra:{branch}"
+                            f"_pre:{prefetcher}_output_DONE.txt"
+                        )
+                        if not os.path.exists(output_file):
+                            break
+                        with open(output_file, 'r') as file:
+                            contents.append(file.read())
+
+                    stats = (stitch(trace_parts, contents, self.intervals.overlap)
+                             if len(contents) == len(trace_parts) else None)
+                    if stats is None:
+                        print(f"Warning: missing parts of {trace_name} for "
+                              f"{sample} {policy}/{prefetcher}/{branch}")
+                        continue
+                    # The row of the whole trace, next to those of its parts
+                    self.results_store.record(
+                        sample, policy, prefetcher, branch, trace_name, stats,
+                        os.path.join(slice_dir, trace_name, planner.plan_file),
+                        stats['instructions'] + (self.warmup_instructions or 0)
+                    )
+                    boundaries = ', '.join(f"{error:+.2%}"
+                                           for error in stats['boundary_errors'])
+                    print(f"[INTERVALS] {sample} {trace_name} "
+                          f"{policy}/{prefetcher}/{branch}: IPC {stats['ipc']:.4f}, "
+                          f"warmup error {stats['warmup_error']:+.2%}"
+                          f"{f' (boundaries {boundaries})' if boundaries else ''}")
+
+    @staticmethod
+    def sample_name(index: int, rung: Optional[int] = None) -> str:
+        """Folder of a Sample, of one of its halving rungs if given."""
+        return f"Sample{index}_rung{rung}" if rung else f"Sample{index}"
+
+    def execute_halving(
+        self,
+        traces: List[Tuple[str, str]],
+        samples: List[Tuple[int, Tuple[Tuple[CacheConfig, ...], List[Tuple]]]],
+    ) -> None:
         """
-        Download the traces (if necessary), then for each sample set
-        of cache configurations, build and execute all combos of
-        replacement policy, prefetcher, and branch predictor.
+        Successive halving over every configuration (Sample, policy,
+        prefetcher and branch): each rung runs the remaining ones on a
+        longer window, ranks them by geomean IPC over the traces and
+        promotes the best 1/eta, until min_survivors are left. The last
+        rung is simulated at full length in the usual Sample folders; the
+        runs of the configurations dropped on the way are journaled as
+        pruned.
         """
-        # Ensure output directory
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
+        rungs = self.halving.windows(self.simulation_instructions)
+        rung = 1
+        while True:
+            instructions = rungs[rung - 1]
+            last = rung == len(rungs)
+            count = sum(len(combos) for _, (_, combos) in samples)
+            print(f"[HALVING] Rung {rung}/{len(rungs)}: {count} configurations, "
+                  f"{instructions} instructions")
+            self.execute_sweep(traces, samples, None if last else rung,
+                               {trace_name: (self.warmup_instructions, instructions)
+                                for trace_name, _ in traces})
+            if last:
+                return
+
+            # Geomean IPC of every configuration over the traces
+            scores = {}
+            for index, (_, combos) in samples:
+                ipcs = self.results_store.ipcs(self.sample_name(index, rung))
+                for combo in combos:
+                    policy, prefetcher, branch = combo
+                    scores[(index, combo)] = geomean([
+                        ipcs.get((str(policy), str(prefetcher), str(branch),
+                                  trace_name))
+                        for trace_name, _ in traces
+                    ])
+
+            promoted, pruned = rank(scores, self.halving.survivors(len(scores)))
+            for index, (policy, prefetcher, branch) in pruned:
+                score = scores[(index, (policy, prefetcher, branch))]
+                print(f"[PRUNED] Sample{index} {policy}/{prefetcher}/{branch} "
+                      f"at rung {rung} (geomean IPC {score})")
+                for trace_name, _ in traces:
+                    self.sweep_journal.record(
+                        self.run_name(self.sample_name(index), trace_name,
+                                      policy, prefetcher, branch),
+                        'pruned', rung=rung, instructions=instructions,
+                        geomean_ipc=score
+                    )
 
-        # Download traces
-        self.download_traces(trace_urls)
+            promoted = set(promoted)
+            samples = [
+                (index, (sample, [combo for combo in combos
+                                  if (index, combo) in promoted]))
+                for index, (sample, combos) in samples
+            ]
+            samples = [entry for entry in samples if entry[1][1]]
 
-        with ThreadPoolExecutor(max_workers=self.threads) as executor:
-            for index, sample in enumerate(self.Samples, start=1):
-                L1I, L1D, L2C, LLC = sample
-
-                # Each sample set has its own folder
-                sample_folder = os.path.join(self.output_dir_orig, f"Sample{index}")
-                if not os.path.exists(sample_folder):
-                    os.makedirs(sample_folder)
-                self.output_dir = sample_folder
-
-                # Modify cache sizes
-                self.modify_size_cache(L1I, L1D, L2C, LLC)
-                # If we are using hawkeye or mockingjay, we fix them too
-                self.modify_hawkeye_algorithm(LLC)
-                self.modify_mockingjay(LLC)
-
-                # For each combination of policies/prefetchers/branch
-                # If you only want to run certain fields, you can just
-                # leave them empty or pass None to skip.
-                for policy in self.policies or [None]:
-                    for prefetcher in self.prefetchers or [None]:
-                        for branch in self.branch_predictors or [None]:
-                            # Do JSON modifications
-                            self.modify_replacement_policy(policy)
-                            self.modify_prefetcher(prefetcher)
-                            self.modify_branch(branch)
-
-                            self.modify_output_exec_name(
-                                policy, prefetcher, branch
-                            )
-                            self.write_modified_config(self.config_file)
-
-                            # Launch parallel jobs for each trace
-                            self.prepare_execution(executor, policy, branch, prefetcher)
+            # Nothing left to rank, the survivors go to full length
+            rung = (len(rungs) if len(promoted) <= self.halving.min_survivors
+                    else rung + 1)
 
 
 def main() -> None:
@@ -523,6 +1134,74 @@ def main() -> None:
     branches = ["bimodal", "gshare", "tage"]
     
     
+    # Persistent cache of built executables, set to None to always rebuild
+    binary_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                    'bin_cache')
+
+    # 'isolated' builds executables one by one in parallel slots, 'batch'
+    # builds all the executables of a Sample with one config.sh and make
+    build_mode = 'isolated'
+
+    # Decompress each .xz trace once into a scratch directory (ideally a
+    # tmpfs) shared by all the simulations, None to disable
+    trace_cache_dir = None  # e.g. '/dev/shm/champsim_traces'
+    trace_cache_quota = 32 << 30  # bytes
+
+    # Traces downloaded at the same time, a local directory searched before
+    # the network and a file of expected sizes/checksums (None to skip)
+    download_workers = 4
+    trace_mirror_dir = None
+    trace_manifest = None
+
+    # Durations of past runs, kept across sweeps to start long runs first
+    runtime_history_path = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'runtime_history.jsonl'
+    )
+
+    # Memory the simulations may use together (bytes), None for 90% of
+    # the memory available when the sweep starts
+    memory_budget = None
+
+    # Pin every simulation to its own core (sibling-free when possible),
+    # with its memory bound to the local NUMA node; off unless set here
+    pin_cores = False
+
+    # Serve the simulations to workers on other hosts (started with
+    # python3 -m common.distributed http://<this host>:8765), e.g.
+    # '10.0.0.1:8765' for the address of this host on a trusted network
+    # (':8765' only listens on 127.0.0.1); threads is then the number of
+    # runs in flight
+    coordinator = None
+
+    # JSON/YAML sweep specification (cartesian and zipped axes, exclusions,
+    # random or Latin hypercube sampling) replacing the lists above and the
+    # cache configurations below, e.g. 'sweep.json'; see common/sweep.py
+    sweep_file = None
+
+    # Stop a simulation once its heartbeat IPC is stable (results are then
+    # marked converged_early with their confidence), None to always run
+    # every instruction, e.g. ConvergencePolicy(window=10, tolerance=0.01,
+    # confidence=0.95, min_instructions=100_000_000)
+    convergence = None
+
+    # Successive halving: run every configuration on short windows and
+    # only the best ones (geomean IPC over the traces) up to the full
+    # simulation_instructions, None to run everything at full length,
+    # e.g. HalvingPolicy(min_instructions=10_000_000, eta=3)
+    halving = None
+
+    # Simulate a few representative slices of each trace (SimPoint basic
+    # block vectors clustered over fixed intervals) and weight their IPC,
+    # None to simulate the traces, e.g. SimPointPolicy(interval=10_000_000)
+    simpoints = None
+
+    # Split the simulated instructions of each trace into windows run at
+    # the same time, each warmed up on its own, and stitch their results
+    # (with the error estimated where they overlap), None to run each
+    # trace in one piece, e.g. IntervalPolicy(parts=8, warmup=50_000_000,
+    # overlap=50_000_000), the overlap spanning a few heartbeats
+    intervals = None
+
     # Example cache configurations
     L1I_config = [
         CacheConfig(64, 8, 4),
@@ -556,7 +1235,23 @@ def main() -> None:
         L1I_Config=L1I_config,
         L1D_Config=L1D_config,
         L2_Config=L2_config,
-        LLC_Config=LLC_config
+        LLC_Config=LLC_config,
+        binary_cache_dir=binary_cache_dir,
+        build_mode=build_mode,
+        trace_cache_dir=trace_cache_dir,
+        trace_cache_quota=trace_cache_quota,
+        download_workers=download_workers,
+        trace_mirror_dir=trace_mirror_dir,
+        trace_manifest=trace_manifest,
+        runtime_history_path=runtime_history_path,
+        memory_budget=memory_budget,
+        pin_cores=pin_cores,
+        coordinator=coordinator,
+        sweep_file=sweep_file,
+        convergence=convergence,
+        halving=halving,
+        simpoints=simpoints,
+        intervals=intervals
     )
 
     # Execute all policies for the given traces
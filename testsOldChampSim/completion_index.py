@@ -0,0 +1,122 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Set, Tuple
+
+
+# <trace>_pol:<policy>_bra:<branch>_pre:<prefetcher>_output_DONE.txt
+DONE_PATTERN = re.compile(
+    r"^(?P<trace>.*)_pol:(?P<policy>.*)_bra:(?P<branch>.*)"
+    r"_pre:(?P<prefetcher>.*)_output_DONE\.txt$"
+)
+
+Key = Tuple[str, str, str, str, str]
+
+
+class CompletionIndex:
+    """
+    Index of the simulations that already finished, so resuming a sweep
+    does not have to list the output folders once per trace.
+
+    Runs are keyed by (sample, policy, prefetcher, branch, trace) and kept
+    in a SQLite database at the root of the output directory. The keys are
+    loaded in memory once, so lookups are constant time. When the database
+    does not exist yet, it is rebuilt by scanning each Sample folder once
+    for _DONE.txt files; delete it to force a new scan.
+
+    Attributes:
+        output_dir (str): Top-level output directory holding the Samples.
+        db_path (str): Path of the SQLite database.
+    """
+
+    def __init__(self, output_dir: str, db_name: str = 'completion.db'):
+        self.output_dir = output_dir
+        self.db_path = os.path.join(output_dir, db_name)
+
+        os.makedirs(output_dir, exist_ok=True)
+        rebuild = not os.path.exists(self.db_path)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS completed ("
+            " sample TEXT, policy TEXT, prefetcher TEXT, branch TEXT,"
+            " trace TEXT, output_file TEXT, finished_at REAL,"
+            " PRIMARY KEY (sample, policy, prefetcher, branch, trace))"
+        )
+        self.connection.commit()
+
+        if rebuild:
+            self.rebuild()
+
+        self.done: Set[Key] = set(self.connection.execute(
+            "SELECT sample, policy, prefetcher, branch, trace FROM completed"
+        ))
+
+    @staticmethod
+    def key(
+        sample: str,
+        policy: Optional[str],
+        prefetcher: Optional[str],
+        branch: Optional[str],
+        trace_name: str,
+    ) -> Key:
+        # None is spelled the way it appears in the output file names
+        return (sample, str(policy), str(prefetcher), str(branch), trace_name)
+
+    def rebuild(self) -> int:
+        """
+        Fill the index from the _DONE.txt files of every Sample folder and
+        return the number of runs found.
+        """
+        rows = []
+        for sample in os.scandir(self.output_dir):
+            if not sample.is_dir():
+                continue
+            for entry in os.scandir(sample.path):
+                match = DONE_PATTERN.match(entry.name)
+                if match:
+                    rows.append((sample.name, match['policy'], match['prefetcher'],
+                                 match['branch'], match['trace'], entry.path,
+                                 entry.stat().st_mtime))
+
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO completed VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.connection.commit()
+        print(f"[INFO] Indexed {len(rows)} finished runs from {self.output_dir}")
+        return len(rows)
+
+    def is_done(
+        self,
+        sample: str,
+        policy: Optional[str],
+        prefetcher: Optional[str],
+        branch: Optional[str],
+        trace_name: str,
+    ) -> bool:
+        return self.key(sample, policy, prefetcher, branch, trace_name) in self.done
+
+    def mark_done(
+        self,
+        sample: str,
+        policy: Optional[str],
+        prefetcher: Optional[str],
+        branch: Optional[str],
+        trace_name: str,
+        output_file: str,
+    ) -> None:
+        """Record a finished run."""
+        key = self.key(sample, policy, prefetcher, branch, trace_name)
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO completed VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (output_file, time.time())
+            )
+            self.connection.commit()
+            self.done.add(key)
@@ -0,0 +1,213 @@
+import os
+import re
+import math
+import signal
+import statistics
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+HEARTBEAT_PATTERN = re.compile(
+    r"Heartbeat CPU (\d+) instructions: (\d+) cycles: (\d+)"
+)
+WARMUP_PATTERN = re.compile(
+    r"Warmup (?:finished|complete) CPU (\d+) instructions: (\d+) cycles: (\d+)"
+)
+
+
+@dataclass
+class ConvergencePolicy:
+    """
+    When a ChampSim run may be stopped before its last instruction.
+
+    Attributes:
+        window (int): Number of heartbeats the IPC must be stable over.
+        tolerance (float): Largest relative change of the IPC over the
+            window, and half-width of the confidence interval.
+        confidence (float): Smallest probability, estimated from the
+            heartbeat IPCs of the window, that the IPC is within tolerance.
+        min_instructions (int): Instructions simulated after the warmup
+            before a run may stop.
+        poll (float): Seconds between two reads of the output.
+    """
+    window: int = 10
+    tolerance: float = 0.01
+    confidence: float = 0.95
+    min_instructions: int = 100_000_000
+    poll: float = 5.0
+
+    def __post_init__(self):
+        if self.window < 2:
+            raise ValueError("Convergence needs a window of at least 2 heartbeats")
+        if self.tolerance <= 0 or not 0 < self.confidence < 1:
+            raise ValueError("Convergence needs a positive tolerance and a "
+                             "confidence between 0 and 1")
+
+
+@dataclass
+class Convergence:
+    """
+    Statistics of the Region of Interest of a run stopped early. ChampSim
+    only prints its cache statistics at the end of a run, so a run stopped
+    early has its IPC, instructions and cycles but no per-level statistics.
+    """
+    instructions: int
+    cycles: int
+    ipc: float
+    confidence: float
+
+    def summary(self, cpu: int = 0) -> str:
+        """Line appended to the output, read back by parse_champsim_output."""
+        return (f"Converged early CPU {cpu} instructions: {self.instructions} "
+                f"cycles: {self.cycles} cumulative IPC: {self.ipc:.6g} "
+                f"confidence: {self.confidence:.4f}")
+
+
+@dataclass
+class CpuProgress:
+    """Heartbeats of one CPU since the end of the warmup."""
+    start_instructions: int = 0
+    start_cycles: int = 0
+    last_instructions: int = 0
+    last_cycles: int = 0
+    ipcs: List[float] = field(default_factory=list)
+    cumulative: List[float] = field(default_factory=list)
+    converged: Optional[Convergence] = None
+
+
+class ConvergenceMonitor:
+    """
+    Follows the output of a running ChampSim process and stops it once the
+    IPC of every CPU has stabilized.
+
+    Each heartbeat gives the IPC of the last interval and the IPC of the
+    Region of Interest so far (both computed from the instruction and
+    cycle counts, after the warmup when there is one). A CPU has converged
+    once it simulated min_instructions and, over the last window
+    heartbeats, its cumulative IPC moved by less than tolerance and the
+    interval IPCs put it within tolerance with the required confidence
+    (normal approximation of their mean). The process is then terminated
+    and the statistics at that point are kept in result.
+
+    Attributes:
+        output_file (str): File ChampSim writes its output to.
+        policy (ConvergencePolicy): When to stop.
+        warmup (bool): Ignore the heartbeats before the end of the warmup.
+        result (Optional[Convergence]): Set once the run was stopped.
+    """
+
+    def __init__(self, output_file: str, policy: ConvergencePolicy, warmup: bool):
+        self.output_file = output_file
+        self.policy = policy
+        self.warmup = warmup
+        self.result: Optional[Convergence] = None
+
+        self.cpus: Dict[int, CpuProgress] = {}
+        self.warmed_up: Dict[int, bool] = {}
+        self.pid: Optional[int] = None
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self.follow, daemon=True)
+
+    def attach(self, pid: int) -> None:
+        """Start following the output of the process pid."""
+        self.pid = pid
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop following once the process exited."""
+        self.finished.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def confidence(self, progress: CpuProgress) -> float:
+        window = progress.ipcs[-self.policy.window:]
+        mean = statistics.fmean(window)
+        error = statistics.stdev(window) / math.sqrt(len(window))
+        if error == 0:
+            return 1.0
+        return math.erf(self.policy.tolerance * mean / (error * math.sqrt(2)))
+
+    def feed(self, line: str) -> bool:
+        """Account for one line of output, return True once converged."""
+        warmup = WARMUP_PATTERN.search(line)
+        if warmup:
+            cpu = int(warmup.group(1))
+            self.warmed_up[cpu] = True
+            self.cpus[cpu] = CpuProgress(
+                start_instructions=int(warmup.group(2)),
+                start_cycles=int(warmup.group(3)),
+                last_instructions=int(warmup.group(2)),
+                last_cycles=int(warmup.group(3)),
+            )
+            return False
+
+        heartbeat = HEARTBEAT_PATTERN.search(line)
+        if not heartbeat:
+            return False
+        cpu = int(heartbeat.group(1))
+        if self.warmup and not self.warmed_up.get(cpu):
+            return False
+
+        instructions, cycles = int(heartbeat.group(2)), int(heartbeat.group(3))
+        progress = self.cpus.setdefault(cpu, CpuProgress())
+        if cycles <= progress.last_cycles or cycles <= progress.start_cycles:
+            return False
+
+        progress.ipcs.append((instructions - progress.last_instructions) /
+                             (cycles - progress.last_cycles))
+        progress.cumulative.append((instructions - progress.start_instructions) /
+                                   (cycles - progress.start_cycles))
+        progress.last_instructions, progress.last_cycles = instructions, cycles
+
+        simulated = instructions - progress.start_instructions
+        window = self.policy.window
+        if (progress.converged is None and
+                simulated >= self.policy.min_instructions and
+                len(progress.cumulative) > window):
+            ipc = progress.cumulative[-1]
+            drift = abs(ipc - progress.cumulative[-window - 1]) / ipc if ipc else 1.0
+            confidence = self.confidence(progress)
+            if drift <= self.policy.tolerance and confidence >= self.policy.confidence:
+                progress.converged = Convergence(
+                    instructions=simulated,
+                    cycles=cycles - progress.start_cycles,
+                    ipc=ipc,
+                    confidence=confidence,
+                )
+
+        return all(progress.converged for progress in self.cpus.values())
+
+    def follow(self) -> None:
+        try:
+            self.read_output()
+        except Exception as e:
+            # The run goes on to its end, unmonitored
+            print(f"[WARNING] Convergence monitoring of "
+                  f"{os.path.basename(self.output_file)} stopped: {e}")
+
+    def read_output(self) -> None:
+        with open(self.output_file, 'r') as file:
+            pending = ''
+            while True:
+                done = self.finished.is_set()
+                pending += file.read()
+                *lines, pending = pending.split('\n')
+                for line in lines:
+                    if self.feed(line):
+                        self.terminate()
+                        return
+                if done:
+                    return
+                self.finished.wait(self.policy.poll)
+
+    def terminate(self) -> None:
+        # The results store keeps the statistics of the first CPU
+        self.result = self.cpus[min(self.cpus)].converged
+        print(f"[CONVERGED] {os.path.basename(self.output_file)}: IPC "
+              f"{self.result.ipc:.4f} after {self.result.instructions} "
+              f"instructions (confidence {self.result.confidence:.3f})")
+        try:
+            os.kill(self.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
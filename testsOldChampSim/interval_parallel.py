@@ -0,0 +1,234 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from convergence import HEARTBEAT_PATTERN, WARMUP_PATTERN
+from results_store import IPC_PATTERN, parse_champsim_output
+from simpoints import RECORD, SlicePlanner, TraceSlice, open_trace, write_slices
+from trace_cache import uncompressed_size
+
+
+@dataclass
+class IntervalPolicy:
+    """
+    Interval-parallel simulation of each trace.
+
+    Attributes:
+        parts (int): Windows the simulated instructions are split into.
+        warmup (int): Instructions warming up every window but the first,
+            which keeps the warmup_instructions of the runner.
+        overlap (int): Instructions every window but the last simulates
+            past its end, also simulated cold by the next window, to
+            estimate the error left by the warmup. It should span a few
+            heartbeats: the default is five of the default
+            heartbeat_frequency (10M instructions).
+        slice_dir (Optional[str]): Directory of the windows cut out of the
+            traces, by default intervals in the output directory.
+    """
+    parts: int = 8
+    warmup: int = 50_000_000
+    overlap: int = 50_000_000
+    slice_dir: Optional[str] = None
+
+    def __post_init__(self):
+        if self.parts < 1:
+            raise ValueError("Interval-parallel simulation needs at least one part")
+        if self.warmup < 0 or self.overlap < 0:
+            raise ValueError("Interval-parallel warmup and overlap cannot be negative")
+
+
+def trace_instructions(trace_path: str) -> int:
+    """
+    Instructions of a trace, from the size of an uncompressed one or the
+    index of an .xz file, which is read through if xz is not available.
+    """
+    if not trace_path.endswith('.xz'):
+        return os.path.getsize(trace_path) // RECORD.size
+    size = uncompressed_size(trace_path)
+    if size is None:
+        size = 0
+        with open_trace(trace_path) as trace:
+            while True:
+                data = trace.read(16 << 20)
+                if not data:
+                    break
+                size += len(data)
+    return size // RECORD.size
+
+
+class IntervalPlanner(SlicePlanner):
+    """
+    Splits the simulated instructions of each trace into parts simulated
+    at the same time.
+
+    The warmup_instructions + simulation_instructions window of a run is
+    cut into policy.parts windows. The first one is the trace itself with
+    the usual warmup; every other one is a slice of the trace (xz
+    compressed) starting policy.warmup instructions before its window.
+    Every window but the last also runs policy.overlap instructions into
+    the next one, so each boundary is simulated both warm and right after
+    a warmup. Parts are named <trace>_part<i>.
+
+    Attributes:
+        slice_dir (str): Directory of the slices, one folder per trace.
+        policy (IntervalPolicy): Number of parts, warmup and overlap.
+    """
+    plan_file = 'parts.json'
+
+    def parts(
+        self,
+        trace_name: str,
+        trace_path: str,
+        warmup: int,
+        instructions: int,
+    ) -> List[TraceSlice]:
+        folder = os.path.join(self.slice_dir, trace_name)
+        os.makedirs(folder, exist_ok=True)
+
+        count = self.policy.parts
+        length = instructions // count
+
+        # A trace shorter than the parts needs is run whole
+        last_end = warmup + instructions + (self.policy.overlap if count > 1 else 0)
+        if count > 1 and trace_instructions(trace_path) < last_end:
+            print(f"[INTERVALS] {trace_name} is too short to be split")
+            count, length = 1, instructions
+
+        parts = []
+        for index in range(count):
+            begin = warmup + index * length
+            own = length if index < count - 1 else warmup + instructions - begin
+            part_warmup = warmup if index == 0 else min(self.policy.warmup, begin)
+            name = f"{trace_name}_part{index}"
+            parts.append(TraceSlice(
+                name=name, trace=trace_name,
+                path=(trace_path if index == 0 else
+                      os.path.join(folder, f"{name}.champsimtrace.xz")),
+                start=begin - part_warmup, warmup=part_warmup,
+                instructions=own + (self.policy.overlap if index < count - 1 else 0),
+                weight=own / instructions,
+            ))
+
+        # The first part reads the trace itself
+        if len(parts) > 1:
+            write_slices(trace_path, parts[1:])
+        return parts
+
+    def plan(
+        self,
+        traces: List[Tuple[str, str]],
+        warmup: Optional[int],
+        instructions: int,
+    ) -> List[TraceSlice]:
+        """Parts of every (trace name, trace path), cutting new traces."""
+        warmup = warmup or 0
+        parts: List[TraceSlice] = []
+        for trace_name, trace_path in traces:
+            known = self.load(trace_name, trace_path, warmup)
+            if known is None:
+                known = self.parts(trace_name, trace_path, warmup, instructions)
+                self.save(trace_name, trace_path, warmup, known)
+                print(f"[INTERVALS] {trace_name}: {len(known)} parts")
+            parts += known
+        return parts
+
+
+def progress_points(content: str) -> List[Tuple[int, int]]:
+    """
+    (instructions, cycles) of CPU 0 from the end of the warmup to the end
+    of the Region of Interest, counted from the start of the run.
+    """
+    start = (0, 0)
+    for match in WARMUP_PATTERN.finditer(content):
+        if match.group(1) == '0':
+            start = (int(match.group(2)), int(match.group(3)))
+
+    points = [start]
+    for match in HEARTBEAT_PATTERN.finditer(content):
+        point = (int(match.group(2)), int(match.group(3)))
+        if match.group(1) == '0' and point[0] > points[-1][0]:
+            points.append(point)
+
+    roi = content.find("Region of Interest Statistics")
+    end = IPC_PATTERN.search(content[roi:] if roi >= 0 else content)
+    if end:
+        end_point = (start[0] + int(end.group(2)), start[1] + int(end.group(3)))
+        points = [point for point in points if point[0] < end_point[0]] + [end_point]
+    return points
+
+
+def cycles_at(points: List[Tuple[int, int]], instructions: float) -> float:
+    """Cycle count at an instruction count, between the two closest points."""
+    if instructions <= points[0][0]:
+        return float(points[0][1])
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        if instructions <= x1:
+            return y0 + (y1 - y0) * (instructions - x0) / (x1 - x0)
+    return float(points[-1][1])
+
+
+def stitch(parts: List[TraceSlice], contents: List[str], overlap: int) -> Optional[Dict]:
+    """
+    Statistics of a whole run from the outputs of its parts: instructions
+    and cycles of every window (without its overlap) are added up, cache
+    statistics are added up (overlaps included, so their MPKI is over every
+    instruction simulated, overlaps included) and branch statistics
+    averaged over the instructions. warmup_error is the share of the
+    cycles by which the boundaries simulated right after a warmup differ
+    from the same instructions simulated warm, boundary_errors the
+    relative difference at each boundary.
+    """
+    last = len(parts) - 1
+    stitched: Dict = {'levels': {}, 'boundary_errors': []}
+    instructions = cycles = error_cycles = 0.0
+    simulated = 0
+    branch_accuracy = branch_mpki = 0.0
+    warm_overlap = None
+    wall_seconds = []
+
+    for index, (part, content) in enumerate(zip(parts, contents)):
+        stats = parse_champsim_output(content)
+        if stats.get('ipc') is None:
+            return None
+        points = progress_points(content)
+        begin = points[0][0]
+        own = part.instructions - (overlap if index < last else 0)
+
+        instructions += own
+        simulated += part.instructions
+        cycles += cycles_at(points, begin + own) - points[0][1]
+
+        # The same boundary, cold in this part and warm in the previous one
+        if index > 0 and warm_overlap:
+            cold_overlap = cycles_at(points, begin + overlap) - points[0][1]
+            error_cycles += cold_overlap - warm_overlap
+            stitched['boundary_errors'].append((cold_overlap - warm_overlap) / warm_overlap)
+        if index < last:
+            warm_overlap = (cycles_at(points, begin + own + overlap) -
+                            cycles_at(points, begin + own))
+
+        branch_accuracy += stats.get('branch_accuracy', 0.0) * own
+        branch_mpki += stats.get('branch_mpki', 0.0) * own
+        if stats.get('wall_seconds'):
+            wall_seconds.append(stats['wall_seconds'])
+        for name, level in stats['levels'].items():
+            total = stitched['levels'].setdefault(name, {})
+            for field, value in level.items():
+                if field != 'mpki':
+                    total[field] = total.get(field, 0) + value
+
+    for level in stitched['levels'].values():
+        if 'miss' in level:
+            level['mpki'] = level['miss'] * 1000.0 / simulated
+
+    stitched.update({
+        'ipc': instructions / cycles,
+        'instructions': int(instructions),
+        'cycles': int(round(cycles)),
+        'branch_accuracy': branch_accuracy / instructions,
+        'branch_mpki': branch_mpki / instructions,
+        # The parts run at the same time
+        'wall_seconds': max(wall_seconds) if wall_seconds else None,
+        'warmup_error': error_cycles / cycles,
+    })
+    return stitched
@@ -1,9 +1,13 @@
 import os
 import re
+import sys
 import matplotlib.pyplot as plt
 from collections import defaultdict
 import matplotlib.patches as patches  # For drawing rectangles as limiters
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from results_store import load_results
+
 # Define directories and file paths
 Sample = '2'
 trace_path = 'convolution'
@@ -12,41 +16,52 @@ input_dir = f'../sim_outputs/Sample{Sample}/'
 # Initialize data structure to store results
 data = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))  # {trace: {policy: {branch_prefetcher: IPC value}}}
 
-# Parse files
-for file_name in os.listdir(input_dir):
-    if file_name.endswith(".txt"):
-        with open(os.path.join(input_dir, file_name), 'r') as file:
-            content = file.read()
-
-            # Extract trace name
-            trace_match = re.search(r"(.*?)_pol:", file_name)
-            if not trace_match:
-                continue
-            trace = trace_match.group(1)
+# Results parsed by champsim.py as runs finish
+results_db = os.path.join(input_dir, '..', 'results.db')
+
+# SimPoint slices and interval parts are left out, their whole trace has its own row
+runs = (load_results(results_db, sample=f'Sample{Sample}').dropna(subset=['ipc'])
+        if os.path.exists(results_db) else None)
+
+if runs is not None and not runs.empty:
+    for run in runs.itertuples():
+        data[run.trace][run.policy][f"{run.branch}_{run.prefetcher}"] = run.ipc
+else:
+    # Outputs produced before the results store, parse the files
+    for file_name in os.listdir(input_dir):
+        if file_name.endswith(".txt"):
+            with open(os.path.join(input_dir, file_name), 'r') as file:
+                content = file.read()
+
+                # Extract trace name
+                trace_match = re.search(r"(.*?)_pol:", file_name)
+                if not trace_match:
+                    continue
+                trace = trace_match.group(1)
 
-            # Extract policy
-            policy_match = re.search(r"pol:(.*?)_bra:", file_name)
-            if not policy_match:
-                continue
-            policy = policy_match.group(1)
+                # Extract policy
+                policy_match = re.search(r"pol:(.*?)_bra:", file_name)
+                if not policy_match:
+                    continue
+                policy = policy_match.group(1)
 
-            # Extract branch predictor
-            branch_match = re.search(r"bra:(.*?)_pre:", file_name)
-            if not branch_match:
-                continue
-            branch = branch_match.group(1)
+                # Extract branch predictor
+                branch_match = re.search(r"bra:(.*?)_pre:", file_name)
+                if not branch_match:
+                    continue
+                branch = branch_match.group(1)
 
-            # Extract prefetcher
-            prefetcher_match = re.search(r"pre:(.*?)_output_DONE.txt", file_name)
-            if not prefetcher_match:
-                continue
-            prefetcher = prefetcher_match.group(1)
+                # Extract prefetcher
+                prefetcher_match = re.search(r"pre:(.*?)_output_DONE.txt", file_name)
+                if not prefetcher_match:
+                    continue
+                prefetcher = prefetcher_match.group(1)
 
-            # Extract IPC value
-            ipc_match = re.search(r"CPU 0 cumulative IPC: ([\d\.]+)", content)
-            if ipc_match:
-                ipc = float(ipc_match.group(1))
-                data[trace][policy][f"{branch}_{prefetcher}"] = ipc
+                # Extract IPC value
+                ipc_match = re.search(r"CPU 0 cumulative IPC: ([\d\.]+)", content)
+                if ipc_match:
+                    ipc = float(ipc_match.group(1))
+                    data[trace][policy][f"{branch}_{prefetcher}"] = ipc
 
 def plot_everyone():
         
@@ -0,0 +1,238 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+# Cache and TLB levels reported by ChampSim, with or without a cpu0_ prefix
+LEVEL_PATTERN = re.compile(
+    r"^(?:cpu\d+_)?(?P<level>\w+) TOTAL\s+ACCESS:\s+(?P<access>\d+)"
+    r"\s+HIT:\s+(?P<hit>\d+)\s+MISS:\s+(?P<miss>\d+)",
+    re.MULTILINE
+)
+PREFETCH_PATTERN = re.compile(
+    r"^(?:cpu\d+_)?(?P<level>\w+) PREFETCH\s+REQUESTED:\s+(?P<requested>\d+)"
+    r"\s+ISSUED:\s+(?P<issued>\d+)\s+USEFUL:\s+(?P<useful>\d+)"
+    r"\s+USELESS:\s+(?P<useless>\d+)",
+    re.MULTILINE
+)
+IPC_PATTERN = re.compile(
+    r"CPU 0 cumulative IPC: ([\d\.]+) instructions: (\d+) cycles: (\d+)"
+)
+BRANCH_PATTERN = re.compile(
+    r"CPU 0 Branch Prediction Accuracy: ([\d\.]+)% MPKI: ([\d\.]+)"
+)
+CONVERGED_PATTERN = re.compile(
+    r"Converged early CPU 0 instructions: (\d+) cycles: (\d+) "
+    r"cumulative IPC: ([\d\.e+-]+) confidence: ([\d\.]+)"
+)
+SIMULATION_TIME_PATTERN = re.compile(
+    r"Simulation time: (\d+) hr (\d+) min (\d+) sec"
+)
+
+RUN_COLUMNS = [
+    'sample', 'policy', 'prefetcher', 'branch', 'trace',
+    'ipc', 'instructions', 'cycles', 'branch_accuracy', 'branch_mpki',
+    'wall_seconds', 'instructions_per_second', 'output_file', 'recorded_at',
+    'converged_early', 'confidence', 'warmup_error',
+]
+# Traces of SimPoint slices (<trace>_sp<N>) and interval parts (<trace>_part<N>)
+SLICE_PATTERN = re.compile(r"_(?:sp|part)\d+$")
+LEVEL_COLUMNS = [
+    'sample', 'policy', 'prefetcher', 'branch', 'trace', 'level',
+    'access', 'hit', 'miss', 'mpki',
+    'pf_requested', 'pf_issued', 'pf_useful', 'pf_useless',
+]
+
+
+def parse_champsim_output(content: str) -> Dict:
+    """
+    Extract the statistics of a finished ChampSim output: IPC, branch
+    accuracy and MPKI, and the hits, misses, MPKI and prefetch usefulness
+    of every cache level. Only the Region of Interest is considered when
+    the output has one. A run stopped by the convergence monitor only has
+    the IPC, instructions and cycles it converged to, with converged_early
+    and its confidence.
+    """
+    roi = content.find("Region of Interest Statistics")
+    stats = content[roi:] if roi >= 0 else content
+
+    result: Dict = {'levels': {}}
+
+    ipc_match = IPC_PATTERN.search(stats)
+    if ipc_match:
+        result['ipc'] = float(ipc_match.group(1))
+        result['instructions'] = int(ipc_match.group(2))
+        result['cycles'] = int(ipc_match.group(3))
+
+    converged_match = CONVERGED_PATTERN.search(content)
+    if converged_match and not ipc_match:
+        result['instructions'] = int(converged_match.group(1))
+        result['cycles'] = int(converged_match.group(2))
+        result['ipc'] = float(converged_match.group(3))
+        result['confidence'] = float(converged_match.group(4))
+        result['converged_early'] = True
+
+    branch_match = BRANCH_PATTERN.search(stats)
+    if branch_match:
+        result['branch_accuracy'] = float(branch_match.group(1))
+        result['branch_mpki'] = float(branch_match.group(2))
+
+    # ChampSim's own wall clock, printed with the heartbeats and at the end
+    times = SIMULATION_TIME_PATTERN.findall(content)
+    if times:
+        hours, minutes, seconds = (int(value) for value in times[-1])
+        result['wall_seconds'] = float(hours * 3600 + minutes * 60 + seconds)
+
+    instructions = result.get('instructions')
+    for match in LEVEL_PATTERN.finditer(stats):
+        level = result['levels'].setdefault(match['level'], {})
+        level['access'] = int(match['access'])
+        level['hit'] = int(match['hit'])
+        level['miss'] = int(match['miss'])
+        if instructions:
+            level['mpki'] = level['miss'] * 1000.0 / instructions
+
+    for match in PREFETCH_PATTERN.finditer(stats):
+        level = result['levels'].setdefault(match['level'], {})
+        for field in ('requested', 'issued', 'useful', 'useless'):
+            level[f'pf_{field}'] = int(match[field])
+
+    return result
+
+
+class ResultsStore:
+    """
+    SQLite store of parsed ChampSim results, filled as runs finish so the
+    analysis can load a whole sweep without reading the logs again.
+
+    Two tables are kept: runs, one row per simulation with its IPC, branch
+    statistics and simulation speed, and levels, one row per cache level
+    of each simulation. Both are keyed by (sample, policy, prefetcher,
+    branch, trace); a run simulated again replaces its previous rows. Runs
+    stopped by the convergence monitor are flagged converged_early, with
+    the confidence of their IPC; runs stitched from interval-parallel
+    parts have the warmup_error estimated at their boundaries.
+
+    Attributes:
+        db_path (str): Path of the SQLite database.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " sample TEXT, policy TEXT, prefetcher TEXT, branch TEXT,"
+            " trace TEXT, ipc REAL, instructions INTEGER, cycles INTEGER,"
+            " branch_accuracy REAL, branch_mpki REAL, wall_seconds REAL,"
+            " instructions_per_second REAL, output_file TEXT, recorded_at REAL,"
+            " converged_early INTEGER, confidence REAL, warmup_error REAL,"
+            " PRIMARY KEY (sample, policy, prefetcher, branch, trace))"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS levels ("
+            " sample TEXT, policy TEXT, prefetcher TEXT, branch TEXT,"
+            " trace TEXT, level TEXT, access INTEGER, hit INTEGER,"
+            " miss INTEGER, mpki REAL, pf_requested INTEGER,"
+            " pf_issued INTEGER, pf_useful INTEGER, pf_useless INTEGER,"
+            " PRIMARY KEY (sample, policy, prefetcher, branch, trace, level))"
+        )
+        self.connection.commit()
+
+    def record(
+        self,
+        sample: str,
+        policy: Optional[str],
+        prefetcher: Optional[str],
+        branch: Optional[str],
+        trace_name: str,
+        stats: Dict,
+        output_file: str,
+        simulated_instructions: Optional[int] = None,
+    ) -> None:
+        """
+        Store the statistics returned by parse_champsim_output for a run.
+        simulated_instructions (warmup included) gives the simulation
+        speed; by default only the Region of Interest is counted.
+        """
+        key = (sample, str(policy), str(prefetcher), str(branch), trace_name)
+
+        wall_seconds = stats.get('wall_seconds')
+        simulated = simulated_instructions or stats.get('instructions')
+        speed = simulated / wall_seconds if simulated and wall_seconds else None
+
+        run = key + (
+            stats.get('ipc'), stats.get('instructions'), stats.get('cycles'),
+            stats.get('branch_accuracy'), stats.get('branch_mpki'),
+            wall_seconds, speed, output_file, time.time(),
+            int(stats.get('converged_early', False)), stats.get('confidence'),
+            stats.get('warmup_error'),
+        )
+        levels = [
+            key + (name, level.get('access'), level.get('hit'), level.get('miss'),
+                   level.get('mpki'), level.get('pf_requested'),
+                   level.get('pf_issued'), level.get('pf_useful'),
+                   level.get('pf_useless'))
+            for name, level in stats['levels'].items()
+        ]
+
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM levels WHERE sample = ? AND policy = ? AND "
+                "prefetcher = ? AND branch = ? AND trace = ?", key
+            )
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO runs ({', '.join(RUN_COLUMNS)}) VALUES "
+                f"({', '.join('?' * len(RUN_COLUMNS))})", run
+            )
+            self.connection.executemany(
+                f"INSERT INTO levels VALUES "
+                f"({', '.join('?' * len(LEVEL_COLUMNS))})", levels
+            )
+            self.connection.commit()
+
+    def ipcs(self, sample: str) -> Dict[Tuple[str, str, str, str], float]:
+        """IPC of every run of a Sample, by (policy, prefetcher, branch, trace)."""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT policy, prefetcher, branch, trace, ipc FROM runs "
+                "WHERE sample = ? AND ipc IS NOT NULL", (sample,)
+            ).fetchall()
+        return {tuple(row[:4]): row[4] for row in rows}
+
+
+def load_results(
+    db_path: str,
+    table: str = 'runs',
+    sample: Optional[str] = None,
+    slices: bool = False,
+):
+    """
+    Load a table of the results store ('runs' or 'levels') into a pandas
+    DataFrame, optionally restricted to one Sample. The rows of SimPoint
+    slices and interval parts are left out unless slices is True; their
+    whole traces have rows of their own.
+    """
+    import pandas as pd
+
+    if table not in ('runs', 'levels'):
+        raise ValueError(f"Unknown results table: {table}")
+
+    query = f"SELECT * FROM {table}"
+    params: List[str] = []
+    if sample is not None:
+        query += " WHERE sample = ?"
+        params.append(sample)
+
+    with sqlite3.connect(db_path) as connection:
+        frame = pd.read_sql_query(query, connection, params=params)
+    if not slices:
+        frame = frame[~frame['trace'].str.contains(SLICE_PATTERN)]
+    return frame
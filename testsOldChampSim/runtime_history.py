@@ -0,0 +1,118 @@
+import os
+import json
+import statistics
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+Key = Tuple[str, str, str]
+
+
+class RuntimeHistory:
+    """
+    Wall time of past simulations, used to start the longest ones first.
+
+    Durations are keyed by (binary family, trace, instruction count) and
+    appended to a JSON lines journal, one line per finished run, so the
+    history survives between sweeps and costs one small write per run. A
+    key seen several times keeps an exponential moving average.
+
+    A run never seen before is estimated from the same trace under other
+    executables, then from the size of the trace file times the median
+    seconds per byte observed so far. Without any history, the trace size
+    alone orders the runs.
+
+    Attributes:
+        path (str): Path of the journal.
+        smoothing (float): Weight of the newest duration in the average.
+    """
+
+    def __init__(self, path: str, smoothing: float = 0.5):
+        self.path = path
+        self.smoothing = smoothing
+
+        self.lock = threading.Lock()
+        self.durations: Dict[Key, float] = {}
+        self.per_trace: Dict[str, Dict[str, float]] = {}
+        self.seconds_per_byte: Dict[Key, float] = {}
+        self.rate: Optional[float] = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.load()
+
+    @staticmethod
+    def instructions(warmup: Optional[int], simulation: Optional[int]) -> str:
+        """Instruction count part of the key, e.g. '1000000+5000000'."""
+        return f"{warmup or 0}+{simulation or 0}"
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crash
+                    continue
+                self._add(entry['family'], entry['trace'], entry['instructions'],
+                          entry['seconds'], entry.get('trace_size'))
+
+    def _add(
+        self,
+        family: str,
+        trace: str,
+        instructions: str,
+        seconds: float,
+        trace_size: Optional[int],
+    ) -> None:
+        key = (family, trace, instructions)
+        previous = self.durations.get(key)
+        if previous is not None:
+            seconds = self.smoothing * seconds + (1 - self.smoothing) * previous
+        self.durations[key] = seconds
+        self.per_trace.setdefault(f"{trace}:{instructions}", {})[family] = seconds
+        if trace_size:
+            self.seconds_per_byte[key] = seconds / trace_size
+            self.rate = None
+
+    def record(
+        self,
+        family: str,
+        trace: str,
+        instructions: str,
+        seconds: float,
+        trace_size: Optional[int] = None,
+    ) -> None:
+        """Add the wall time of a finished run to the history."""
+        entry = {'family': family, 'trace': trace, 'instructions': instructions,
+                 'seconds': round(seconds, 3), 'trace_size': trace_size,
+                 'recorded_at': time.time()}
+        with self.lock:
+            self._add(family, trace, instructions, seconds, trace_size)
+            with open(self.path, 'a') as file:
+                file.write(json.dumps(entry) + '\n')
+
+    def estimate(
+        self,
+        family: str,
+        trace: str,
+        instructions: str,
+        trace_size: int,
+    ) -> float:
+        """Expected wall time of a run, in seconds when any history exists."""
+        with self.lock:
+            seconds = self.durations.get((family, trace, instructions))
+            if seconds is not None:
+                return seconds
+
+            others = self.per_trace.get(f"{trace}:{instructions}")
+            if others:
+                return statistics.mean(others.values())
+
+            if self.seconds_per_byte:
+                if self.rate is None:
+                    self.rate = statistics.median(self.seconds_per_byte.values())
+                return trace_size * self.rate
+            return float(trace_size)
@@ -0,0 +1,219 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass(eq=False)
+class Task:
+    """
+    A node of the job graph.
+
+    Attributes:
+        name (str): Unique, human readable name of the task.
+        func (Callable[[], Any]): Work to run once every dependency is done.
+        kind (str): Worker pool the task runs in (e.g. build, run, parse).
+        deps (List[Task]): Tasks that must finish successfully first.
+        priority (float): Ready tasks with a higher priority start first.
+        state (str): pending, ready, running, done, failed or skipped.
+        result (Any): Value returned by func.
+        error (Optional[BaseException]): Exception raised by func.
+    """
+    name: str
+    func: Callable[[], Any]
+    kind: str
+    deps: List['Task'] = field(default_factory=list)
+    priority: float = 0.0
+    state: str = 'pending'
+    result: Any = None
+    error: Optional[BaseException] = None
+    ready_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    dependents: List['Task'] = field(default_factory=list)
+    waiting_on: int = 0
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class DagScheduler:
+    """
+    Runs a dependency graph of tasks on a worker pool.
+
+    Every kind of task has its own concurrency limit, so simulations of a
+    configuration can run while another configuration is still compiling.
+    Ready tasks are started by decreasing priority. When a task fails, all
+    the tasks that depend on it are skipped. Tasks may be added while the
+    graph is running, e.g. from the body of another task.
+
+    Attributes:
+        limits (Dict[str, int]): Maximum number of running tasks per kind.
+        tasks (List[Task]): Every task added to the graph.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = limits
+        self.tasks: List[Task] = []
+        self.names: Dict[str, Task] = {}
+
+        self.condition = threading.Condition()
+        self.ready: Dict[str, list] = {kind: [] for kind in limits}
+        self.running: Dict[str, int] = {kind: 0 for kind in limits}
+        self.unfinished = 0
+        self.sequence = itertools.count()
+        self.started_at = None
+        self.finished_at = None
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        kind: str,
+        deps: Optional[List[Task]] = None,
+        priority: float = 0.0,
+    ) -> Task:
+        """Add a task to the graph and return it."""
+        if kind not in self.limits:
+            raise ValueError(f"No worker pool for tasks of kind {kind}")
+
+        with self.condition:
+            if name in self.names:
+                raise ValueError(f"Task {name} was already added")
+
+            task = Task(name=name, func=func, kind=kind,
+                        deps=list(deps or []), priority=priority)
+            self.tasks.append(task)
+            self.names[name] = task
+            self.unfinished += 1
+
+            for dep in task.deps:
+                if dep.state in ('failed', 'skipped'):
+                    self._skip(task)
+                    break
+                if dep.state != 'done':
+                    dep.dependents.append(task)
+                    task.waiting_on += 1
+            else:
+                if task.waiting_on == 0:
+                    self._make_ready(task)
+
+            self.condition.notify_all()
+        return task
+
+    def get(self, name: str) -> Optional[Task]:
+        """Return the task with the given name, if any."""
+        return self.names.get(name)
+
+    def _make_ready(self, task: Task) -> None:
+        task.state = 'ready'
+        task.ready_at = time.monotonic()
+        heapq.heappush(self.ready[task.kind],
+                       (-task.priority, next(self.sequence), task))
+
+    def _skip(self, task: Task) -> None:
+        if task.state in ('skipped', 'failed', 'done'):
+            return
+        task.state = 'skipped'
+        self.unfinished -= 1
+        for dependent in task.dependents:
+            self._skip(dependent)
+
+    def _execute(self, task: Task) -> None:
+        try:
+            task.result = task.func()
+            error = None
+        except BaseException as e:
+            error = e
+
+        with self.condition:
+            task.finished_at = time.monotonic()
+            self.running[task.kind] -= 1
+            self.unfinished -= 1
+
+            if error is None:
+                task.state = 'done'
+                for dependent in task.dependents:
+                    dependent.waiting_on -= 1
+                    if dependent.waiting_on == 0 and dependent.state == 'pending':
+                        self._make_ready(dependent)
+            else:
+                task.state = 'failed'
+                task.error = error
+                print(f"[FAILED] {task.name}: {error}")
+                for dependent in task.dependents:
+                    self._skip(dependent)
+
+            self.condition.notify_all()
+
+    def run(self) -> None:
+        """Run every task of the graph and wait until they are finished."""
+        self.started_at = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=sum(self.limits.values())) as pool:
+            with self.condition:
+                while self.unfinished > 0:
+                    for kind, heap in self.ready.items():
+                        while heap and self.running[kind] < self.limits[kind]:
+                            _, _, task = heapq.heappop(heap)
+                            task.state = 'running'
+                            task.started_at = time.monotonic()
+                            self.running[kind] += 1
+                            pool.submit(self._execute, task)
+                    self.condition.wait()
+
+        self.finished_at = time.monotonic()
+
+    def critical_path(self) -> List[Task]:
+        """
+        Chain of tasks that determined the wall time of the graph: starting
+        from the last task to finish, repeatedly follow the dependency that
+        finished last, i.e. the one that kept the task from starting.
+        """
+        finished = [task for task in self.tasks if task.finished_at is not None]
+        if not finished:
+            return []
+
+        path = []
+        task = max(finished, key=lambda t: t.finished_at)
+        while task is not None:
+            path.append(task)
+            deps = [dep for dep in task.deps if dep.finished_at is not None]
+            task = max(deps, key=lambda t: t.finished_at) if deps else None
+        return list(reversed(path))
+
+    def report(self) -> str:
+        """Summary of where the wall time of the graph went."""
+        if self.started_at is None or self.finished_at is None:
+            return "Scheduler has not run."
+
+        wall = self.finished_at - self.started_at
+        lines = [f"Wall time: {wall:.1f}s"]
+
+        for kind, limit in self.limits.items():
+            tasks = [task for task in self.tasks if task.kind == kind]
+            if not tasks:
+                continue
+            busy = sum(task.duration for task in tasks)
+            states = {}
+            for task in tasks:
+                states[task.state] = states.get(task.state, 0) + 1
+            utilization = busy / (wall * limit) if wall > 0 else 0.0
+            counts = ', '.join(f"{n} {state}" for state, n in sorted(states.items()))
+            lines.append(f"  {kind:<6} {counts}; busy {busy:.1f}s, "
+                         f"{utilization:.0%} of {limit} workers")
+
+        lines.append("Critical path:")
+        for task in self.critical_path():
+            waited = (task.started_at - task.ready_at
+                      if task.started_at is not None and task.ready_at is not None
+                      else 0.0)
+            lines.append(f"  {task.name}: ran {task.duration:.1f}s "
+                         f"after waiting {waited:.1f}s for a worker")
+        return '\n'.join(lines)
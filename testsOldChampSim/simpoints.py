@@ -0,0 +1,445 @@
+import os
+import json
+import lzma
+import math
+import random
+import struct
+import subprocess
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# A ChampSim trace is a sequence of 64-byte input_instr records; only the
+# instruction pointer and the branch flag are needed to find basic blocks
+RECORD = struct.Struct('<QB55x')
+if numpy is not None:
+    RECORD_DTYPE = numpy.dtype({'names': ['ip', 'is_branch'],
+                                'formats': ['<u8', 'u1'],
+                                'offsets': [0, 8], 'itemsize': RECORD.size})
+
+
+@dataclass
+class SimPointPolicy:
+    """
+    Representative intervals of each trace, SimPoint style.
+
+    Attributes:
+        interval (int): Instructions of an interval, simulated per slice.
+        max_clusters (int): Largest number of slices kept per trace.
+        dimensions (int): Size of the random projection of the basic
+            block vectors.
+        bic_threshold (float): The smallest number of clusters whose BIC
+            score reaches this fraction of the best score range is kept.
+        seed (int): Seed of the projection and of k-means.
+        slice_dir (Optional[str]): Directory of the slices and of the
+            analysis of every trace, by default simpoints in the output
+            directory. Slices are compressed by xz.
+    """
+    interval: int = 10_000_000
+    max_clusters: int = 10
+    dimensions: int = 15
+    bic_threshold: float = 0.9
+    seed: int = 42
+    slice_dir: Optional[str] = None
+
+
+@dataclass
+class TraceSlice:
+    """
+    A representative interval cut out of a trace, with its warmup.
+
+    Attributes:
+        name (str): Trace name of the slice, e.g. 'mcf_sp12'.
+        trace (str): Name of the trace it comes from.
+        path (str): The slice, a ChampSim trace compressed by xz.
+        start (int): First instruction of the slice in the trace.
+        warmup (int): Instructions of the slice before the interval.
+        instructions (int): Instructions of the interval.
+        weight (float): Fraction of the trace the interval stands for.
+    """
+    name: str
+    trace: str
+    path: str
+    start: int
+    warmup: int
+    instructions: int
+    weight: float
+
+
+def open_trace(trace_path: str):
+    if trace_path.endswith('.xz'):
+        return lzma.open(trace_path, 'rb')
+    return open(trace_path, 'rb')
+
+
+def projection(block: int, dimensions: int, seed: int) -> List[float]:
+    """Random projection of one basic block, the same in every process."""
+    rng = random.Random(f"{seed}:{block}")
+    return [rng.uniform(-1.0, 1.0) for _ in range(dimensions)]
+
+
+def count_blocks(data: bytes, counts: Counter, block: Optional[int]) -> Optional[int]:
+    """
+    Add the instructions of the records in data to the count of their
+    basic block, block being the start of the block the previous record
+    belongs to (None after a branch). Returns the one of the last record.
+    """
+    if numpy is None:
+        in_block = 0
+        for ip, is_branch in RECORD.iter_unpack(data):
+            if block is None:
+                block = ip
+            in_block += 1
+            if is_branch:
+                counts[block] += in_block
+                block, in_block = None, 0
+        if in_block:
+            counts[block] += in_block
+        return block
+
+    records = numpy.frombuffer(data, dtype=RECORD_DTYPE)
+    branches = records['is_branch'] != 0
+    starts = numpy.empty(len(records), dtype=bool)
+    starts[0] = block is None
+    starts[1:] = branches[:-1]
+    # Start of the block of every record, the records before the first
+    # start continuing the block of the previous data
+    indexes = numpy.cumsum(starts) - 1
+    start_ips = records['ip'][starts]
+    blocks = numpy.where(indexes >= 0, start_ips[numpy.maximum(indexes, 0)],
+                         numpy.uint64(block or 0))
+    for ip, count in zip(*(array.tolist() for array in
+                           numpy.unique(blocks, return_counts=True))):
+        counts[ip] += count
+    return None if branches[-1] else int(blocks[-1])
+
+
+def basic_block_vectors(
+    trace_path: str,
+    interval: int,
+    dimensions: int,
+    seed: int,
+) -> Tuple[List[List[float]], int]:
+    """
+    Read a trace once and return the projected basic block vector of every
+    interval (instructions executed per basic block, normalized, where a
+    block starts after each branch) and the number of instructions.
+    """
+    projections: Dict[int, List[float]] = {}
+    vectors = []
+    total = 0
+
+    def close(counts: Counter, length: int) -> None:
+        vector = [0.0] * dimensions
+        for block, count in counts.items():
+            if block not in projections:
+                projections[block] = projection(block, dimensions, seed)
+            weight = count / length
+            for index, value in enumerate(projections[block]):
+                vector[index] += weight * value
+        vectors.append(vector)
+
+    with open_trace(trace_path) as trace:
+        counts: Counter = Counter()
+        block, length = None, 0
+        while True:
+            # Read at most up to the end of the interval
+            wanted = min(interval - length, 1 << 16)
+            data = trace.read(wanted * RECORD.size)
+            data = data[:len(data) - len(data) % RECORD.size]
+            if not data:
+                break
+            block = count_blocks(data, counts, block)
+            read = len(data) // RECORD.size
+            length += read
+            total += read
+
+            if length == interval:
+                close(counts, length)
+                counts, length = Counter(), 0
+
+        # A last partial interval only counts if it is the whole trace
+        if length and not vectors:
+            close(counts, length)
+
+    return vectors, total
+
+
+def distance(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum((x - y) ** 2 for x, y in zip(a, b))
+
+
+def kmeans(
+    points: List[List[float]],
+    k: int,
+    rng: random.Random,
+    iterations: int = 50,
+) -> Tuple[List[List[float]], List[int]]:
+    """k-means with k-means++ seeding, returns the centroids and labels."""
+    centroids = [list(rng.choice(points))]
+    while len(centroids) < k:
+        weights = [min(distance(point, centroid) for centroid in centroids)
+                   for point in points]
+        if not any(weights):
+            break
+        centroids.append(list(rng.choices(points, weights)[0]))
+
+    labels = [0] * len(points)
+    for iteration in range(iterations):
+        new_labels = [min(range(len(centroids)),
+                          key=lambda c: distance(point, centroids[c]))
+                      for point in points]
+        if iteration and new_labels == labels:
+            break
+        labels = new_labels
+        for c in range(len(centroids)):
+            members = [point for point, label in zip(points, labels) if label == c]
+            if members:
+                centroids[c] = [sum(values) / len(members) for values in zip(*members)]
+    return centroids, labels
+
+
+def bic(points: List[List[float]], centroids: List[List[float]], labels: List[int]) -> float:
+    """Bayesian information criterion of a clustering (as in X-means)."""
+    count, dimensions, k = len(points), len(points[0]), len(centroids)
+    error = sum(distance(point, centroids[label]) for point, label in zip(points, labels))
+    variance = max(error / (dimensions * max(count - k, 1)), 1e-12)
+
+    likelihood = -count * dimensions / 2 * math.log(2 * math.pi * variance)
+    likelihood -= dimensions * max(count - k, 0) / 2
+    for size in Counter(labels).values():
+        likelihood += size * math.log(size / count)
+    parameters = (k - 1) + k * dimensions + 1
+    return likelihood - parameters / 2 * math.log(count)
+
+
+def choose_intervals(
+    vectors: List[List[float]],
+    policy: SimPointPolicy,
+) -> List[Tuple[int, float]]:
+    """
+    Cluster the intervals and return the (interval, weight) of the
+    interval closest to the center of every cluster.
+    """
+    rng = random.Random(policy.seed)
+    clusterings = []
+    for k in range(1, min(policy.max_clusters, len(vectors)) + 1):
+        centroids, labels = kmeans(vectors, k, rng)
+        clusterings.append((bic(vectors, centroids, labels), centroids, labels))
+
+    scores = [score for score, _, _ in clusterings]
+    lowest, highest = min(scores), max(scores)
+    for score, centroids, labels in clusterings:
+        if score >= lowest + policy.bic_threshold * (highest - lowest):
+            break
+
+    chosen = []
+    for c, centroid in enumerate(centroids):
+        members = [index for index, label in enumerate(labels) if label == c]
+        if members:
+            closest = min(members, key=lambda index: distance(vectors[index], centroid))
+            chosen.append((closest, len(members) / len(vectors)))
+    return sorted(chosen)
+
+
+def analyze(trace_path: str, policy: SimPointPolicy) -> Dict:
+    """Representative intervals of a trace, run in a worker process."""
+    vectors, total = basic_block_vectors(trace_path, policy.interval,
+                                         policy.dimensions, policy.seed)
+    return {'instructions': total,
+            'intervals': choose_intervals(vectors, policy) if vectors else []}
+
+
+class SliceOutput:
+    """A slice being written, compressed by xz if its name ends in .xz."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(f"{path}.tmp", 'wb')
+        self.process = (
+            subprocess.Popen(['xz', '-T0', '-0', '-c'], stdin=subprocess.PIPE,
+                             stdout=self.file)
+            if path.endswith('.xz') else None
+        )
+
+    def write(self, data: bytes) -> None:
+        (self.process.stdin if self.process else self.file).write(data)
+
+    def close(self) -> None:
+        try:
+            if self.process:
+                self.process.stdin.close()
+                if self.process.wait() != 0:
+                    raise OSError(f"xz failed on {self.path}")
+        finally:
+            self.file.close()
+
+
+def write_slices(trace_path: str, slices: List[TraceSlice], buffer_size: int = 16 << 20) -> None:
+    """Cut every slice out of the trace in a single pass."""
+    ranges = [(trace_slice.start * RECORD.size,
+               (trace_slice.start + trace_slice.warmup + trace_slice.instructions)
+               * RECORD.size) for trace_slice in slices]
+    end = max(stop for _, stop in ranges)
+    outputs = [SliceOutput(trace_slice.path) for trace_slice in slices]
+    try:
+        with open_trace(trace_path) as trace:
+            position = 0
+            while position < end:
+                data = trace.read(min(buffer_size, end - position))
+                if not data:
+                    break
+                for (start, stop), output in zip(ranges, outputs):
+                    low, high = max(start, position), min(stop, position + len(data))
+                    if low < high:
+                        output.write(data[low - position:high - position])
+                position += len(data)
+    finally:
+        for output in outputs:
+            output.close()
+    for trace_slice in slices:
+        os.replace(f"{trace_slice.path}.tmp", trace_slice.path)
+
+
+class SlicePlanner:
+    """
+    Slices of traces, kept in slice_dir with the plan that produced them
+    (plan_file in the folder of each trace) and reused as long as the
+    trace, the warmup and the policy do not change.
+
+    Attributes:
+        slice_dir (str): Directory of the slices, one folder per trace.
+        policy: Settings the slices depend on, a dataclass.
+    """
+    plan_file = 'slices.json'
+
+    def __init__(self, slice_dir: str, policy):
+        self.slice_dir = slice_dir
+        self.policy = policy
+        os.makedirs(slice_dir, exist_ok=True)
+
+    def identity(self, trace_path: str, warmup: int) -> Dict:
+        stat = os.stat(trace_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                'warmup': warmup, 'policy': asdict(self.policy)}
+
+    def load(self, trace_name: str, trace_path: str, warmup: int) -> Optional[List[TraceSlice]]:
+        """Slices of a previous plan, None if anything changed."""
+        plan_path = os.path.join(self.slice_dir, trace_name, self.plan_file)
+        try:
+            with open(plan_path, 'r') as file:
+                plan = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if plan.get('identity') != self.identity(trace_path, warmup):
+            return None
+        slices = [TraceSlice(**entry) for entry in plan['slices']]
+        if not all(os.path.exists(trace_slice.path) for trace_slice in slices):
+            return None
+        return slices
+
+    def save(self, trace_name: str, trace_path: str, warmup: int,
+             slices: List[TraceSlice]) -> None:
+        plan_path = os.path.join(self.slice_dir, trace_name, self.plan_file)
+        with open(f"{plan_path}.tmp", 'w') as file:
+            json.dump({'identity': self.identity(trace_path, warmup),
+                       'slices': [asdict(trace_slice) for trace_slice in slices]},
+                      file, indent=4)
+        os.replace(f"{plan_path}.tmp", plan_path)
+
+
+class SimPointPlanner(SlicePlanner):
+    """
+    Replaces each trace by a few weighted slices, SimPoint style.
+
+    The trace is cut into intervals of policy.interval instructions and
+    the basic block vector of every interval (instructions executed in
+    each basic block) is randomly projected to a few dimensions. The
+    intervals are clustered with k-means, the number of clusters being
+    the smallest one with a good BIC score, and the interval closest to
+    the center of each cluster represents it, weighted by the fraction of
+    the intervals in the cluster. Each representative is written as a
+    slice of its own, preceded by up to warmup instructions, and the
+    slices of every trace are simulated instead of the trace. The
+    analysis and the slices are kept in slice_dir and reused as long as
+    the trace and the policy do not change.
+
+    Attributes:
+        slice_dir (str): Directory of the slices, one folder per trace.
+        policy (SimPointPolicy): Interval size and clustering settings.
+        workers (int): Traces analyzed at the same time.
+    """
+
+    plan_file = 'simpoints.json'
+
+    def __init__(self, slice_dir: str, policy: SimPointPolicy, workers: int = 1):
+        super().__init__(slice_dir, policy)
+        self.workers = workers
+
+    def slices(self, trace_name: str, trace_path: str, warmup: int,
+               analysis: Dict) -> List[TraceSlice]:
+        folder = os.path.join(self.slice_dir, trace_name)
+        os.makedirs(folder, exist_ok=True)
+
+        slices = []
+        for interval, weight in analysis['intervals']:
+            start = interval * self.policy.interval
+            length = min(self.policy.interval, analysis['instructions'] - start)
+            slice_warmup = min(warmup, start)
+            name = f"{trace_name}_sp{interval}"
+            slices.append(TraceSlice(
+                name=name, trace=trace_name,
+                path=os.path.join(folder, f"{name}.champsimtrace.xz"),
+                start=start - slice_warmup, warmup=slice_warmup,
+                instructions=length, weight=weight,
+            ))
+        write_slices(trace_path, slices)
+        return slices
+
+    def plan(
+        self,
+        traces: List[Tuple[str, str]],
+        warmup: Optional[int],
+    ) -> List[TraceSlice]:
+        """Slices of every (trace name, trace path), analyzing new traces."""
+        warmup = warmup or 0
+        slices: List[TraceSlice] = []
+        missing = []
+        for trace_name, trace_path in traces:
+            known = self.load(trace_name, trace_path, warmup)
+            if known is None:
+                missing.append((trace_name, trace_path))
+            else:
+                print(f"[SIMPOINT] Reusing {len(known)} slices of {trace_name}")
+                slices += known
+
+        # Reading the traces is CPU bound, so every trace has its own process
+        with ProcessPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            analyses = executor.map(analyze, [path for _, path in missing],
+                                    [self.policy] * len(missing))
+            for (trace_name, trace_path), analysis in zip(missing, analyses):
+                trace_slices = self.slices(trace_name, trace_path, warmup, analysis)
+                self.save(trace_name, trace_path, warmup, trace_slices)
+                print(f"[SIMPOINT] {trace_name}: {len(trace_slices)} slices of "
+                      f"{self.policy.interval} instructions out of "
+                      f"{analysis['instructions']}")
+                slices += trace_slices
+        return slices
+
+
+def weighted_ipc(slices: List[TraceSlice], ipcs: Dict[str, Optional[float]]) -> Optional[float]:
+    """
+    IPC of a whole trace from the IPC of its slices: cycles per
+    instruction are averaged with the weights of the slices.
+    """
+    if not slices or any(not ipcs.get(trace_slice.name) for trace_slice in slices):
+        return None
+    cycles = sum(trace_slice.weight / ipcs[trace_slice.name] for trace_slice in slices)
+    return sum(trace_slice.weight for trace_slice in slices) / cycles
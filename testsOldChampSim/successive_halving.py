@@ -0,0 +1,62 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class HalvingPolicy:
+    """
+    Multi-fidelity sweep by successive halving: every configuration is
+    first simulated on a short window, and only the best ones are
+    simulated again on longer windows, up to the full length.
+
+    Attributes:
+        min_instructions (int): Simulation instructions of the first rung.
+        eta (int): Growth of the window from one rung to the next; the
+            best 1/eta of the configurations are promoted at each rung.
+        min_survivors (int): Configurations always promoted, however
+            many there are.
+    """
+    min_instructions: int = 10_000_000
+    eta: int = 3
+    min_survivors: int = 1
+
+    def __post_init__(self):
+        if self.eta < 2:
+            raise ValueError("Successive halving needs eta >= 2")
+        if self.min_instructions < 1:
+            raise ValueError("Successive halving needs a positive first window")
+
+    def windows(self, simulation_instructions: int) -> List[int]:
+        """Simulation instructions of every rung, the last one being full length."""
+        windows = []
+        window = self.min_instructions
+        while window < simulation_instructions:
+            windows.append(window)
+            window *= self.eta
+        windows.append(simulation_instructions)
+        return windows
+
+    def survivors(self, count: int) -> int:
+        """Configurations promoted out of count."""
+        return min(count, max(self.min_survivors, math.ceil(count / self.eta)))
+
+
+def geomean(values: Sequence[float]) -> Optional[float]:
+    """Geometric mean, None if a value is missing or not positive."""
+    if not values or any(value is None or value <= 0 for value in values):
+        return None
+    return math.exp(sum(math.log(value) for value in values) / len(values))
+
+
+def rank(
+    scores: Dict[Hashable, Optional[float]],
+    survivors: int,
+) -> Tuple[List[Hashable], List[Hashable]]:
+    """
+    Split configurations into the promoted and the pruned ones, highest
+    score first. Configurations without a score (a failed run) rank last.
+    """
+    ordered = sorted(scores, key=lambda config: (scores[config] is None,
+                                                 -(scores[config] or 0.0)))
+    return ordered[:survivors], ordered[survivors:]
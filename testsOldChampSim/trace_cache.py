@@ -0,0 +1,223 @@
+import os
+import lzma
+import shutil
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(eq=False)
+class CachedTrace:
+    """A decompressed trace held by the cache."""
+    path: str
+    size: int = 0
+    refs: int = 0
+    failed: bool = False
+    ready: threading.Event = field(default_factory=threading.Event)
+
+
+@dataclass
+class TraceLease:
+    """
+    Trace a simulation reads, given by TraceCache.acquire().
+
+    Attributes:
+        path (str): Path to read, the cached copy or the original trace.
+        entry (Optional[CachedTrace]): Cached copy the lease holds a
+            reference on, None when the original trace is read.
+    """
+    path: str
+    entry: Optional[CachedTrace] = None
+
+
+def uncompressed_size(trace_path: str) -> Optional[int]:
+    """
+    Read the uncompressed size of an .xz file from its index, without
+    decompressing it. Returns None if the xz tool is not available.
+    """
+    try:
+        output = subprocess.run(['xz', '--robot', '--list', trace_path],
+                                capture_output=True, text=True,
+                                check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    for line in output.splitlines():
+        fields = line.split('\t')
+        if fields[0] == 'totals' and len(fields) > 4:
+            return int(fields[4])
+    return None
+
+
+class TraceCache:
+    """
+    Shared cache of decompressed traces.
+
+    Each .xz trace is decompressed once into cache_dir (for instance a
+    tmpfs such as /dev/shm) and every simulation of that trace reads the
+    plain copy instead of decompressing it again. Entries are reference
+    counted while simulations use them; when the cache would go over its
+    byte quota, the least recently used unreferenced entries are evicted.
+    If a trace cannot fit even then, simulations fall back to the .xz file.
+
+    Attributes:
+        cache_dir (str): Directory holding the decompressed traces.
+        quota (int): Maximum number of bytes kept in cache_dir.
+        buffer_size (int): Size of the decompression buffer.
+    """
+
+    def __init__(self, cache_dir: str, quota: int, buffer_size: int = 16 << 20):
+        self.cache_dir = cache_dir
+        self.quota = quota
+        self.buffer_size = buffer_size
+
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[str, CachedTrace]' = OrderedDict()
+        self.used = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.adopt_existing()
+
+    def cache_name(self, trace_path: str) -> str:
+        """Name of the decompressed copy, unique per source file version."""
+        stat = os.stat(trace_path)
+        identity = f"{os.path.abspath(trace_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        digest = hashlib.sha1(identity.encode()).hexdigest()[:16]
+        base = os.path.basename(trace_path)[:-len('.xz')]
+        if not base.endswith('.champsimtrace'):
+            base += '.champsimtrace'
+        return f"{digest}_{base}"
+
+    def adopt_existing(self) -> None:
+        """Register the copies left by a previous sweep, oldest first."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.tmp'):
+                os.remove(path)
+            elif os.path.isfile(path):
+                files.append((os.stat(path).st_mtime, name, path))
+
+        for _, name, path in sorted(files):
+            entry = CachedTrace(path=path, size=os.path.getsize(path))
+            entry.ready.set()
+            self.entries[name] = entry
+            self.used += entry.size
+
+    def evict(self, needed: int) -> bool:
+        """
+        Evict unreferenced entries, least recently used first, until needed
+        more bytes fit in the quota. Must be called with the lock held.
+        """
+        for name in list(self.entries):
+            if self.used + needed <= self.quota:
+                break
+            entry = self.entries[name]
+            if entry.refs > 0 or not entry.ready.is_set():
+                continue
+            del self.entries[name]
+            self.used -= entry.size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            print(f"[TRACE CACHE] Evicted {name}")
+        return self.used + needed <= self.quota
+
+    def decompress(self, trace_path: str, entry: CachedTrace) -> None:
+        temp_path = f"{entry.path}.tmp"
+        try:
+            with lzma.open(trace_path, 'rb') as source, open(temp_path, 'wb') as target:
+                shutil.copyfileobj(source, target, self.buffer_size)
+            os.replace(temp_path, entry.path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def drop(self, name: str, entry: CachedTrace) -> None:
+        """
+        Mark an entry failed and forget it, its copy being unusable. Must be
+        called with the lock held.
+        """
+        entry.failed = True
+        if self.entries.get(name) is entry:
+            del self.entries[name]
+            self.used -= entry.size
+
+    def acquire(self, trace_path: str) -> TraceLease:
+        """
+        Return the trace simulations should read for trace_path. A lease on
+        the cached copy holds a reference on it until release() is called;
+        when the copy cannot be made, the lease reads trace_path and holds
+        nothing.
+        """
+        if not trace_path.endswith('.xz'):
+            return TraceLease(trace_path)
+
+        name = self.cache_name(trace_path)
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None:
+                entry.refs += 1
+                self.entries.move_to_end(name)
+                owner = False
+            else:
+                # Reserve room for the copy before decompressing it
+                size = uncompressed_size(trace_path) or 0
+                if not self.evict(size):
+                    print(f"[TRACE CACHE] No room for {os.path.basename(trace_path)}, "
+                          f"reading the compressed trace")
+                    return TraceLease(trace_path)
+                entry = CachedTrace(path=os.path.join(self.cache_dir, name),
+                                    size=size, refs=1)
+                self.entries[name] = entry
+                self.used += size
+                owner = True
+
+        if owner:
+            try:
+                self.decompress(trace_path, entry)
+                with self.lock:
+                    actual = os.path.getsize(entry.path)
+                    self.used += actual - entry.size
+                    entry.size = actual
+                    self.evict(0)
+            except BaseException as e:
+                with self.lock:
+                    self.drop(name, entry)
+                if not isinstance(e, Exception):
+                    raise
+                print(f"[TRACE CACHE] Could not decompress {trace_path}: {e}")
+            finally:
+                entry.ready.set()
+        else:
+            entry.ready.wait()
+            if not entry.failed:
+                try:
+                    os.utime(entry.path)
+                except FileNotFoundError:
+                    # Removed behind the back of the cache
+                    with self.lock:
+                        self.drop(name, entry)
+
+        if entry.failed:
+            return TraceLease(trace_path)
+        return TraceLease(entry.path, entry)
+
+    def release(self, lease: TraceLease) -> None:
+        """Drop the reference held by a lease of acquire(), if any."""
+        if lease.entry is None:
+            return
+
+        with self.lock:
+            if lease.entry.refs > 0:
+                lease.entry.refs -= 1
+            lease.entry = None
+            if self.used > self.quota:
+                self.evict(0)
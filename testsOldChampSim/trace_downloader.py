@@ -0,0 +1,240 @@
+import os
+import json
+import shutil
+import hashlib
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+
+# Hex digest length of the checksums accepted in text manifests
+DIGEST_LENGTHS = {32: 'md5', 40: 'sha1', 64: 'sha256'}
+
+
+class DownloadError(Exception):
+    """Raised when a trace cannot be downloaded or fails verification."""
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Dict]:
+    """
+    Load the expected size and/or checksum of each trace file.
+
+    Two formats are accepted: a JSON object mapping file names to
+    {"size": ..., "sha256": ...} (any hashlib algorithm name may be used
+    as key), or the text output of md5sum/sha1sum/sha256sum.
+    """
+    with open(manifest_path, 'r') as file:
+        content = file.read()
+
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        pass
+
+    manifest = {}
+    for line in content.splitlines():
+        fields = line.split()
+        if len(fields) != 2 or len(fields[0]) not in DIGEST_LENGTHS:
+            continue
+        digest, name = fields
+        algorithm = DIGEST_LENGTHS[len(digest)]
+        manifest[os.path.basename(name.lstrip('*'))] = {algorithm: digest.lower()}
+    return manifest
+
+
+class TraceDownloader:
+    """
+    Downloads trace files in parallel.
+
+    A file is written to <name>.part and only renamed to its final name
+    once it is complete and verified, so a file under its final name is
+    always whole. An interrupted download is resumed with an HTTP Range
+    request (servers ignoring Range are downloaded again from the start).
+    A local mirror directory is looked up before the network.
+
+    Attributes:
+        trace_dir (str): Directory where trace files are stored.
+        workers (int): Number of files downloaded at the same time.
+        mirror_dir (Optional[str]): Local directory checked first.
+        manifest (Dict[str, Dict]): Expected size/checksum per file name.
+        chunk_size (int): Size of the network reads and file writes.
+        retries (int): Attempts per file before giving up.
+        verify_existing (bool): Checksum files that are already present
+            (their size is always checked against the manifest).
+    """
+
+    def __init__(
+        self,
+        trace_dir: str,
+        workers: int = 4,
+        mirror_dir: Optional[str] = None,
+        manifest: Optional[str] = None,
+        chunk_size: int = 4 << 20,
+        retries: int = 3,
+        timeout: int = 60,
+        verify_existing: bool = False,
+    ):
+        self.trace_dir = trace_dir
+        self.workers = workers
+        self.mirror_dir = mirror_dir
+        self.manifest = load_manifest(manifest) if manifest else {}
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+        self.verify_existing = verify_existing
+
+    def checksum(self, path: str, algorithm: str) -> str:
+        digest = hashlib.new(algorithm)
+        with open(path, 'rb') as file:
+            while True:
+                chunk = file.read(self.chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def verify(self, path: str, name: str, with_checksum: bool = True) -> bool:
+        """Check a file against the manifest entry of name, if any."""
+        expected = self.manifest.get(name)
+        if not expected:
+            return True
+
+        size = expected.get('size')
+        if size is not None and os.path.getsize(path) != int(size):
+            return False
+
+        if with_checksum:
+            for algorithm, digest in expected.items():
+                if algorithm == 'size':
+                    continue
+                if self.checksum(path, algorithm) != digest.lower():
+                    return False
+        return True
+
+    def expected_size(self, name: str) -> Optional[int]:
+        size = self.manifest.get(name, {}).get('size')
+        return int(size) if size is not None else None
+
+    def from_mirror(self, name: str, file_path: str) -> bool:
+        """Copy name from the mirror directory, if it holds a valid copy."""
+        if not self.mirror_dir:
+            return False
+
+        mirror_path = os.path.join(self.mirror_dir, name)
+        if not os.path.isfile(mirror_path) or not self.verify(mirror_path, name):
+            return False
+
+        part_path = f"{file_path}.part"
+        try:
+            os.link(mirror_path, part_path)
+        except OSError:
+            shutil.copyfile(mirror_path, part_path)
+        os.replace(part_path, file_path)
+        print(f"Copied {name} from mirror {self.mirror_dir}.")
+        return True
+
+    def remote_size(self, file_url: str, response: requests.Response) -> Optional[int]:
+        """
+        Size of file_url on the server, from the Content-Range of a 416
+        response (bytes */<size>) or else from a HEAD request.
+        """
+        content_range = response.headers.get('Content-Range', '')
+        total = content_range.rpartition('/')[2]
+        if total.isdigit():
+            return int(total)
+
+        head = requests.head(file_url, allow_redirects=True, timeout=self.timeout)
+        length = head.headers.get('Content-Length')
+        if head.ok and length is not None and length.isdigit():
+            return int(length)
+        return None
+
+    def fetch(self, file_url: str, part_path: str) -> None:
+        """Download file_url into part_path, resuming what is already there."""
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        with requests.get(file_url, stream=True, headers=headers,
+                          timeout=self.timeout) as r:
+            if r.status_code == 416:
+                # Nothing left to download, if the part is the whole file
+                total = self.remote_size(file_url, r)
+                if total is not None and offset != total:
+                    os.remove(part_path)
+                    raise DownloadError(f"{os.path.basename(part_path)} holds {offset} "
+                                        f"bytes, the server has {total}")
+                return
+            r.raise_for_status()
+
+            if offset and r.status_code != 206:
+                # The server ignored the Range header, start over
+                offset = 0
+
+            with open(part_path, 'ab' if offset else 'wb',
+                      buffering=self.chunk_size) as f:
+                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                    f.write(chunk)
+
+            length = r.headers.get('Content-Length')
+            if length is not None and os.path.getsize(part_path) != offset + int(length):
+                raise DownloadError(f"Truncated download of {file_url}")
+
+    def download(self, file_url: str) -> str:
+        """Download a single trace file and return its path."""
+        file_name = os.path.basename(file_url)
+        file_path = os.path.join(self.trace_dir, file_name)
+        part_path = f"{file_path}.part"
+
+        if os.path.exists(file_path):
+            if self.verify(file_path, file_name, with_checksum=self.verify_existing):
+                print(f"File {file_name} already exists, skipping download.")
+                return file_path
+
+            # Left truncated by an older download, resume it if possible
+            size = self.expected_size(file_name)
+            if size is not None and os.path.getsize(file_path) < size:
+                os.replace(file_path, part_path)
+            else:
+                os.remove(file_path)
+
+        if self.from_mirror(file_name, file_path):
+            return file_path
+
+        for attempt in range(1, self.retries + 1):
+            try:
+                resumed = os.path.exists(part_path)
+                print(f"{'Resuming' if resumed else 'Downloading'} {file_name}...")
+                self.fetch(file_url, part_path)
+
+                if not self.verify(part_path, file_name):
+                    os.remove(part_path)
+                    raise DownloadError(f"{file_name} does not match the manifest")
+
+                os.replace(part_path, file_path)
+                print(f"Downloaded {file_name}.")
+                return file_path
+            except (requests.RequestException, DownloadError) as e:
+                print(f"Attempt {attempt}/{self.retries} for {file_name} failed: {e}")
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status is not None and 400 <= status < 500 and status not in (408, 429):
+                    # The file is not there, retrying will not help
+                    break
+
+        raise DownloadError(f"Could not download {file_url}")
+
+    def download_all(self, trace_urls: List[str]) -> List[str]:
+        """
+        Download every URL, several at a time. Returns the paths of the
+        files that are available, after reporting the ones that are not.
+        """
+        os.makedirs(self.trace_dir, exist_ok=True)
+
+        paths = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.download, url): url for url in trace_urls}
+            for future, url in futures.items():
+                try:
+                    paths.append(future.result())
+                except DownloadError as e:
+                    print(f"Error: {e}")
+        return paths
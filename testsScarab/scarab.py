@@ -1,4 +1,5 @@
 import os
+import itertools
 import subprocess
 from concurrent.futures import ThreadPoolExecutor
 import threading
@@ -6,6 +7,14 @@ import sys
 import re
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.admission import MemoryAdmission
+from common.distributed import RemoteLauncher, start_coordinator
+from common.journal import SweepJournal, file_hash
+from common.process import Launcher
+from common.progress import SCARAB_PROGRESS, ProgressTracker
+from common.sweep import SweepSpec
+
 ###############################################################################
 # Helper class for Cache Config
 ###############################################################################
@@ -42,6 +51,9 @@ class ScarabExecutor:
         L1D_config,   # List of CacheConfig objects for L1D
         L2_config,    # List of CacheConfig objects for L2
         LLC_config,   # List of CacheConfig objects for LLC
+        memory_budget=None,  # Bytes the simulations may use together
+        coordinator=None,    # host:port serving the runs to remote workers
+        sweep_file=None,     # JSON/YAML sweep replacing the lists and configs
     ):
         self.scarab_path = scarab_path
         self.policies = policies
@@ -65,10 +77,58 @@ class ScarabExecutor:
         self.S4_semaphore = threading.Semaphore(1)
         self.S5_semaphore = threading.Semaphore(1)
 
+        # Simulations wait until their learned footprint fits in memory,
+        # on this host or, with a coordinator, on the remote workers. The
+        # resources of every run are also kept in one journal.
+        journal_path = os.path.join(output_dir, 'run_records.jsonl')
+        self.coordinator = start_coordinator(coordinator) if coordinator else None
+        if self.coordinator:
+            self.launcher = RemoteLauncher(self.coordinator, journal_path)
+        else:
+            self.launcher = Launcher(
+                admission=MemoryAdmission(
+                    budget=memory_budget,
+                    footprints_path=os.path.join(output_dir, 'memory_footprints.json')
+                ),
+                journal_path=journal_path
+            )
+
+        # Write-ahead journal of the runs, so a killed sweep resumes where
+        # it stopped: finished runs are skipped, interrupted ones run again
+        self.sweep_journal = SweepJournal(
+            os.path.join(output_dir, 'sweep_journal.jsonl')
+        )
+        self.binary_hash = file_hash(os.path.join(self.scarab_path, "src/scarab"))
+
+        # Speed and remaining time of every run and of the sweep, read from
+        # the heartbeats, printed and written to sweep_status.json
+        self.progress = ProgressTracker(
+            os.path.join(output_dir, 'sweep_status.json')
+        )
+
         # Create a list of cache configuration tuples from the four lists
         # Each tuple is (L1I_cfg, L1D_cfg, L2_cfg, LLC_cfg).
         self.cache_samples = list(zip(L1I_config, L1D_config, L2_config, LLC_config))
 
+        # A sweep file replaces the lists and the zipped cache configurations,
+        # its policy axis being the cache replacement policy
+        self.sweep = SweepSpec.load(sweep_file) if sweep_file else None
+
+    def sample_combos(self):
+        # Cache configurations of every Sample, with the (cache policy,
+        # branch, prefetcher) combinations to run on it
+        if self.sweep is None:
+            combos = list(itertools.product(self.policies_cache or [None],
+                                            self.branch_predictors or [None],
+                                            self.prefetchers or [None]))
+            return [(sample, combos) for sample in self.cache_samples]
+
+        return [
+            (caches, [(point.get('policy'), point.get('branch'),
+                       point.get('prefetcher')) for point in points])
+            for caches, points in self.sweep.samples(CacheConfig)
+        ]
+
     ###########################################################################
     # Modify cache sizes in PARAMS.in
     ###########################################################################
@@ -228,40 +288,134 @@ class ScarabExecutor:
     ###########################################################################
     # Running Scarab
     ###########################################################################
-    def exec_single_trace(self, trace_file, trace_path, policy_Cache):
+    def trace_output_dir(self, output_dir, trace_file, policy_Cache):
         policy_Cache_name = self.cache_policy_map.get(policy_Cache, policy_Cache)
         trace_name = os.path.splitext(trace_file)[0]
-        bin_dir = os.path.abspath(os.path.join(trace_path, "../../bin"))
-        trace_output_dir = os.path.join(self.output_dir, trace_name, policy_Cache_name)
-        os.makedirs(trace_output_dir, exist_ok=True)
-
-        command = [
-            os.path.join(self.scarab_path, "src/scarab"),
-            "--frontend", "memtrace",
-            "--fetch_off_path_ops", "0",
-            f"--cbp_trace_r0={trace_path}",
-            f"--inst_limit={self.simulation_instructions}",
-            #f"--warmup={self.warmup_instructions}",
-            f"--memtrace_modules_log={bin_dir}",
-            f"--output_dir={trace_output_dir}"
-        ]
+        return os.path.join(output_dir, trace_name, policy_Cache_name)
+
+    def run_name(self, output_dir, trace_file, policy_Cache):
+        # Runs are journaled by their output folder below the output root
+        return os.path.relpath(
+            self.trace_output_dir(output_dir, trace_file, policy_Cache),
+            self.output_dir_orig
+        )
 
-        print(f"[INFO] Executing Scarab for {trace_file} with command:")
-        print("       " + " ".join(command))
+    def list_traces(self, trace_folder):
+        return [trace_file for trace_file in os.listdir(trace_folder)
+                if trace_file.endswith('.trace.gz') or
+                trace_file.endswith('.champsimtrace.xz')]
 
+    def release_semaphores(self):
         self.S1_semaphore.release()
         self.S2_semaphore.release()
         self.S3_semaphore.release()
         self.S4_semaphore.release()
         self.S5_semaphore.release()
 
-        subprocess.run(command)
-
-    def prepare_execution(self, executor, policy_Cache, trace_folder):
-        for trace_file in os.listdir(trace_folder):
-            if trace_file.endswith('.trace.gz') or trace_file.endswith('.champsimtrace.xz'):
-                trace_path = os.path.join(trace_folder, trace_file)
-                executor.submit(self.exec_single_trace, trace_file, trace_path, policy_Cache)
+    def exec_single_trace(self, trace_file, trace_path, policy_Cache, output_dir):
+        # PARAMS.in is only released to the next configuration once this
+        # run was admitted and starts reading it, or once it failed before
+        released = False
+
+        def release_params():
+            nonlocal released
+            self.progress.begin(memory_key, output_file, SCARAB_PROGRESS)
+            released = True
+            self.release_semaphores()
+
+        try:
+            bin_dir = os.path.abspath(os.path.join(trace_path, "../../bin"))
+            trace_output_dir = self.trace_output_dir(output_dir, trace_file,
+                                                     policy_Cache)
+            os.makedirs(trace_output_dir, exist_ok=True)
+
+            command = [
+                os.path.join(self.scarab_path, "src/scarab"),
+                "--frontend", "memtrace",
+                "--fetch_off_path_ops", "0",
+                f"--cbp_trace_r0={trace_path}",
+                f"--inst_limit={self.simulation_instructions}",
+                #f"--warmup={self.warmup_instructions}",
+                f"--memtrace_modules_log={bin_dir}",
+                f"--output_dir={trace_output_dir}"
+            ]
+
+            print(f"[INFO] Executing Scarab for {trace_file} with command:")
+            print("       " + " ".join(command))
+
+            # The footprint depends on the Sample, configuration and trace
+            memory_key = os.path.relpath(trace_output_dir, self.output_dir_orig)
+            output_file = os.path.join(trace_output_dir, 'scarab.out')
+
+            self.sweep_journal.record(memory_key, 'running', self.binary_hash)
+            try:
+                # The heartbeats are followed in scarab.out
+                with open(output_file, 'w') as outfile:
+                    record = self.launcher.run(memory_key, command, on_start=release_params,
+                                               record_path=os.path.join(trace_output_dir,
+                                                                        'run_record.json'),
+                                               trace_size=os.path.getsize(trace_path),
+                                               instructions=self.simulation_instructions,
+                                               stdout=outfile, stderr=subprocess.STDOUT)
+                self.sweep_journal.record(
+                    memory_key, 'done' if record.returncode == 0 else 'failed'
+                )
+                self.progress.end(memory_key, ok=record.returncode == 0)
+            except Exception:
+                self.sweep_journal.record(memory_key, 'failed')
+                self.progress.end(memory_key, ok=False)
+                raise
+        finally:
+            # Failed before the run started, the next configuration may go on
+            if not released:
+                self.release_semaphores()
+
+    def pending_traces(self, output_dir, policy_Cache, trace_folder):
+        # Traces of a configuration the journal does not show as done
+        pending = []
+        for trace_file in self.list_traces(trace_folder):
+            run_name = self.run_name(output_dir, trace_file, policy_Cache)
+            if self.sweep_journal.is_done(run_name):
+                print(f"[SKIP] {run_name} already executed")
+            else:
+                pending.append(trace_file)
+        return pending
+
+    def trace_folders(self):
+        folders = []
+        for trace_subdir in os.listdir(self.trace_dir):
+            trace_folder = os.path.join(self.trace_dir, trace_subdir, 'trace')
+            if os.path.isdir(trace_folder):
+                folders.append(trace_folder)
+        return folders
+
+    def prefetcher_folder(self, index, branch, prefetcher):
+        prefetcher_name = self.prefetchers_names.get(prefetcher, f"{prefetcher}")
+        return os.path.join(self.output_dir_orig, f"Sample{index}",
+                            f"{branch}", prefetcher_name)
+
+    def add_progress(self, samples):
+        # Count every run left up front, for the remaining time of the sweep
+        for index, (_, combos) in enumerate(samples, start=1):
+            for trace_folder in self.trace_folders():
+                for policy_Cache, branch, prefetcher in combos:
+                    output_dir = self.prefetcher_folder(index, branch, prefetcher)
+                    for trace_file in self.list_traces(trace_folder):
+                        run_name = self.run_name(output_dir, trace_file, policy_Cache)
+                        if not self.sweep_journal.is_done(run_name):
+                            self.progress.add(run_name, self.simulation_instructions)
+
+    def prepare_execution(self, executor, policy_Cache, trace_folder, trace_files,
+                          output_dir):
+        # Every run gets its own output folder: the next configuration is
+        # prepared while this one's runs are still queued
+        for trace_file in trace_files:
+            trace_path = os.path.join(trace_folder, trace_file)
+            self.sweep_journal.record(
+                self.run_name(output_dir, trace_file, policy_Cache), 'queued'
+            )
+            executor.submit(self.exec_single_trace, trace_file, trace_path,
+                            policy_Cache, output_dir)
 
     ###########################################################################
     # Main entry to run all experiments
@@ -276,47 +430,64 @@ class ScarabExecutor:
         """
         os.makedirs(self.output_dir, exist_ok=True)
 
+        samples = self.sample_combos()
+        self.add_progress(samples)
+        self.progress.start()
+
         with ThreadPoolExecutor(max_workers=self.threads) as executor:
-            for index, (L1I_cfg, L1D_cfg, L2_cfg, LLC_cfg) in enumerate(self.cache_samples, start=1):
+            for index, ((L1I_cfg, L1D_cfg, L2_cfg, LLC_cfg), combos) in enumerate(samples, start=1):
                 sample_folder = os.path.join(self.output_dir_orig, f"Sample{index}")
                 os.makedirs(sample_folder, exist_ok=True)
 
+                # 3) For each directory in your trace path, do the standard loop
+                work = []
+                for trace_folder in self.trace_folders():
+                    # For each cache replacement policy, branch predictor
+                    # and prefetcher
+                    for policy_Cache, branch, prefetcher in combos:
+                        prefetcher_folder = self.prefetcher_folder(index, branch, prefetcher)
+                        os.makedirs(prefetcher_folder, exist_ok=True)
+
+                        # Finished traces are not run again, nor PARAMS.in
+                        # rewritten for them
+                        trace_files = self.pending_traces(
+                            prefetcher_folder, policy_Cache, trace_folder
+                        )
+                        if trace_files:
+                            work.append((trace_folder, policy_Cache, branch,
+                                         prefetcher, prefetcher_folder,
+                                         trace_files))
+
+                # The semaphores taken below are released by the runs, so a
+                # finished Sample must not take them
+                if not work:
+                    continue
+
                 self.modify_cache_size(L1I_cfg, L1D_cfg, L2_cfg, LLC_cfg)
 
-                # 3) For each directory in your trace path, do the standard loop
-                for trace_subdir in os.listdir(self.trace_dir):
-                    full_subdir_path = os.path.join(self.trace_dir, trace_subdir)
-                    if os.path.isdir(full_subdir_path):
-                        trace_folder = os.path.join(full_subdir_path, 'trace')
-                        if os.path.exists(trace_folder):
-                                # For each cache replacement policy
-                            for policy_Cache in self.policies_cache or [None]:
-                                # For each Branch Predictor
-                                for branch in self.branch_predictors or [None]:
-                                    branch_folder = os.path.join(sample_folder,f"{branch}")
-                                    os.makedirs(branch_folder, exist_ok=True)
-                                    # For each prefetcher
-                                    for prefetcher in self.prefetchers or [None]:
-                                        prefetcher_name = self.prefetchers_names.get(prefetcher, f"{prefetcher}")
-                                        prefetcher_folder = os.path.join(branch_folder, prefetcher_name)
-                                        os.makedirs(prefetcher_folder, exist_ok=True)
-
-                                        # Apply the L1/MLC/DCache replacement policy
-                                        self.modify_replacement_cache(policy_Cache)
-                                        # Apply the Branch predictor
-                                        self.modify_branch_predictor(branch) 
-                                        # Apply the Preftecher
-                                        self.modify_prefetcher(prefetcher)
-
-                                        # Write out final param changes (PARAMS.in)
-                                        self.write_file()
-
-                                        self.output_dir = prefetcher_folder
-                                            
-                                        #   2) Now launch the traces in parallel
-                                        self.prepare_execution(
-                                            executor, policy_Cache, trace_folder
-                                        )
+                for (trace_folder, policy_Cache, branch, prefetcher,
+                     prefetcher_folder, trace_files) in work:
+                    # Apply the L1/MLC/DCache replacement policy
+                    self.modify_replacement_cache(policy_Cache)
+                    # Apply the Branch predictor
+                    self.modify_branch_predictor(branch) 
+                    # Apply the Preftecher
+                    self.modify_prefetcher(prefetcher)
+
+                    # Write out final param changes (PARAMS.in)
+                    self.write_file()
+
+                    #   2) Now launch the traces in parallel
+                    self.prepare_execution(
+                        executor, policy_Cache, trace_folder, trace_files,
+                        prefetcher_folder
+                    )
+
+        self.progress.stop()
+        self.sweep_journal.close()
+
+        if self.coordinator:
+            self.coordinator.stop()
                                         
 
 
@@ -368,6 +539,23 @@ def main():
         "1": "stridepc"
     }
 
+    # Memory the simulations may use together (bytes), None for 90% of
+    # the memory available when the sweep starts
+    memory_budget = None
+
+    # Serve the simulations to workers on other hosts (started with
+    # python3 -m common.distributed http://<this host>:8765), e.g.
+    # '10.0.0.1:8765' for the address of this host on a trusted network
+    # (':8765' only listens on 127.0.0.1); threads is then the number of
+    # runs in flight
+    coordinator = None
+
+    # JSON/YAML sweep specification (cartesian and zipped axes, exclusions,
+    # random or Latin hypercube sampling) replacing the lists above and the
+    # cache configurations below, e.g. 'sweep.json'; its policy axis is the
+    # cache replacement policy. See common/sweep.py
+    sweep_file = None
+
     # ----------------------------------------------------------
     #  Define your new cache configuration lists in main
     # ----------------------------------------------------------
@@ -408,6 +596,9 @@ def main():
         L1D_config=L1D_config,
         L2_config=L2_config,
         LLC_config=LLC_config,
+        memory_budget=memory_budget,
+        coordinator=coordinator,
+        sweep_file=sweep_file,
     )
 
     # Kick off the entire run